@@ -0,0 +1,112 @@
+"""
+Benchmark + behaviour check for per-user alert digests.
+
+A provider outage takes most monitors of many customers down at once; the
+next alert run adds a few more for one user. Compares:
+
+- per-notification delivery (the previous deliver_notifications): one
+  email + one Discord post per down monitor, sent in series;
+- per-run digests: one email + one Discord post per user per run, users
+  delivered in parallel.
+
+Delivery is a stand-in that takes a fixed time per message (SMTP enqueue /
+webhook round trip). Checks that every alert lands in exactly one digest
+for its owner, that single alerts keep the old per-site message, and that
+Discord messages stay under Discord's 2000-character limit.
+
+Run from backend/ (MAIL_FROM / MAIL_PASSWORD must be set, as for the app):
+    python -m benchmarks.bench_alert_digest [users] [monitors_per_user] [message_ms]
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+os.chdir(tempfile.mkdtemp(prefix="watcher-bench-"))
+
+from services.monitor_service_pkg.alerts import (  # noqa: E402
+    DISCORD_MESSAGE_LIMIT, NOTIFY_DOWN, deliver_digests, evaluate_alerts, format_digest, format_notification,
+)
+
+USERS = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+PER_USER = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+MESSAGE_SECONDS = float(sys.argv[3]) / 1000 if len(sys.argv) > 3 else 0.02
+
+
+def monitors(run):
+    """Run 0: the outage takes 90% of every user's monitors down; run 1: the rest of user 0's follow"""
+    result = []
+    for user in range(USERS):
+        for m in range(PER_USER):
+            down = m < PER_USER * 0.9 or (run == 1 and user == 0)
+            if user == USERS - 1:
+                down = m == 0  # one user with a single down site
+            result.append({"id": user * 1000 + m, "friendlyName": f"site {user}-{m}",
+                           "url": f"https://{user}-{m}.example", "status": "down" if down else "up"})
+    return result
+
+
+def owner(monitor_id):
+    return f"user{monitor_id // 1000}@example.com"
+
+
+async def main():
+    now = datetime(2026, 3, 1, 12, 0)
+    states = {}
+    runs = []
+    for run in range(2):
+        _, notifications = evaluate_alerts(states, monitors(run), now + timedelta(seconds=10 * run), None)
+        runs.append(notifications)
+    total = sum(len(n) for n in runs)
+
+    # Previous delivery: email + Discord post per notification, in series
+    t0 = time.perf_counter()
+    old_messages = 0
+    for notifications in runs:
+        for kind, monitor, state in notifications:
+            format_notification(kind, monitor, state, now)
+            await asyncio.to_thread(time.sleep, 2 * MESSAGE_SECONDS)
+            old_messages += 2
+    old_elapsed = time.perf_counter() - t0
+
+    delivered = []
+
+    def deliver(email, items):
+        subject, body, discord = format_digest(items)
+        time.sleep(2 * MESSAGE_SECONDS)
+        delivered.append((email, items, subject, body, discord))
+
+    t0 = time.perf_counter()
+    for notifications in runs:
+        by_recipient = {}
+        for kind, monitor, state in notifications:
+            by_recipient.setdefault(owner(monitor["id"]), []).append((kind, monitor, state, now))
+        await deliver_digests(by_recipient, deliver=deliver)
+    new_elapsed = time.perf_counter() - t0
+
+    seen = Counter()
+    for email, items, subject, body, discord in delivered:
+        assert len(discord) <= DISCORD_MESSAGE_LIMIT, len(discord)
+        for kind, monitor, _, _ in items:
+            assert owner(monitor["id"]) == email
+            seen[(monitor["id"], kind)] += 1
+    assert seen == Counter((m["id"], kind) for n in runs for kind, m, _ in n), "alerts lost or duplicated"
+    # Everyone alerted in run 0, plus user 0 again for the monitors that went down in run 1
+    assert len(delivered) == USERS + 1, f"{len(delivered)} digests for {USERS} users"
+    single = next(d for d in delivered if d[0] == owner((USERS - 1) * 1000))
+    kind, monitor, state, at = single[1][0]
+    assert kind == NOTIFY_DOWN and single[2:] == format_notification(kind, monitor, state, at)
+
+    print(f"{USERS} users x {PER_USER} monitors, {total} down alerts over 2 runs, {MESSAGE_SECONDS * 1000:.0f}ms "
+          f"per message")
+    print(f"  per notification: {old_messages:,} emails + Discord posts, {old_elapsed:6.2f}s of delivery")
+    print(f"  digested:         {2 * len(delivered):,} emails + Discord posts, {new_elapsed:6.2f}s of delivery; "
+          f"longest Discord message {max(len(d[4]) for d in delivered)} chars")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,121 @@
+"""
+Benchmark + behaviour check for the transition-based alert state machine.
+
+Simulates a week of alert runs (every 5 minutes) over a few thousand
+monitors with random outages, some of them days long, and compares:
+
+- the previous checker: one email + one Discord post per down monitor per
+  run, plus two owner SELECTs each;
+- the state machine: notifications only on down / reminder / recovery, one
+  state read and one bulk write per run.
+
+Checks that every outage produces exactly one down and one recovery
+notification, the expected number of reminders, none after an
+acknowledgement, and nothing at all for monitors that stay up.
+
+Run from backend/ (MAIL_FROM / MAIL_PASSWORD must be set, as for the app):
+    python -m benchmarks.bench_alert_state [monitors] [days]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+os.chdir(tempfile.mkdtemp(prefix="watcher-bench-"))
+
+from services.monitor_service_pkg.alerts import (  # noqa: E402
+    NOTIFY_DOWN, NOTIFY_RECOVERED, NOTIFY_REMINDER, STATE_ACKNOWLEDGED, evaluate_alerts,
+)
+
+RUN_MINUTES = 5
+REMINDER = timedelta(minutes=60)
+
+
+def make_outages(n_monitors, runs):
+    """monitor id -> list of (first down run, last down run, acknowledged at run or None)"""
+    outages = {}
+    for monitor_id in range(n_monitors):
+        spans, run = [], random.randint(0, 400)
+        while run < runs and random.random() < 0.3:
+            length = random.choice([1, 2, 6, 30, 300, 1000])
+            ack = run + random.randint(1, length) if length > 12 and random.random() < 0.5 else None
+            spans.append((run, min(run + length, runs) - 1, ack))
+            run += length + random.randint(50, 800)
+        outages[monitor_id] = spans
+    return outages
+
+
+def main():
+    n_monitors = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 7
+    runs = days * 24 * 60 // RUN_MINUTES
+    random.seed(3)
+    outages = make_outages(n_monitors, runs)
+    down_at = {run: set() for run in range(runs)}
+    ack_at = {}
+    for monitor_id, spans in outages.items():
+        for first, last, ack in spans:
+            for run in range(first, last + 1):
+                down_at[run].add(monitor_id)
+            if ack is not None and ack <= last:
+                ack_at.setdefault(ack, []).append(monitor_id)
+
+    states = {}
+    sent = Counter()
+    per_monitor = Counter()
+    rows_written = 0
+    old_messages = old_selects = 0
+    eval_seconds = 0.0
+    start = datetime(2026, 1, 1)
+    for run in range(runs):
+        now = start + timedelta(minutes=run * RUN_MINUTES)
+        for monitor_id in ack_at.get(run, []):
+            # POST /alerts/monitor/{id}/ack
+            if states.get(monitor_id, {}).get("state") == "down":
+                states[monitor_id] = {**states[monitor_id], "state": STATE_ACKNOWLEDGED, "acknowledged_at": now}
+        monitors = [{"id": m, "friendlyName": f"site {m}", "url": f"https://{m}.example",
+                     "status": "down" if m in down_at[run] else "up"} for m in range(n_monitors)]
+        old_messages += 2 * len(down_at[run])
+        old_selects += 2 * len(down_at[run])
+
+        t0 = time.perf_counter()
+        changed, notifications = evaluate_alerts(states, monitors, now, REMINDER)
+        eval_seconds += time.perf_counter() - t0
+        rows_written += len(changed)
+        for kind, monitor, _ in notifications:
+            sent[kind] += 1
+            per_monitor[(monitor["id"], kind)] += 1
+
+    # Expected counts per outage
+    expected = Counter()
+    reminder_runs = REMINDER // timedelta(minutes=RUN_MINUTES)
+    for monitor_id, spans in outages.items():
+        for first, last, ack in spans:
+            expected[(monitor_id, NOTIFY_DOWN)] += 1
+            if last < runs - 1:
+                expected[(monitor_id, NOTIFY_RECOVERED)] += 1
+            quiet_from = ack if ack is not None and ack <= last else last + 1
+            expected[(monitor_id, NOTIFY_REMINDER)] += max(0, (quiet_from - 1 - first) // reminder_runs)
+    expected = +expected
+    assert per_monitor == expected, sorted(set(per_monitor.items()) ^ set(expected.items()))[:5]
+    never_down = [m for m, spans in outages.items() if not spans]
+    assert not any(per_monitor[(m, kind)] for m in never_down for kind in (NOTIFY_DOWN, NOTIFY_REMINDER))
+
+    n_outages = sum(len(spans) for spans in outages.values())
+    new_messages = 2 * sum(sent.values())
+    print(f"{n_monitors} monitors, {days} days of {RUN_MINUTES}-minute runs ({runs} runs), {n_outages} outages, "
+          f"reminders every {REMINDER}")
+    print(f"  previous checker: {old_messages:,} emails + Discord posts, {old_selects:,} owner SELECTs")
+    print(f"  state machine:    {new_messages:,} emails + Discord posts "
+          f"(down {sent[NOTIFY_DOWN]}, reminders {sent[NOTIFY_REMINDER]}, recovered {sent[NOTIFY_RECOVERED]}), "
+          f"{2 * runs:,} state queries, {rows_written:,} rows upserted")
+    print(f"  evaluation: {eval_seconds / runs * 1000:.2f}ms per run "
+          f"({eval_seconds / runs / n_monitors * 1e6:.2f}us per monitor)")
+
+
+if __name__ == "__main__":
+    main()
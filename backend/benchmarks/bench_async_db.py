@@ -0,0 +1,191 @@
+"""
+Benchmark for request-path queries: blocking psycopg2 calls inside
+`async def` handlers vs the async AsyncDB layer.
+
+Both sides use stand-in connections with a fixed delay per round trip (the
+network latency to a remote Supabase instance) behind a pool of the same
+size: the old handlers call AuthDB.login_user / MonitorDB.get_monitor_by_user
+on the event loop thread; the new ones await the AsyncDB equivalents. A
+ticker task measures how late the event loop gets to it while the requests
+are in flight, i.e. the stall every other request in the process sees.
+
+Run from backend/ (MAIL_FROM / MAIL_PASSWORD must be set, as for the app):
+    python -m benchmarks.bench_async_db [requests] [rtt_ms]
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+
+os.chdir(tempfile.mkdtemp(prefix="watcher-bench-"))
+
+from database import AsyncDB, AuthDB, MonitorDB  # noqa: E402
+from database.pool import ConnectionPool  # noqa: E402
+
+REQUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+RTT = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.02
+POOL_SIZE = 10
+
+# users.email -> row, monitors by userid
+USERS = {f"user{i}@example.com": (i, f"user {i}", f"user{i}@example.com", AuthDB.hash_password("secret"), True)
+         for i in range(50)}
+MONITORS = {i: [(i * 10 + m, i, f"site {m}", f"https://{i}-{m}.example", "2026-01-01", 300, True) for m in range(3)]
+            for i in range(50)}
+
+
+def _rows(sql, params):
+    if "FROM users" in sql:
+        row = USERS.get(params[0])
+        return [row] if row else []
+    if "FROM monitors" in sql:
+        return MONITORS.get(params[0], [])
+    return []
+
+
+class SyncCursor:
+    def __init__(self):
+        self._rows = []
+
+    def execute(self, sql, params=()):
+        time.sleep(RTT)
+        self._rows = _rows(sql, params)
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self):
+        return self._rows
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+class SyncConnection:
+    closed = 0
+
+    class info:
+        transaction_status = 0  # idle
+
+    def __init__(self):
+        time.sleep(RTT)
+
+    def cursor(self):
+        return SyncCursor()
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class AsyncCursor(SyncCursor):
+    async def execute(self, sql, params=()):
+        await asyncio.sleep(RTT)
+        self._rows = _rows(sql, params)
+
+    async def fetchone(self):
+        return super().fetchone()
+
+    async def fetchall(self):
+        return super().fetchall()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+
+class AsyncConnection:
+    def cursor(self):
+        return AsyncCursor()
+
+    async def commit(self):
+        pass
+
+
+class AsyncStandInPool:
+    """Same size as the sync pool; connections are already open, as after warm-up"""
+
+    def __init__(self, size):
+        self._free = asyncio.Queue()
+        for _ in range(size):
+            self._free.put_nowait(AsyncConnection())
+
+    @asynccontextmanager
+    async def connection(self):
+        connection = await self._free.get()
+        try:
+            yield connection
+        finally:
+            self._free.put_nowait(connection)
+
+
+async def old_handler(i):
+    """The previous route handlers: blocking calls inside `async def`"""
+    login = AuthDB.login_user(f"user{i % 50}@example.com", "secret")
+    monitors = MonitorDB.get_monitor_by_user(login["user"]["id"])
+    return login["success"] and monitors["success"]
+
+
+async def new_handler(i):
+    login = await AsyncDB.login_user(f"user{i % 50}@example.com", "secret")
+    monitors = await AsyncDB.get_monitor_by_user(login["user"]["id"])
+    return login["success"] and monitors["success"]
+
+
+async def run(handler):
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker(interval=0.005):
+        while not done.is_set():
+            t0 = time.perf_counter()
+            await asyncio.sleep(interval)
+            lags.append(time.perf_counter() - t0 - interval)
+
+    tick = asyncio.create_task(ticker())
+    await asyncio.sleep(0.02)
+    t0 = time.perf_counter()
+    results = await asyncio.gather(*(handler(i) for i in range(REQUESTS)))
+    elapsed = time.perf_counter() - t0
+    done.set()
+    await tick
+    assert all(results)
+    lags.sort()
+    return elapsed, lags[len(lags) // 2], lags[-1]
+
+
+async def main():
+    sync_pool = ConnectionPool(SyncConnection, minconn=POOL_SIZE, maxconn=POOL_SIZE)
+    AuthDB.db_connection = MonitorDB.db_connection = sync_pool.connection
+    AsyncDB.db_connection = AsyncStandInPool(POOL_SIZE).connection
+    # Warm the sync pool so neither side pays for connects
+    held = [sync_pool.getconn() for _ in range(POOL_SIZE)]
+    for connection in held:
+        sync_pool.putconn(connection)
+
+    print(f"{REQUESTS} concurrent requests (login + monitors of the user), {RTT * 1000:.0f}ms per round trip, "
+          f"pool of {POOL_SIZE}")
+    for name, handler in (("blocking psycopg2", old_handler), ("AsyncDB", new_handler)):
+        elapsed, lag_p50, lag_max = await run(handler)
+        print(f"  {name:<17}: {elapsed * 1000:7.0f}ms total, {REQUESTS / elapsed:6.0f} requests/s, "
+              f"event loop stalled p50 {lag_p50 * 1000:6.1f}ms max {lag_max * 1000:7.1f}ms")
+    sync_pool.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,68 @@
+"""
+Benchmark: pure-Python makeCheck vs the NumPy check-timeline builder.
+
+Builds a history of one-minute response times (default 90 days, ~130k points)
+plus logs, asserts that both paths serialize to identical JSON, and times
+them end to end (including serialization, as FastAPI would do it).
+
+Run from backend/:
+    python -m benchmarks.bench_check_timeline [days] [logs]
+"""
+
+import random
+import sys
+import time
+
+from fastapi.encoders import jsonable_encoder
+
+from services.monitor_service_pkg.check_timeline import build_check_timeline
+from services.monitor_service_pkg import stats_service
+
+
+def make_minute_history(days, n_logs, seed=11):
+    rng = random.Random(seed)
+    now = int(time.time())
+    start = now - days * 86400
+    response_times = [
+        {"datetime": ts, "value": rng.randint(80, 900)}
+        for ts in range(now - 60, start, -60)
+    ]
+    logs = [
+        {"id": 10_000 + i, "type": rng.choice((1, 2)), "datetime": now - rng.randrange(days * 86400),
+         "reason": rng.choice(({"code": "200", "detail": "OK"}, {"code": "503", "detail": "Service Unavailable"}, {}))}
+        for i in range(n_logs)
+    ]
+    # a few malformed / out-of-range entries, as real payloads occasionally contain
+    response_times += [{"datetime": 0, "value": 5}, {"datetime": now - 400 * 86400, "value": 5}, {"datetime": now - 120, "value": -1}]
+    logs.sort(key=lambda log: log["datetime"], reverse=True)
+    return logs, response_times
+
+
+def timed(fn, *args):
+    """(serialized result, build seconds, build + serialization seconds)"""
+    start = time.perf_counter()
+    checks = fn(*args)
+    built = time.perf_counter()
+    result = jsonable_encoder(checks)
+    return result, built - start, time.perf_counter() - start
+
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 90
+    n_logs = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+    logs, response_times = make_minute_history(days, n_logs)
+
+    expected, pure_build, pure_total = timed(stats_service.makeCheck, logs, response_times)
+    actual, numpy_build, numpy_total = timed(build_check_timeline, logs, response_times)
+    assert actual == expected, "vectorized timeline differs from makeCheck"
+    assert stats_service.check_rows(logs, response_times) == expected
+
+    print(f"{days} days of 1-minute response times ({len(response_times)} points), {n_logs} logs -> {len(actual)} checks")
+    print(f"{'':<22}{'build':>9}{'+ serialize':>13}")
+    print(f"{'pure Python makeCheck':<22}{pure_build:8.3f}s{pure_total:12.3f}s")
+    print(f"{'NumPy timeline':<22}{numpy_build:8.3f}s{numpy_total:12.3f}s")
+    print(f"speed-up: build {pure_build / numpy_build:,.1f}x, end to end {pure_total / numpy_total:,.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Benchmark + behaviour check for the shared Postgres connection pool.
+
+Connections are stand-ins with a fixed cost per connect (TCP + TLS + auth to
+a remote Supabase instance) and per query round trip; they count how many
+are open so leaks show up.
+
+1. Sequential logins of an unknown user through the previous login_user
+   (new connection per call, leaked on the "User not found" return) and
+   through the pooled AuthDB.login_user.
+2. Concurrency: many threads running queries through a smaller pool;
+   reports throughput, saturation and wait-time metrics.
+3. Health checks: connections the server dropped while idle are replaced
+   without an error reaching the caller.
+4. Timeout: a checkout from an exhausted pool fails after DB_POOL_TIMEOUT.
+
+Run from backend/:
+    python -m benchmarks.bench_db_pool [connect_ms] [query_ms]
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+os.chdir(tempfile.mkdtemp(prefix="watcher-bench-"))
+
+from psycopg2.pool import PoolError  # noqa: E402
+
+from database import AuthDB  # noqa: E402
+from database.pool import ConnectionPool  # noqa: E402
+
+CONNECT_SECONDS = float(sys.argv[1]) / 1000 if len(sys.argv) > 1 else 0.03
+QUERY_SECONDS = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.005
+
+
+class Server:
+    open = 0
+    connects = 0
+    lock = threading.Lock()
+
+
+class StandInCursor:
+    def __init__(self, conn):
+        self._conn = conn
+        self._row = None
+
+    def execute(self, sql, params=()):
+        if self._conn.broken:
+            self._conn.closed = 2
+            raise ConnectionError("server closed the connection unexpectedly")
+        time.sleep(QUERY_SECONDS)
+        self._row = (1,) if sql.strip() == "SELECT 1" else None
+
+    def fetchone(self):
+        return self._row
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+class StandInConnection:
+    class info:
+        transaction_status = 0  # idle
+
+    def __init__(self):
+        time.sleep(CONNECT_SECONDS)
+        self.closed = 0
+        self.broken = False
+        with Server.lock:
+            Server.open += 1
+            Server.connects += 1
+
+    def cursor(self):
+        return StandInCursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        if self.closed != 1:
+            with Server.lock:
+                Server.open -= 1
+        self.closed = 1
+
+
+def old_login_user(email, password):
+    """login_user before the pool: new connection per call, not closed when the user is missing"""
+    try:
+        connection = StandInConnection()
+        cursor = connection.cursor()
+        cursor.execute("SELECT id, name, email, passhash, email_verified FROM users WHERE email = %s", (email,))
+        user = cursor.fetchone()
+        if not user:
+            return {"success": False, "message": "User not found"}
+        cursor.close()
+        connection.close()
+        return {"success": True}
+    except Exception as e:
+        return {"success": False, "message": f"Login failed: {str(e)}"}
+
+
+def _reset():
+    Server.open = Server.connects = 0
+
+
+def sequential(n=200):
+    _reset()
+    t0 = time.perf_counter()
+    for _ in range(n):
+        assert old_login_user("nobody@example.com", "x")["message"] == "User not found"
+    old_elapsed, old_open, old_connects = time.perf_counter() - t0, Server.open, Server.connects
+
+    _reset()
+    AuthDB.db_pool = ConnectionPool(StandInConnection, minconn=1, maxconn=10)
+    t0 = time.perf_counter()
+    for _ in range(n):
+        assert AuthDB.login_user("nobody@example.com", "x")["message"] == "User not found"
+    new_elapsed = time.perf_counter() - t0
+    print(f"  {n} logins of an unknown user: {old_elapsed * 1000 / n:.1f}ms -> {new_elapsed * 1000 / n:.1f}ms each, "
+          f"connects {old_connects} -> {Server.connects}, left open {old_open} -> {Server.open}")
+    assert Server.connects == 1 and Server.open == 1
+    AuthDB.db_pool.close()
+    assert Server.open == 0
+
+
+def concurrent(threads=32, per_thread=50, max_size=10):
+    def run(query):
+        barrier = threading.Barrier(threads)
+
+        def worker():
+            barrier.wait()
+            for _ in range(per_thread):
+                query()
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        t0 = time.perf_counter()
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        return time.perf_counter() - t0
+
+    def unpooled():
+        connection = StandInConnection()
+        connection.cursor().execute("SELECT id FROM users WHERE email = %s", ("a",))
+        connection.close()
+
+    pool = ConnectionPool(StandInConnection, minconn=2, maxconn=max_size, timeout=30)
+
+    def pooled():
+        with pool.connection() as connection, connection.cursor() as cursor:
+            cursor.execute("SELECT id FROM users WHERE email = %s", ("a",))
+
+    total = threads * per_thread
+    _reset()
+    old = run(unpooled)
+    old_connects = Server.connects
+    _reset()
+    new = run(pooled)
+    stats = pool.stats()
+    print(f"  {threads} threads x {per_thread} queries, pool max {max_size}: {total / old:,.0f} -> {total / new:,.0f} queries/s, "
+          f"connects {old_connects} -> {stats['connects']}")
+    print(f"  pool metrics: waited {stats['waited']}/{stats['checkouts']} checkouts, wait p50 {stats['wait_ms_p50']}ms "
+          f"p99 {stats['wait_ms_p99']}ms max {stats['wait_ms_max']}ms, timeouts {stats['timeouts']}, "
+          f"open {stats['open']} (idle {stats['idle']}), in use {stats['in_use']}")
+    assert stats["connects"] <= max_size and stats["in_use"] == 0 and stats["timeouts"] == 0
+    pool.close()
+
+
+def health_checks():
+    _reset()
+    pool = ConnectionPool(StandInConnection, minconn=1, maxconn=4, health_check_after=0.05)
+    held = [pool.getconn() for _ in range(4)]
+    for conn in held:
+        pool.putconn(conn)
+    for conn in held:
+        conn.broken = True  # e.g. Supabase restarted while they sat idle
+    time.sleep(0.1)
+    errors = 0
+    for _ in range(8):
+        try:
+            with pool.connection() as connection, connection.cursor() as cursor:
+                cursor.execute("SELECT id FROM users WHERE email = %s", ("a",))
+        except Exception:
+            errors += 1
+    stats = pool.stats()
+    print(f"  {len(held)} idle connections dropped by the server: {stats['discarded']} discarded by the health check, "
+          f"{errors} errors seen by callers")
+    assert errors == 0 and stats["discarded"] >= 1
+    pool.close()
+
+
+def timeout():
+    pool = ConnectionPool(StandInConnection, minconn=1, maxconn=2, timeout=0.2)
+    held = [pool.getconn() for _ in range(2)]
+    t0 = time.perf_counter()
+    try:
+        pool.getconn()
+        raise AssertionError("checkout from an exhausted pool should time out")
+    except PoolError as e:
+        waited = time.perf_counter() - t0
+        print(f"  exhausted pool: checkout failed after {waited * 1000:.0f}ms ({e}); "
+              f"saturation {pool.stats()['saturation']}, timeouts {pool.stats()['timeouts']}")
+    for conn in held:
+        pool.putconn(conn)
+    assert pool.stats()["in_use"] == 0
+    pool.close()
+
+
+def main():
+    print(f"stand-in connect {CONNECT_SECONDS * 1000:.0f}ms, query round trip {QUERY_SECONDS * 1000:.0f}ms")
+    sequential()
+    concurrent()
+    health_checks()
+    timeout()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""
+Benchmark + behaviour check for the Discord webhook dispatcher.
+
+A local stub of Discord's execute-webhook endpoint enforces a per-webhook
+bucket (X-RateLimit-* headers, 429 with a JSON retry_after once it is
+exhausted), throws in unannounced "shared" 429s, and answers unknown
+webhooks with 404. Compares:
+
+- the previous sending: one blocking requests.post per alert, made from
+  the event loop, ignoring 429s (those alerts are lost);
+- the dispatcher: alerts submitted from the loop and from a worker
+  thread, batched into embed arrays and paced by the bucket.
+
+Checks that every alert is delivered exactly once and in order, messages
+stay within 10 embeds / 6000 characters, a webhook stuck behind a long
+429 does not hold up another one, a global 429 pauses every webhook, and
+a 404 is given up on without retries.
+
+Run from backend/:
+    python -m benchmarks.bench_discord_dispatcher [alerts] [latency_ms] [bucket_limit] [bucket_reset_ms]
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+os.chdir(tempfile.mkdtemp(prefix="watcher-bench-"))
+
+from services.monitor_service_pkg.discord_dispatcher import (  # noqa: E402
+    DISCORD_EMBED_TOTAL_LIMIT, DISCORD_EMBEDS_PER_MESSAGE, DiscordDispatcher, embed_size, make_embed,
+)
+from services.monitor_service_pkg.rate_limit import RetryPolicy  # noqa: E402
+
+ALERTS = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+LATENCY = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.02
+# Discord allows about 5 requests per 2s per webhook; scaled down so the run stays short
+BUCKET_LIMIT = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+BUCKET_RESET = float(sys.argv[4]) / 1000 if len(sys.argv) > 4 else 0.5
+SHARED_429_EVERY = 7
+
+
+class StubWebhook:
+    """One webhook's bucket, as the Discord API reports it"""
+
+    def __init__(self, name, first_retry_after=0.0, global_first=False):
+        self.name = name
+        self.count = 0
+        self.window_ends = 0.0
+        self.accepted = 0
+        self.first_retry_after = first_retry_after
+        self.global_first = global_first
+        self.messages = []
+        self.arrivals = []  # monotonic time of each accepted message
+        self.responses = Counter()
+        self.lock = threading.Lock()
+
+    def handle(self, payload):
+        now = time.monotonic()
+        with self.lock:
+            if self.global_first:
+                self.global_first = False
+                return 429, {"X-RateLimit-Global": "true", "X-RateLimit-Scope": "global"}, \
+                    {"message": "You are being rate limited.", "retry_after": 0.3, "global": True}
+            if self.first_retry_after:
+                retry_after, self.first_retry_after = self.first_retry_after, 0.0
+                return 429, {"X-RateLimit-Scope": "shared"}, \
+                    {"message": "You are being rate limited.", "retry_after": retry_after, "global": False}
+            if now >= self.window_ends:
+                self.count, self.window_ends = 0, now + BUCKET_RESET
+            headers = {"X-RateLimit-Limit": str(BUCKET_LIMIT), "X-RateLimit-Bucket": f"bucket-{self.name}",
+                       "X-RateLimit-Reset-After": f"{self.window_ends - now:.3f}"}
+            if self.count >= BUCKET_LIMIT:
+                headers["X-RateLimit-Remaining"] = "0"
+                return 429, {**headers, "X-RateLimit-Scope": "user"}, \
+                    {"message": "You are being rate limited.", "retry_after": round(self.window_ends - now, 3),
+                     "global": False}
+            self.count += 1
+            self.accepted += 1
+            if SHARED_429_EVERY and self.accepted % SHARED_429_EVERY == 0:
+                # A channel-wide limit the bucket headers don't announce
+                return 429, {"X-RateLimit-Scope": "shared"}, \
+                    {"message": "You are being rate limited.", "retry_after": 0.05, "global": False}
+            headers["X-RateLimit-Remaining"] = str(BUCKET_LIMIT - self.count)
+            self.messages.append(payload)
+            self.arrivals.append(now)
+            return 204, headers, None
+
+
+HOOKS = {}
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        time.sleep(LATENCY)
+        hook = HOOKS.get(self.path)
+        if hook is None:
+            status, headers, body = 404, {}, {"message": "Unknown Webhook", "code": 10015}
+        else:
+            status, headers, body = hook.handle(payload)
+            hook.responses[status] += 1
+        data = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if status == 429:
+            self.send_header("Retry-After", str(int(body["retry_after"]) + 1))
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def webhook(base_url, name, **kwargs):
+    path = f"/api/webhooks/{name}/secret-token-{name}"
+    HOOKS[path] = StubWebhook(name, **kwargs)
+    return base_url + path, HOOKS[path]
+
+
+def alert_embed(i):
+    # Mostly short digests, every 25th a long one that fills most of a message on its own
+    lines = 30 if i % 25 == 0 else 4
+    description = f"🚨 alert {i}" + "".join(f"\n🚨 DOWN: site {i}-{n} (https://{i}-{n}.example)" for n in range(lines))
+    return make_embed(f"[ALERT] alert {i}", description)
+
+
+def delivered(hook):
+    return [embed["title"] for message in hook.messages for embed in message["embeds"]]
+
+
+def check_messages(hook):
+    for message in hook.messages:
+        assert len(message["embeds"]) <= DISCORD_EMBEDS_PER_MESSAGE
+        assert sum(embed_size(embed) for embed in message["embeds"]) <= DISCORD_EMBED_TOTAL_LIMIT
+
+
+class StallMeter:
+    """How late a 5ms ticker runs, i.e. how long the event loop is blocked"""
+
+    def __init__(self):
+        self.worst = 0.0
+        self._task = None
+
+    async def _tick(self):
+        while True:
+            t0 = time.perf_counter()
+            await asyncio.sleep(0.005)
+            self.worst = max(self.worst, time.perf_counter() - t0 - 0.005)
+
+    def __enter__(self):
+        self.worst = 0.0
+        self._task = asyncio.create_task(self._tick())
+        return self
+
+    def __exit__(self, *exc):
+        self._task.cancel()
+
+
+async def wait_sent(dispatcher, timeout=120):
+    deadline = time.monotonic() + timeout
+    while dispatcher.stats()["queued"]:
+        assert time.monotonic() < deadline, f"dispatcher not drained: {dispatcher.stats()}"
+        await asyncio.sleep(0.01)
+
+
+async def previous(base_url):
+    url, hook = webhook(base_url, "old")
+    with StallMeter() as stall:
+        await asyncio.sleep(0.01)  # the ticker is waiting
+        t0 = time.perf_counter()
+        lost = 0
+        for i in range(ALERTS):
+            embed = alert_embed(i)
+            response = requests.post(url, json={"content": embed["description"][:2000]}, timeout=10)
+            lost += response.status_code >= 300
+        elapsed = time.perf_counter() - t0
+        await asyncio.sleep(0.01)
+    print(f"  requests.post per alert: {ALERTS} posts in {elapsed:5.2f}s, {lost} lost to 429s, "
+          f"event loop blocked up to {stall.worst * 1000:.0f}ms")
+
+
+async def dispatched(base_url):
+    dispatcher = DiscordDispatcher(batch_seconds=0.05)
+    dispatcher.start()
+    url_a, hook_a = webhook(base_url, "a")
+    # Webhook b starts with a 1.5s 429; a must not wait for it
+    url_b, hook_b = webhook(base_url, "b", first_retry_after=1.5)
+
+    half = ALERTS // 2
+    embeds = [alert_embed(i) for i in range(ALERTS)]
+
+    def from_thread():
+        for embed in embeds[half:]:
+            assert dispatcher.submit(embed, url_b)
+
+    with StallMeter() as stall:
+        started = time.monotonic()
+        t0 = time.perf_counter()
+        for embed in embeds[:half]:
+            assert dispatcher.submit(embed, url_a)
+        submit_us = (time.perf_counter() - t0) / half * 1e6
+        await asyncio.to_thread(from_thread)
+        await wait_sent(dispatcher)
+        elapsed = time.perf_counter() - t0
+
+    for hook, expected in ((hook_a, embeds[:half]), (hook_b, embeds[half:])):
+        check_messages(hook)
+        assert delivered(hook) == [embed["title"] for embed in expected], f"webhook {hook.name}: lost or reordered"
+    a_first, b_first = hook_a.arrivals[0] - started, hook_b.arrivals[0] - started
+    a_sent_early = sum(1 for t in hook_a.arrivals if t - started < 1.5)
+    assert b_first >= 1.5 and a_first < 0.5, f"webhook a waited for b's 429 (first messages {a_first:.2f}s / {b_first:.2f}s)"
+    stats = dispatcher.stats()
+    await dispatcher.stop()
+    messages = len(hook_a.messages) + len(hook_b.messages)
+    status_429 = hook_a.responses[429] + hook_b.responses[429]
+    print(f"  dispatcher:              {ALERTS} alerts in {messages} messages, {elapsed:5.2f}s until sent, 0 lost "
+          f"({status_429} 429s retried, {stats['throttled']} waits on the bucket), "
+          f"submit {submit_us:.0f}us, event loop blocked up to {stall.worst * 1000:.0f}ms")
+    print(f"  webhook a sent {a_sent_early} messages (first after {a_first:.2f}s) while b sat out a 1.5s 429; "
+          f"stats {stats}")
+
+
+async def global_and_unknown(base_url):
+    dispatcher = DiscordDispatcher(batch_seconds=0, retry_policy=RetryPolicy(max_retries=3, base_delay=0.05))
+    dispatcher.start()
+    url_g, hook_g = webhook(base_url, "g", global_first=True)
+    url_h, hook_h = webhook(base_url, "h")
+    t0 = time.perf_counter()
+    assert dispatcher.submit(make_embed("global", "x"), url_g)
+    await asyncio.sleep(0.1)  # the global 429 has come back
+    assert dispatcher.submit(make_embed("other", "x"), url_h)
+    await wait_sent(dispatcher)
+    paused = time.perf_counter() - t0
+    assert delivered(hook_g) == ["global"] and delivered(hook_h) == ["other"]
+    assert paused >= 0.3, f"global 429 did not pause other webhooks ({paused:.2f}s)"
+
+    unknown = base_url + "/api/webhooks/404/deleted"
+    assert dispatcher.submit(make_embed("gone", "x"), unknown)
+    await wait_sent(dispatcher)
+    stats = dispatcher.stats()
+    assert stats["failed"] == 1 and stats["retried"] == 1, stats
+    assert not any("secret-token" in key for key in stats["webhooks"])
+    await dispatcher.stop()
+    print(f"  global 429 held a second webhook back {paused:.2f}s; deleted webhook (404) dropped without retries")
+
+
+async def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    print(f"stub webhook: {LATENCY * 1000:.0f}ms per request, bucket {BUCKET_LIMIT} per {BUCKET_RESET * 1000:.0f}ms, "
+          f"every {SHARED_429_EVERY}th accepted request a shared 429")
+    await previous(base_url)
+    await dispatched(base_url)
+    await global_and_unknown(base_url)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
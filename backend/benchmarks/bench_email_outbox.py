@@ -0,0 +1,163 @@
+"""
+Benchmark + behaviour check for the durable email outbox.
+
+The SMTP side is a stand-in EmailService whose deliver() takes a fixed time
+(a new STARTTLS + login session per message costs ~300ms against a remote
+server; see bench_smtp_pool) and can fail on purpose:
+
+1. Request latency: signup/resend sending the OTP inline vs enqueueing it.
+2. Retries: transient 4xx failures are retried with backoff until sent;
+   a permanent 5xx refusal fails at once.
+3. Idempotency: the same key enqueued twice is sent once.
+4. Restart: the worker is stopped mid-queue and a row is left claimed by a
+   "crashed" worker; a new worker (and a second one racing it) delivers
+   every remaining row exactly once.
+
+Run from backend/:
+    python -m benchmarks.bench_email_outbox [emails] [smtp_ms]
+"""
+
+import asyncio
+import os
+import smtplib
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+os.chdir(tempfile.mkdtemp(prefix="watcher-bench-"))
+os.environ.setdefault("OUTBOX_BACKOFF_SECONDS", "0.05")
+
+from services.auth_mail_pkg import outbox as outbox_module  # noqa: E402
+from services.auth_mail_pkg.outbox import (  # noqa: E402
+    STATUS_FAILED, STATUS_SENT, EmailOutbox, claim_due, enqueue_email, enqueue_otp_email, queue_depth,
+)
+
+EMAILS = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+SMTP_SECONDS = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.3
+
+
+class StandInService:
+    def __init__(self, seconds, transient=None, permanent=()):
+        self.seconds = seconds
+        self.transient = Counter(transient or {})  # recipient -> failures left
+        self.permanent = set(permanent)
+        self.delivered = Counter()
+        self.lock = threading.Lock()
+
+    def deliver(self, recipient_email, subject, text=None, html=None):
+        time.sleep(self.seconds)
+        with self.lock:
+            if recipient_email in self.permanent:
+                raise smtplib.SMTPRecipientsRefused({recipient_email: (550, b"No such user")})
+            if self.transient[recipient_email] > 0:
+                self.transient[recipient_email] -= 1
+                raise smtplib.SMTPResponseException(421, b"Try again later")
+            self.delivered[(recipient_email, subject)] += 1
+
+    def send_otp_email(self, recipient_email, otp, expire):
+        self.deliver(recipient_email, "otp")
+        return True
+
+
+def make_worker(service, **kwargs):
+    worker = EmailOutbox(workers=4, poll_seconds=0.05, **kwargs)
+    worker.service = service
+    # enqueue_email wakes the module-level worker
+    outbox_module.outbox = worker
+    return worker
+
+
+async def drain(worker, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        depth = await asyncio.to_thread(queue_depth)
+        if not depth.get("pending") and not depth.get("sending"):
+            return depth
+        await asyncio.sleep(0.05)
+    raise AssertionError(f"outbox not drained: {depth}")
+
+
+async def request_latency():
+    service = StandInService(SMTP_SECONDS)
+    n = 20
+    t0 = time.perf_counter()
+    for i in range(n):
+        service.send_otp_email(f"inline{i}@example.com", "123456", expire=1)
+    inline = (time.perf_counter() - t0) / n
+
+    worker = make_worker(service)
+    t0 = time.perf_counter()
+    for i in range(n):
+        enqueue_otp_email(f"queued{i}@example.com", "123456", expire=1)
+    queued = (time.perf_counter() - t0) / n
+    worker.start()
+    await drain(worker)
+    await worker.stop()
+    print(f"  OTP email in the signup request: {inline * 1000:.1f}ms inline -> {queued * 1000:.2f}ms to enqueue "
+          f"(delivered later: {sum(1 for r, _ in service.delivered if r.startswith('queued'))}/{n})")
+    stats = worker.stats()
+    print(f"  enqueue -> sent latency p50 {stats['send_latency_ms_p50']}ms p99 {stats['send_latency_ms_p99']}ms")
+
+
+async def retries_and_dedupe():
+    service = StandInService(0.01, transient={"flaky@example.com": 3}, permanent=["gone@example.com"])
+    worker = make_worker(service)
+    worker.start()
+    assert enqueue_email("flaky@example.com", "flaky", text="x", idempotency_key="flaky")
+    assert enqueue_email("gone@example.com", "gone", text="x", idempotency_key="gone")
+    assert enqueue_email("once@example.com", "once", text="x", idempotency_key="once")
+    assert not enqueue_email("once@example.com", "once", text="x", idempotency_key="once")
+    depth = await drain(worker)
+    await worker.stop()
+    stats = worker.stats()
+    assert service.delivered[("flaky@example.com", "flaky")] == 1
+    assert service.delivered[("once@example.com", "once")] == 1
+    assert not any(r == "gone@example.com" for r, _ in service.delivered)
+    assert depth.get(STATUS_FAILED) == 1 and stats["retried"] == 3 and stats["deduplicated"] == 1
+    print(f"  retries: flaky recipient sent after {stats['retried']} backoffs, 550 failed at once, "
+          f"duplicate key skipped; by status {depth}")
+
+
+async def restart():
+    service = StandInService(0.005)
+    keys = [f"restart-{i}" for i in range(EMAILS)]
+    for key in keys:
+        enqueue_email(f"{key}@example.com", key, text="x", idempotency_key=key)
+    # A worker that claimed a batch and died before sending it
+    crashed = claim_due("crashed-worker", 5, outbox_module.datetime.utcnow(), 0)
+
+    first = make_worker(service, batch_size=10)
+    first.start()
+    while sum(service.delivered.values()) < EMAILS // 3:
+        await asyncio.sleep(0.01)
+    await first.stop()
+    await asyncio.sleep(0.1)  # sends still running when it stopped finish in the background
+    sent_before = sum(service.delivered.values())
+
+    # Restart: two workers racing over the rest, crashed claims are taken back after the (short) timeout
+    second = make_worker(service, batch_size=10, claim_timeout=0.2)
+    third = EmailOutbox(workers=4, poll_seconds=0.05, batch_size=10, claim_timeout=0.2)
+    third.service = service
+    second.start()
+    third.start()
+    depth = await drain(second)
+    await second.stop()
+    await third.stop()
+    expected = Counter({(f"{key}@example.com", key): 1 for key in keys})
+    delivered = Counter({k: v for k, v in service.delivered.items() if k[1].startswith("restart-")})
+    assert delivered == expected, f"{sum(delivered.values())} deliveries for {EMAILS} emails"
+    print(f"  restart: {sent_before}/{EMAILS} sent before the stop, {len(crashed)} rows left claimed by a dead "
+          f"worker; after restart with 2 workers every email delivered exactly once ({depth.get(STATUS_SENT)} sent)")
+
+
+async def main():
+    print(f"stand-in SMTP {SMTP_SECONDS * 1000:.0f}ms per message, {EMAILS} emails for the restart check")
+    await request_latency()
+    await retries_and_dedupe()
+    await restart()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,75 @@
+"""
+Benchmark: dashboard listing join (filter_by_user_id).
+
+50k account monitors x 500 user monitors. The previous implementation printed
+every monitor and did a linear scan of the user's monitors per match; its
+stdout is sent to /dev/null here so only the console I/O cost remains, not
+the terminal's. Also checks the join over a paginated stream.
+
+Run from backend/:
+    python -m benchmarks.bench_filter_by_user_id [account_monitors] [user_monitors]
+"""
+
+import contextlib
+import itertools
+import os
+import random
+import sys
+import time
+
+from services.monitor_service_pkg.api_client import filter_by_user_id
+
+
+def legacy_filter_by_user_id(Allmonitors, userMonitors):
+    user_monitor_ids = {monitor.get('monitorid') for monitor in userMonitors}
+    filtered_monitors = []
+    for monitor in Allmonitors:
+        print(monitor)
+        if monitor.get('id') in user_monitor_ids:
+            user_monitor = next((um for um in userMonitors if um.get('monitorid') == monitor.get('id')), None)
+            merged_monitor = monitor.copy()
+            if user_monitor:
+                merged_monitor['userid'] = user_monitor.get('userid')
+                merged_monitor['monitor_created'] = user_monitor.get('monitor_created')
+                if user_monitor.get('sitename') != monitor.get('friendlyName'):
+                    merged_monitor['user_sitename'] = user_monitor.get('sitename')
+            filtered_monitors.append(merged_monitor)
+    return filtered_monitors
+
+
+def main():
+    n_all = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    n_user = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    rng = random.Random(3)
+    all_monitors = [
+        {"id": 800_000_000 + i, "interval": 300, "friendlyName": f"site-{i}", "url": f"https://site-{i}.example",
+         "status": "UP", "createDateTime": "2025-01-01T00:00:00Z"}
+        for i in range(n_all)
+    ]
+    user_monitors = [
+        {"monitorid": m["id"], "userid": 42, "sitename": rng.choice((m["friendlyName"], "renamed")),
+         "site_url": m["url"], "monitor_created": "2025-01-01T00:00:00"}
+        for m in rng.sample(all_monitors, n_user)
+    ]
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        expected = legacy_filter_by_user_id(all_monitors, user_monitors)
+        legacy_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = filter_by_user_id(all_monitors, user_monitors)
+    join_elapsed = time.perf_counter() - start
+    assert actual == expected
+
+    pages = (all_monitors[i:i + 200] for i in range(0, n_all, 200))
+    assert filter_by_user_id(itertools.chain.from_iterable(pages), user_monitors) == expected
+
+    print(f"{n_all} account monitors x {n_user} user monitors -> {len(actual)} rows")
+    print(f"print + linear scan: {legacy_elapsed:7.3f}s")
+    print(f"hash join:           {join_elapsed:7.3f}s")
+    print(f"speed-up: {legacy_elapsed / join_elapsed:,.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Regression check + benchmark for incident intervals.
+
+1. Ingests random down/up/paused logs for many monitors through the check
+   store and checks that incidents_overlapping returns exactly the outages
+   a brute-force walk over the logs finds, for random windows across all
+   monitors ("what was down between 02:00 and 03:00").
+2. Compares the /stats payload of one monitor with 30 days of one-minute
+   checks against the same outages as incident intervals.
+
+Runs against a throwaway SQLite database in a temporary directory.
+
+Run from backend/:
+    python -m benchmarks.bench_incidents [monitors] [logs_per_monitor]
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+os.chdir(tempfile.mkdtemp(prefix="watcher-bench-"))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+from database.AuthDB import INCIDENT_OPEN_END  # noqa: E402
+from services.monitor_service_pkg.check_store import store_monitor_delta  # noqa: E402
+from services.monitor_service_pkg.incidents import incidents_overlapping  # noqa: E402
+from services.monitor_service_pkg.stats_service import makeCheck  # noqa: E402
+
+
+def make_logs(rng, n, now, days=30):
+    logs = [{"id": i, "type": rng.choice((1, 1, 2, 2, 98, 99)), "datetime": now - rng.randrange(days * 86400),
+             "reason": {"code": "503", "detail": "Service Unavailable"}} for i in range(n)]
+    logs.sort(key=lambda log: log["datetime"])
+    return logs
+
+
+def brute_force_outages(logs_by_monitor, start, end):
+    """(monitor_id, start, end) of every down interval overlapping [start, end)"""
+    outages = []
+    for monitor_id, logs in logs_by_monitor.items():
+        down_since = None
+        for log in logs:
+            if log["type"] == 1:
+                if down_since is None:
+                    down_since = log["datetime"]
+            elif down_since is not None:
+                if down_since < end and log["datetime"] > start:
+                    outages.append((monitor_id, down_since, log["datetime"]))
+                down_since = None
+        if down_since is not None and down_since < end:
+            outages.append((monitor_id, down_since, None))
+    return sorted(outages, key=lambda o: (o[1], o[0]))
+
+
+def overlap_check(n_monitors, n_logs):
+    rng = random.Random(2)
+    now = int(time.time())
+    logs_by_monitor = {1000 + m: make_logs(rng, n_logs, now) for m in range(n_monitors)}
+    start = time.perf_counter()
+    for monitor_id, logs in logs_by_monitor.items():
+        half = len(logs) // 2
+        store_monitor_delta(monitor_id, {"logs": logs[:half], "response_times": []})
+        store_monitor_delta(monitor_id, {"logs": logs[half:], "response_times": []})
+    print(f"ingested {n_monitors} monitors x {n_logs} logs in {time.perf_counter() - start:.2f}s")
+
+    windows = [(lo, lo + 3600) for lo in (now - rng.randrange(30 * 86400) for _ in range(100))]
+    windows += [(now - 30 * 86400, now + 1)]
+    query_elapsed = 0.0
+    for lo, hi in windows:
+        t0 = time.perf_counter()
+        incidents = incidents_overlapping(list(logs_by_monitor), lo, hi)
+        query_elapsed += time.perf_counter() - t0
+        actual = [(i["monitor_id"], i["start"], i["end"]) for i in incidents]
+        assert actual == brute_force_outages(logs_by_monitor, lo, hi), f"window {lo}-{hi} differs"
+    print(f"{len(windows)} overlap windows across all monitors: identical to brute force, "
+          f"{query_elapsed * 1000 / len(windows):.2f}ms/query")
+
+
+def payload_check():
+    rng = random.Random(4)
+    now = int(time.time())
+    monitor_id = 1
+    logs = make_logs(rng, 60, now)
+    response_times = [{"datetime": ts, "value": rng.randint(80, 900)} for ts in range(now - 30 * 86400, now, 60)]
+    store_monitor_delta(monitor_id, {"logs": logs, "response_times": response_times})
+    checks = json.dumps(jsonable_encoder(makeCheck(logs, response_times)))
+    incidents = json.dumps(incidents_overlapping([monitor_id], now - 30 * 86400, INCIDENT_OPEN_END))
+    print(f"30 days of 1-minute checks: {len(checks) / 1024:,.0f} KiB as checks, "
+          f"{len(incidents) / 1024:,.1f} KiB as incident intervals")
+
+
+def main():
+    n_monitors = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    n_logs = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    overlap_check(n_monitors, n_logs)
+    payload_check()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+"""
+Multi-process check of scheduler leadership and failover.
+
+There is no Postgres here, so a stand-in lock server (separate process)
+provides the semantics the elector relies on: `pg_try_advisory_lock` on a
+connection, with every lock held by a connection dropped when that connection
+closes. Workers talk to it through a small DB-API-like connection object and
+run the real LeaderElector; while elected, a worker runs a "job" that logs a
+tick every JOB_TICK seconds to a shared file.
+
+1. Baseline: without election every worker runs the job (N ticks per tick).
+2. With election: ticks come from one worker at a time. The leader is killed
+   (SIGKILL), has its connection dropped by the server, and is shut down
+   gracefully (releases the lock); each time another worker takes over.
+   Reports the failover gaps and checks that no two workers ever ticked at
+   the same time outside the documented connection-loss window.
+
+Run from backend/:
+    python -m benchmarks.bench_leader_election [workers] [check_seconds]
+"""
+
+import asyncio
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import sys
+import tempfile
+import time
+
+os.chdir(tempfile.mkdtemp(prefix="watcher-bench-"))
+
+from leader_election import LeaderElector  # noqa: E402
+
+JOB_TICK = 0.05
+LOG_PATH = os.path.abspath("ticks.log")
+
+
+def run_lock_server(port, ready):
+    holders = {}  # key -> writer holding it
+    writers = {}  # peer pid -> writer, for dropping a worker's connection
+
+    async def handle(reader, writer):
+        try:
+            while True:
+                line = (await reader.readline()).decode().split()
+                if not line:
+                    break
+                command, arg = line[0], line[1] if len(line) > 1 else ""
+                reply = "1"
+                if command == "HELLO":
+                    writers[arg] = writer
+                elif command == "TRY":
+                    if holders.get(arg, writer) is writer:
+                        holders[arg] = writer
+                    else:
+                        reply = "0"
+                elif command == "UNLOCK":
+                    reply = "1" if holders.pop(arg, None) is writer else "0"
+                elif command == "DROP":
+                    # Control command: close a worker's lock connection as a network failure would
+                    victim = writers.pop(arg, None)
+                    if victim is not None:
+                        victim.transport.abort()
+                writer.write(f"{reply}\n".encode())
+                await writer.drain()
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            # Session ended: its locks go with it, like a Postgres backend exiting
+            for key in [key for key, holder in holders.items() if holder is writer]:
+                del holders[key]
+            writer.close()
+
+    async def main():
+        server = await asyncio.start_server(handle, "127.0.0.1", port)
+        ready.set()
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(main())
+
+
+class StandInCursor:
+    def __init__(self, conn):
+        self._conn = conn
+        self._row = None
+
+    def execute(self, sql, params=()):
+        if "pg_try_advisory_lock" in sql:
+            reply = self._conn.call(f"TRY {params[0]}")
+        elif "pg_advisory_unlock" in sql:
+            reply = self._conn.call(f"UNLOCK {params[0]}")
+        else:
+            reply = self._conn.call("PING")
+        self._row = (reply == "1",)
+
+    def fetchone(self):
+        return self._row
+
+    def close(self):
+        pass
+
+
+class StandInConnection:
+    """Just enough of a psycopg2 connection for LeaderElector"""
+
+    def __init__(self, port):
+        self.autocommit = False
+        self._sock = socket.create_connection(("127.0.0.1", port), timeout=2)
+        self._file = self._sock.makefile("rwb")
+        self.call(f"HELLO {os.getpid()}")
+
+    def call(self, line):
+        self._file.write(f"{line}\n".encode())
+        self._file.flush()
+        reply = self._file.readline()
+        if not reply:
+            raise ConnectionError("server closed the connection")
+        return reply.decode().strip()
+
+    def cursor(self):
+        return StandInCursor(self)
+
+    def close(self):
+        self._sock.close()
+
+
+def _log(kind):
+    with open(LOG_PATH, "a") as f:
+        f.write(f"{os.getpid()} {kind} {time.time():.4f}\n")
+
+
+def run_worker(port, check_seconds, elect):
+    async def job():
+        while True:
+            _log("tick")
+            await asyncio.sleep(JOB_TICK)
+
+    async def main():
+        state = {}
+
+        def on_elected():
+            _log("elected")
+            state["job"] = asyncio.create_task(job())
+
+        def on_demoted():
+            _log("demoted")
+            state.pop("job").cancel()
+
+        stop = asyncio.Event()
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+        if elect:
+            elector = LeaderElector(on_elected, on_demoted, lock_name="bench-scheduler",
+                                    check_seconds=check_seconds, connect=lambda: StandInConnection(port))
+            elector.start()
+            await stop.wait()
+            await elector.stop()
+        else:
+            on_elected()
+            await stop.wait()
+            on_demoted()
+
+    asyncio.run(main())
+
+
+def _read_log():
+    events = []
+    with open(LOG_PATH) as f:
+        for line in f:
+            pid, kind, ts = line.split()
+            events.append((float(ts), int(pid), kind))
+    return sorted(events)
+
+
+def _current_leader(since):
+    ticks = [e for e in _read_log() if e[0] >= since and e[2] == "tick"]
+    return ticks[-1][1] if ticks else None
+
+
+def _start_workers(n, port, check_seconds, elect):
+    procs = {}
+    for _ in range(n):
+        p = multiprocessing.Process(target=run_worker, args=(port, check_seconds, elect), daemon=True)
+        p.start()
+        procs[p.pid] = p
+    return procs
+
+
+def baseline(n, port, check_seconds):
+    open(LOG_PATH, "w").close()
+    procs = _start_workers(n, port, check_seconds, elect=False)
+    time.sleep(1.0)
+    for p in procs.values():
+        p.terminate()
+        p.join()
+    ticks = [e for e in _read_log() if e[2] == "tick"]
+    print(f"  without election: {len({e[1] for e in ticks})} of {n} workers ran the job "
+          f"({len(ticks)} ticks in 1s, one process would log ~{1 / JOB_TICK:.0f})")
+
+
+def failover(n, port, check_seconds):
+    open(LOG_PATH, "w").close()
+    procs = _start_workers(n, port, check_seconds, elect=True)
+    time.sleep(check_seconds * 3)
+    scenarios = []
+    for how in ("kill", "drop", "graceful", "kill"):
+        at = time.time()
+        leader = _current_leader(at - 0.5)
+        assert leader is not None, "no leader elected"
+        if how == "kill":
+            os.kill(leader, signal.SIGKILL)
+        elif how == "drop":
+            with socket.create_connection(("127.0.0.1", port)) as control:
+                control.sendall(f"DROP {leader}\n".encode())
+                control.recv(16)
+        else:
+            os.kill(leader, signal.SIGTERM)
+        scenarios.append((how, leader, at))
+        # Random phase so failures don't line up with the workers' polls
+        time.sleep(check_seconds * (3 + random.random()))
+    for p in procs.values():
+        if p.is_alive():
+            p.terminate()
+        p.join()
+
+    ticks = [e for e in _read_log() if e[2] == "tick"]
+    ends = [at for _, _, at in scenarios[1:]] + [float("inf")]
+    for (how, old, at), end in zip(scenarios, ends):
+        # Each scenario is judged up to the next one (a dropped leader may win a later election)
+        last_old = max(t for t, pid, _ in ticks if pid == old and t < end)
+        first_new = min(t for t, pid, _ in ticks if at < t < end and pid != old)
+        new = next(pid for t, pid, _ in ticks if t == first_new)
+        overlap = max(0.0, last_old - first_new)
+        print(f"  {how:<8} leader {old} -> {new}: gap {max(0.0, first_new - at) * 1000:.0f}ms, "
+              f"old leader's ticks after takeover {overlap * 1000:.0f}ms")
+        bound = check_seconds + 2 * JOB_TICK
+        assert first_new - at <= bound, (how, first_new - at)
+        # Only a dropped connection leaves the old leader running until its next check
+        assert overlap <= (bound if how == "drop" else JOB_TICK), (how, overlap)
+
+    # Outside the failover windows the ticks never alternate between workers
+    windows = [(at, at + check_seconds + 2 * JOB_TICK) for _, _, at in scenarios]
+    clashes = sum(1 for (t1, p1, _), (t2, p2, _) in zip(ticks, ticks[1:])
+                  if p1 != p2 and not any(a <= t2 <= b for a, b in windows))
+    print(f"  with election: {len(ticks)} ticks from {len({e[1] for e in ticks})} successive leaders, "
+          f"{clashes} leader switches outside failover windows")
+    assert clashes == 0
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    check_seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    ready = multiprocessing.Event()
+    server = multiprocessing.Process(target=run_lock_server, args=(port, ready), daemon=True)
+    server.start()
+    ready.wait(10)
+    try:
+        print(f"{n} workers, leadership check every {check_seconds}s, job tick {JOB_TICK}s")
+        baseline(n, port, check_seconds)
+        failover(n, port, check_seconds)
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Micro-benchmark: nearest response-time matching for makeCheck.
+
+Generates a synthetic getMonitors history (default 10k logs x 50k response
+times over the last 30 days), checks that the binary-search matcher returns
+exactly what the old linear scan returned, and times both. The linear scan is
+timed on a sample of logs and extrapolated, since the full run takes minutes.
+
+Run from backend/:
+    python -m benchmarks.bench_make_check [logs] [response_times]
+"""
+
+import random
+import sys
+import time
+
+from services.monitor_service_pkg.api_client import _build_response_time_index, _find_closest_response_time
+
+LEGACY_SAMPLE = 200
+
+
+def make_history(n_logs, n_response_times, seed=7):
+    """Synthetic logs / response_times payloads, newest first like the API"""
+    rng = random.Random(seed)
+    now = int(time.time())
+    span = 30 * 24 * 3600
+    logs = [
+        {"id": i, "type": rng.choice((1, 2, 2, 2)), "datetime": now - rng.randrange(span),
+         "reason": {"code": "200", "detail": "OK"}}
+        for i in range(n_logs)
+    ]
+    response_times = [
+        # coarse timestamps so equidistant neighbours and duplicates really occur
+        {"datetime": now - rng.randrange(span // 60) * 60, "value": rng.randint(50, 2000)}
+        for _ in range(n_response_times)
+    ]
+    logs.sort(key=lambda log: log["datetime"], reverse=True)
+    response_times.sort(key=lambda rt: rt["datetime"], reverse=True)
+    return logs, response_times
+
+
+def legacy_find_closest(target_timestamp, response_times_dict, max_diff=3600):
+    """The pre-index implementation: a full scan per log"""
+    closest_time = None
+    min_diff = float("inf")
+    for rt_timestamp, rt_value in response_times_dict.items():
+        time_diff = abs(rt_timestamp - target_timestamp)
+        if time_diff < min_diff and time_diff <= max_diff:
+            min_diff = time_diff
+            closest_time = rt_value
+    return closest_time
+
+
+def main():
+    n_logs = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    n_rts = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+    logs, response_times = make_history(n_logs, n_rts)
+    targets = [int(log["datetime"]) for log in logs if log["type"] == 2]
+
+    start = time.perf_counter()
+    index = _build_response_time_index(response_times)
+    new_results = [_find_closest_response_time(ts, index) for ts in targets]
+    new_elapsed = time.perf_counter() - start
+
+    response_times_dict = {int(rt["datetime"]): float(rt["value"]) for rt in response_times}
+    sample = targets[:LEGACY_SAMPLE]
+    start = time.perf_counter()
+    legacy_results = [legacy_find_closest(ts, response_times_dict) for ts in sample]
+    legacy_elapsed = (time.perf_counter() - start) * len(targets) / max(1, len(sample))
+
+    assert legacy_results == new_results[:len(sample)], "binary search disagrees with linear scan"
+
+    print(f"{n_logs} logs ({len(targets)} up) x {n_rts} response times")
+    print(f"linear scan (extrapolated from {len(sample)} logs): {legacy_elapsed:8.3f}s")
+    print(f"sorted index + bisect (incl. build):            {new_elapsed:8.3f}s")
+    print(f"speed-up: {legacy_elapsed / new_elapsed:,.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Benchmark for resolving monitor owners: per-monitor lookups vs one JOIN.
+
+The previous code ran `SELECT userid FROM monitors ...` then
+`SELECT email FROM users ...` for every monitor (2N round trips);
+resolve_monitor_owners does one `JOIN ... WHERE monitorid = ANY(%s)`.
+
+Two backends:
+- BENCH_POSTGRES=1: the app's Postgres settings (user, password, host, port,
+  dbname). Tables are created in a scratch schema `watcher_bench` (selected
+  through PGOPTIONS) and dropped afterwards.
+- default: an in-memory SQLite stand-in behind a DB-API wrapper that adds a
+  fixed delay per round trip (connect or execute), standing in for the
+  network latency to a remote Supabase instance.
+
+Both paths must return the same owners; reports round trips and time.
+
+Run from backend/:
+    python -m benchmarks.bench_monitor_owners [users] [rtt_ms]
+"""
+
+import os
+import random
+import re
+import sqlite3
+import sys
+import tempfile
+import time
+
+os.chdir(tempfile.mkdtemp(prefix="watcher-bench-"))
+if os.getenv("BENCH_POSTGRES"):
+    os.environ["PGOPTIONS"] = "-c search_path=watcher_bench"
+
+from database import MonitorDB  # noqa: E402
+from database.AuthDB import get_db_connection  # noqa: E402
+from database.pool import ConnectionPool  # noqa: E402
+
+SCHEMA = """
+CREATE TABLE users (id INTEGER PRIMARY KEY, email VARCHAR(255) NOT NULL);
+CREATE TABLE monitors (monitorid INTEGER PRIMARY KEY, userid INTEGER NOT NULL REFERENCES users(id));
+"""
+
+
+class RoundTrips:
+    count = 0
+
+
+class StandInCursor:
+    def __init__(self, conn, rtt):
+        self._cursor = conn.cursor()
+        self._rtt = rtt
+
+    def execute(self, sql, params=()):
+        RoundTrips.count += 1
+        time.sleep(self._rtt)
+        params = list(params)
+        match = re.search(r"= ANY\(%s\)", sql)
+        if match:
+            # Postgres array parameter -> IN (?, ?, ...)
+            i = sql[:match.start()].count("%s")
+            values = params.pop(i)
+            sql = sql.replace("= ANY(%s)", f"IN ({', '.join('?' * len(values))})")
+            params[i:i] = values
+        self._cursor.execute(sql.replace("%s", "?"), params)
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def close(self):
+        self._cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class StandInConnection:
+    closed = 0
+
+    class info:
+        transaction_status = 0  # idle
+
+    def __init__(self, db, rtt):
+        RoundTrips.count += 1
+        time.sleep(rtt)
+        self._db = db
+        self._rtt = rtt
+
+    def rollback(self):
+        pass
+
+    def cursor(self):
+        return StandInCursor(self._db, self._rtt)
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def per_monitor_owners(connect, monitor_ids):
+    """The lookup check_down_monitors and the report routes used to do"""
+    connection = connect()
+    cursor = connection.cursor()
+    owners = {}
+    for monitor_id in monitor_ids:
+        cursor.execute("SELECT userid FROM monitors WHERE monitorid = %s", (monitor_id,))
+        row = cursor.fetchone()
+        if row:
+            cursor.execute("SELECT email FROM users WHERE id = %s", (row[0],))
+            user_row = cursor.fetchone()
+            if user_row:
+                owners[monitor_id] = (row[0], user_row[0])
+    cursor.close()
+    connection.close()
+    return owners
+
+
+def setup(n_users, monitors_per_user):
+    users = [(i, f"user{i}@example.com") for i in range(1, n_users + 1)]
+    monitors = [(m, random.randint(1, n_users)) for m in range(1, n_users * monitors_per_user + 1)]
+    if os.getenv("BENCH_POSTGRES"):
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("DROP SCHEMA IF EXISTS watcher_bench CASCADE; CREATE SCHEMA watcher_bench;")
+        cursor.execute(SCHEMA)
+        cursor.executemany("INSERT INTO users VALUES (%s, %s)", users)
+        cursor.executemany("INSERT INTO monitors VALUES (%s, %s)", monitors)
+        conn.commit()
+        cursor.close()
+        conn.close()
+        return get_db_connection, lambda: None
+
+    db = sqlite3.connect(":memory:", check_same_thread=False)
+    db.executescript(SCHEMA)
+    db.executemany("INSERT INTO users VALUES (?, ?)", users)
+    db.executemany("INSERT INTO monitors VALUES (?, ?)", monitors)
+    rtt = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.01
+    return (lambda: StandInConnection(db, rtt)), db.close
+
+
+def teardown_postgres():
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("DROP SCHEMA IF EXISTS watcher_bench CASCADE")
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+
+def main():
+    n_users = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    random.seed(5)
+    connect, close = setup(n_users, monitors_per_user=5)
+    pool = ConnectionPool(connect, maxconn=2)
+    MonitorDB.db_connection = pool.connection
+    backend = "Postgres" if os.getenv("BENCH_POSTGRES") else f"SQLite stand-in, {sys.argv[2] if len(sys.argv) > 2 else 10}ms per round trip"
+    print(f"{n_users} users, {n_users * 5} monitors ({backend})")
+    try:
+        for n in (10, 100, 500):
+            # Includes ids with no row in monitors (deleted locally but still in UptimeRobot)
+            ids = random.sample(range(1, n_users * 5 + 50), n)
+            RoundTrips.count = 0
+            t0 = time.perf_counter()
+            old = per_monitor_owners(connect, ids)
+            t1 = time.perf_counter()
+            old_trips = RoundTrips.count
+            RoundTrips.count = 0
+            new = MonitorDB.resolve_monitor_owners(ids)
+            t2 = time.perf_counter()
+            assert new["success"], new
+            assert new["data"] == old, "owners differ"
+            trips = f"{old_trips} -> {RoundTrips.count} round trips, " if not os.getenv("BENCH_POSTGRES") else ""
+            print(f"  {n:>4} monitors: {trips}{(t1 - t0) * 1000:8.1f}ms -> {(t2 - t1) * 1000:6.1f}ms "
+                  f"({len(new['data'])} owned)")
+    finally:
+        pool.close()
+        close()
+        if os.getenv("BENCH_POSTGRES"):
+            teardown_postgres()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Benchmark + behaviour check for the built-in asyncio prober.
+
+Starts a stand-in HTTP server (asyncio streams, in a separate process) that
+answers on every 127.0.0.x loopback address, so each address acts as its own
+"host". The server records how many connections each host and the whole
+server had open at once.
+
+1. Behaviour: 200, 503, connection refused and timeout results, with their
+   phase timings.
+2. Load: thousands of probes spread over many hosts with a fixed server
+   delay; reports throughput, latency percentiles and the peak per-host /
+   global concurrency the server saw (must not exceed the prober's limits).
+
+Run from backend/:
+    python -m benchmarks.bench_prober [probes] [hosts] [per_host_limit] [global_limit]
+"""
+
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+os.chdir(tempfile.mkdtemp(prefix="watcher-bench-"))
+
+from services.monitor_service_pkg.prober import Prober  # noqa: E402
+
+SERVER_DELAY = 0.05
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def run_stub_server(port, ready):
+    open_by_host = defaultdict(int)
+    peak_by_host = defaultdict(int)
+    totals = {"open": 0, "peak": 0}
+
+    async def handle(reader, writer):
+        host = writer.get_extra_info("sockname")[0]
+        counted = False
+        try:
+            request_line = (await reader.readline()).decode()
+            while (await reader.readline()) not in (b"\r\n", b""):
+                pass
+            path = request_line.split()[1]
+            if path == "/":
+                # Only load-test requests are counted (the behaviour checks' /slow outlives its probe)
+                counted = True
+                open_by_host[host] += 1
+                totals["open"] += 1
+                peak_by_host[host] = max(peak_by_host[host], open_by_host[host])
+                totals["peak"] = max(totals["peak"], totals["open"])
+            status, body = "200 OK", b"ok"
+            if path == "/peaks":
+                body = json.dumps({"per_host": max(peak_by_host.values(), default=0), "global": totals["peak"]}).encode()
+                peak_by_host.clear()
+                totals["peak"] = 0
+            elif path.startswith("/status/"):
+                status, body = f"{path.rsplit('/', 1)[1]} Error", b"error"
+            elif path == "/slow":
+                await asyncio.sleep(5)
+            else:
+                await asyncio.sleep(SERVER_DELAY)
+            # The prober releases its slot once it has read the response, so stop counting before writing it
+            if counted:
+                open_by_host[host] -= 1
+                totals["open"] -= 1
+                counted = False
+            writer.write(f"HTTP/1.1 {status}\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+            await writer.drain()
+        finally:
+            if counted:
+                open_by_host[host] -= 1
+                totals["open"] -= 1
+            writer.close()
+
+    async def main():
+        server = await asyncio.start_server(handle, "0.0.0.0", port, backlog=4096)
+        ready.set()
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(main())
+
+
+async def behaviour(port, closed_port):
+    prober = Prober(timeout=1)
+    cases = {
+        "200": f"http://127.0.0.1:{port}/",
+        "503": f"http://127.0.0.1:{port}/status/503",
+        "refused": f"http://127.0.0.1:{closed_port}/",
+        "timeout": f"http://127.0.0.1:{port}/slow",
+    }
+    for name, url in cases.items():
+        r = await prober.probe(1, url)
+        print(f"  {name:<8} up={r['is_up']!s:<5} status={r['status_code']!s:<4} dns={r['dns_ms']} "
+              f"connect={r['connect_ms']} ttfb={r['ttfb_ms']} total={r['response_time']} error={r['error_message']}")
+    ok, err, refused, timeout = [await prober.probe(1, url) for url in cases.values()]
+    assert ok["is_up"] and ok["status_code"] == 200 and ok["ttfb_ms"] is not None
+    assert not err["is_up"] and err["status_code"] == 503
+    assert not refused["is_up"] and "ConnectionRefused" in refused["error_message"]
+    assert not timeout["is_up"] and timeout["error_message"].startswith("Timed out") and timeout["connect_ms"] is not None
+
+
+async def load(port, n_probes, n_hosts, per_host, global_limit):
+    prober = Prober(max_concurrency=global_limit, per_host_concurrency=per_host, timeout=30)
+    targets = [(i, f"http://127.0.0.{2 + i % n_hosts}:{port}/") for i in range(n_probes)]
+    start = time.perf_counter()
+    results = await prober.probe_many(targets)
+    elapsed = time.perf_counter() - start
+    peaks = json.loads((await _get(f"http://127.0.0.1:{port}/peaks")))
+    failures = [r for r in results if not r["is_up"]]
+    totals = sorted(r["response_time"] for r in results if r["is_up"])
+    bound = min(per_host * n_hosts, global_limit)
+    print(f"  {n_probes} probes over {n_hosts} hosts, per-host limit {per_host}, global limit {global_limit}: "
+          f"{elapsed:.2f}s ({n_probes / elapsed:,.0f} probes/s; server-delay bound {bound / SERVER_DELAY:,.0f}/s)")
+    print(f"  failures {len(failures)}, total p50 {statistics.median(totals):.1f}ms "
+          f"p99 {totals[int(len(totals) * 0.99) - 1]:.1f}ms")
+    print(f"  peak open connections seen by the server: per host {peaks['per_host']}, all hosts {peaks['global']}")
+    assert not failures, failures[:3]
+    assert peaks["per_host"] <= per_host and peaks["global"] <= global_limit
+
+
+async def _get(url):
+    host, port = url.split("//")[1].split("/")[0].split(":")
+    reader, writer = await asyncio.open_connection(host, int(port))
+    writer.write(f"GET /{url.split('/', 3)[3]} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode())
+    data = await reader.read()
+    writer.close()
+    return data.split(b"\r\n\r\n", 1)[1]
+
+
+def main():
+    n_probes = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    n_hosts = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    per_host = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    global_limit = int(sys.argv[4]) if len(sys.argv) > 4 else 1000
+
+    port, closed_port = _free_port(), _free_port()
+    ready = multiprocessing.Event()
+    server = multiprocessing.Process(target=run_stub_server, args=(port, ready), daemon=True)
+    server.start()
+    ready.wait(10)
+    try:
+        print("behaviour:")
+        asyncio.run(behaviour(port, closed_port))
+        print("load:")
+        asyncio.run(load(port, n_probes, n_hosts, per_host, global_limit))
+        asyncio.run(load(port, n_probes, n_hosts, 40, 500))
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+"""
+Benchmark + behaviour check for sharding prober checks over worker processes.
+
+Membership goes through a stand-in for the prober_workers table (one
+heartbeat file per worker in a shared directory); everything else is the real
+HashRing / ShardMembership / Prober. The HTTP target is a stub server (asyncio,
+SO_REUSEPORT, fixed delay) answering on 127.0.0.x.
+
+1. Ring: shard balance and how many monitors move when a worker joins or
+   leaves, against the ideal 1/N.
+2. Throughput: 1, 2, 4, 8 worker processes each probe their own shard as fast
+   as their concurrency limit allows; reports total checks/s and checks that
+   the shards are disjoint and cover every monitor.
+3. Rebalance: four workers run the real prober loop (1s intervals, monitors
+   table stubbed); one is killed and, once its heartbeat expires, only its
+   monitors move to the survivors.
+
+Run from backend/:
+    python -m benchmarks.bench_prober_sharding [monitors] [per_worker_concurrency]
+"""
+
+import os
+import tempfile
+
+os.chdir(tempfile.mkdtemp(prefix="watcher-bench-"))
+# Fast timers for the rebalance run (read when the prober modules are imported)
+os.environ.update(PROBER_MIN_INTERVAL="1", PROBER_FLUSH_SECONDS="0.2", PROBER_TICK_SECONDS="0.05",
+                  SHARD_HEARTBEAT_SECONDS="0.2", SHARD_MEMBER_TTL_SECONDS="0.8")
+
+import asyncio  # noqa: E402
+import multiprocessing  # noqa: E402
+import signal  # noqa: E402
+import socket  # noqa: E402
+import sys  # noqa: E402
+import time  # noqa: E402
+from collections import Counter, defaultdict  # noqa: E402
+
+from services.monitor_service_pkg import prober as prober_module  # noqa: E402
+from services.monitor_service_pkg.prober import Prober  # noqa: E402
+from services.monitor_service_pkg.sharding import HashRing, ShardMembership  # noqa: E402
+
+SERVER_DELAY = 0.02
+SERVER_PROCESSES = 2
+N_HOSTS = 16
+MEMBERS_DIR = os.path.abspath("members")
+PROBE_LOG = os.path.abspath("probes.log")
+
+
+def run_stub_server(port, ready):
+    async def handle(reader, writer):
+        try:
+            while (await reader.readline()) not in (b"\r\n", b""):
+                pass
+            await asyncio.sleep(SERVER_DELAY)
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nConnection: close\r\n\r\nok")
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def main():
+        server = await asyncio.start_server(handle, "0.0.0.0", port, backlog=4096, reuse_port=True)
+        ready.set()
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(main())
+
+
+# ----- Stand-in for the prober_workers table -----
+
+def file_heartbeat(worker_id, ttl_seconds):
+    path = os.path.join(MEMBERS_DIR, worker_id)
+    with open(path, "w"):
+        pass
+    now = time.time()
+    alive = []
+    for name in os.listdir(MEMBERS_DIR):
+        try:
+            if os.path.getmtime(os.path.join(MEMBERS_DIR, name)) > now - ttl_seconds:
+                alive.append(name)
+        except FileNotFoundError:
+            pass
+    return {"success": True, "data": alive}
+
+
+def file_leave(worker_id):
+    try:
+        os.remove(os.path.join(MEMBERS_DIR, worker_id))
+    except FileNotFoundError:
+        pass
+    return {"success": True}
+
+
+def _membership(ttl_seconds):
+    return ShardMembership(worker_id=f"worker-{os.getpid()}", ttl_seconds=ttl_seconds,
+                           heartbeat=file_heartbeat, leave=file_leave)
+
+
+def _url(monitor_id, port):
+    return f"http://127.0.0.{2 + monitor_id % N_HOSTS}:{port}/"
+
+
+# ----- 1. Ring -----
+
+def ring_quality(n_monitors):
+    keys = range(n_monitors)
+    for n in (2, 4, 8):
+        nodes = [f"worker-{i}" for i in range(n)]
+        ring = HashRing(nodes)
+        owners = {key: ring.node_for(key) for key in keys}
+        loads = Counter(owners.values())
+        joined = HashRing(nodes + ["worker-new"])
+        left = HashRing(nodes[1:])
+        moved_join = sum(owners[key] != joined.node_for(key) for key in keys) / n_monitors
+        moved_leave = sum(owners[key] != left.node_for(key) for key in keys) / n_monitors
+        print(f"  {n} workers: largest shard {max(loads.values()) / (n_monitors / n):.2f}x the mean; "
+              f"moved on join {moved_join:.1%} (ideal {1 / (n + 1):.1%}), on leave {moved_leave:.1%} (ideal {1 / n:.1%})")
+        # Only the joining worker gains, only the leaving worker's monitors move
+        assert all(joined.node_for(key) in (owners[key], "worker-new") for key in keys)
+        assert all(left.node_for(key) == owners[key] for key in keys if owners[key] != "worker-0")
+
+
+# ----- 2. Throughput -----
+
+def throughput_worker(n_workers, n_monitors, concurrency, port, start_at, seconds, results):
+    async def main():
+        membership = _membership(ttl_seconds=60)
+        while len(membership.ring.nodes) < n_workers:
+            await membership.refresh()
+            await asyncio.sleep(0.05)
+        shard = membership.shard(range(n_monitors))
+        prober = Prober(max_concurrency=concurrency, per_host_concurrency=concurrency, timeout=10)
+        await asyncio.sleep(max(0.0, start_at - time.time()))
+        deadline = start_at + seconds
+        done = Counter()
+
+        async def lane(lane_ids):
+            while time.time() < deadline:
+                for monitor_id in lane_ids:
+                    result = await prober.probe(monitor_id, _url(monitor_id, port))
+                    if time.time() <= deadline:
+                        done["up" if result["is_up"] else "down"] += 1
+                    if time.time() >= deadline:
+                        return
+
+        await asyncio.gather(*(lane(shard[i::concurrency]) for i in range(min(concurrency, len(shard)))))
+        results.put((membership.worker_id, shard, done["up"], done["down"]))
+
+    asyncio.run(main())
+
+
+def throughput(n_monitors, concurrency, port, seconds=3.0):
+    print(f"  {os.cpu_count()} CPU(s), {concurrency} concurrent probes per worker, stub delay {SERVER_DELAY * 1000:.0f}ms")
+    for n_workers in (1, 2, 4, 8):
+        for name in os.listdir(MEMBERS_DIR):
+            os.remove(os.path.join(MEMBERS_DIR, name))
+        results = multiprocessing.Queue()
+        start_at = time.time() + 1.0 + 0.1 * n_workers
+        procs = [multiprocessing.Process(target=throughput_worker,
+                                         args=(n_workers, n_monitors, concurrency, port, start_at, seconds, results))
+                 for _ in range(n_workers)]
+        for p in procs:
+            p.start()
+        rows = [results.get(timeout=60) for _ in procs]
+        for p in procs:
+            p.join()
+        owned = [monitor_id for _, shard, _, _ in rows for monitor_id in shard]
+        assert len(owned) == len(set(owned)) == n_monitors, "shards must be disjoint and complete"
+        up = sum(row[2] for row in rows)
+        down = sum(row[3] for row in rows)
+        sizes = sorted(len(row[1]) for row in rows)
+        print(f"  {n_workers} worker(s): {up / seconds:8,.0f} checks/s  failures {down}  "
+              f"shard sizes {sizes[0]}-{sizes[-1]} (bound {n_workers * concurrency / SERVER_DELAY:,.0f}/s)")
+        assert down == 0
+
+
+# ----- 3. Rebalance -----
+
+def rebalance_worker(n_monitors, port):
+    table = [{"monitorid": i, "site_url": _url(i, port), "interval": 1} for i in range(n_monitors)]
+    prober_module.get_active_monitors = lambda: {"success": True, "data": table}
+
+    def record(batch):
+        with open(PROBE_LOG, "a") as f:
+            f.write("".join(f"{os.getpid()} {time.time():.3f} {r['monitor_id']}\n" for r in batch))
+
+    prober_module.store_probe_results = record
+
+    async def main():
+        prober = Prober(shard=_membership(ttl_seconds=float(os.environ["SHARD_MEMBER_TTL_SECONDS"])))
+        stop = asyncio.Event()
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+        prober.start()
+        await stop.wait()
+        await prober.stop()
+
+    asyncio.run(main())
+
+
+def _owners(since, until):
+    owners = defaultdict(set)
+    with open(PROBE_LOG) as f:
+        for line in f:
+            pid, ts, monitor_id = line.split()
+            if since <= float(ts) < until:
+                owners[int(monitor_id)].add(int(pid))
+    return owners
+
+
+def rebalance(n_monitors, port, n_workers=4):
+    for name in os.listdir(MEMBERS_DIR):
+        os.remove(os.path.join(MEMBERS_DIR, name))
+    open(PROBE_LOG, "w").close()
+    procs = [multiprocessing.Process(target=rebalance_worker, args=(n_monitors, port)) for _ in range(n_workers)]
+    for p in procs:
+        p.start()
+    time.sleep(4)
+    killed_at = time.time()
+    victim = procs[0]
+    os.kill(victim.pid, signal.SIGKILL)
+    time.sleep(5)
+    for p in procs[1:]:
+        p.terminate()
+    for p in procs:
+        p.join()
+
+    settle = float(os.environ["SHARD_MEMBER_TTL_SECONDS"]) + 0.2 + 1.5  # TTL + heartbeat + one interval and a flush
+    before = _owners(killed_at - 2, killed_at)
+    after = _owners(killed_at + settle, killed_at + 4.5)
+    for label, owners in (("before", before), ("after", after)):
+        assert len(owners) == n_monitors, (label, len(owners))
+        assert all(len(pids) == 1 for pids in owners.values()), (label, "monitor probed by two workers")
+    victim_monitors = {m for m, pids in before.items() if victim.pid in pids}
+    moved = {m for m in range(n_monitors) if before[m] != after[m]}
+    assert victim.pid not in {pid for pids in after.values() for pid in pids}
+    assert moved == victim_monitors, (len(moved), len(victim_monitors))
+    print(f"  {n_workers} workers, {n_monitors} monitors at 1s: killed one owning {len(victim_monitors)}; "
+          f"within {settle:.1f}s its monitors were taken over and no other monitor moved "
+          f"(every monitor probed by exactly one worker before and after)")
+
+
+def main():
+    n_monitors = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    os.makedirs(MEMBERS_DIR, exist_ok=True)
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    servers = []
+    for _ in range(SERVER_PROCESSES):
+        ready = multiprocessing.Event()
+        server = multiprocessing.Process(target=run_stub_server, args=(port, ready), daemon=True)
+        server.start()
+        ready.wait(10)
+        servers.append(server)
+    try:
+        print("ring:")
+        ring_quality(n_monitors)
+        print("throughput:")
+        throughput(n_monitors, concurrency, port)
+        print("rebalance:")
+        rebalance(400, port)
+    finally:
+        for server in servers:
+            server.terminate()
+
+
+if __name__ == "__main__":
+    main()
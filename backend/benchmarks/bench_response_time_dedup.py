@@ -0,0 +1,87 @@
+"""
+Regression check + benchmark for the standalone response-time dedup in makeCheck.
+
+1. On several randomized histories, verifies that makeCheck returns exactly the
+   same check list as the previous implementation (set of log timestamps and
+   an any(...) scan per response time).
+2. Times both dedup strategies on a large history.
+
+Run from backend/:
+    python -m benchmarks.bench_response_time_dedup [logs] [response_times]
+"""
+
+import sys
+import time
+
+from benchmarks.bench_make_check import make_history
+from services.monitor_service_pkg.api_client import (
+    _build_response_time_index,
+    _process_uptimerobot_log,
+    _validate_timestamp,
+)
+from services.monitor_service_pkg.stats_service import makeCheck
+from database.schemas import UptimeCheckResponse
+
+
+def legacy_response_time_entry(rt, existing_log_timestamps):
+    """The previous _process_response_time_entry: linear ±300s scan"""
+    timestamp = rt.get("datetime", 0)
+    rt_datetime = _validate_timestamp(timestamp)
+    if not rt_datetime:
+        return None
+    try:
+        rt_value = float(rt.get("value", 0))
+        if rt_value < 0:
+            return None
+    except (ValueError, TypeError):
+        return None
+    timestamp_int = int(timestamp)
+    if any(abs(log_ts - timestamp_int) <= 300 for log_ts in existing_log_timestamps):
+        return None
+    return UptimeCheckResponse(id=timestamp_int, website_id=0, is_up=True, response_time=rt_value,
+                               status_code=200, error_message=None, timestamp=rt_datetime)
+
+
+def legacy_make_check(logs, response_times):
+    index = _build_response_time_index(response_times)
+    sorted_logs = sorted(logs, key=lambda x: x.get("datetime", 0), reverse=True)
+    checks = [c for c in (_process_uptimerobot_log(log, index) for log in sorted_logs) if c]
+    log_timestamps = {int(log.get("datetime", 0)) for log in sorted_logs}
+    for rt in response_times:
+        check = legacy_response_time_entry(rt, log_timestamps)
+        if check:
+            checks.append(check)
+    checks.sort(key=lambda x: x.timestamp, reverse=True)
+    return checks
+
+
+def regression():
+    for seed in range(10):
+        logs, response_times = make_history(400, 4000, seed)
+        assert makeCheck(logs, response_times) == legacy_make_check(logs, response_times), f"seed {seed} differs"
+    print("regression: makeCheck output unchanged on 10 randomized histories")
+
+
+def main():
+    regression()
+    n_logs = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    n_rts = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+    logs, response_times = make_history(n_logs, n_rts)
+
+    start = time.perf_counter()
+    legacy = legacy_make_check(logs, response_times)
+    legacy_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    current = makeCheck(logs, response_times)
+    current_elapsed = time.perf_counter() - start
+
+    assert legacy == current
+    print(f"{n_logs} logs x {n_rts} response times -> {len(current)} checks")
+    print(f"makeCheck with linear dedup: {legacy_elapsed:8.3f}s")
+    print(f"makeCheck with window index: {current_elapsed:8.3f}s")
+    print(f"speed-up: {legacy_elapsed / current_elapsed:,.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark: window uptime/latency from check rollups vs scanning raw checks.
+
+Ingests N days of one-minute response times plus down logs for one monitor
+through the check store (which maintains the rollups), then answers a set of
+windows (last hour ... whole history) both ways. The two must agree exactly
+for windows inside the minute-bucket retention; older windows are checked
+with their edges rounded to the hour.
+
+Runs against a throwaway SQLite database in a temporary directory.
+
+Run from backend/:
+    python -m benchmarks.bench_rollups [days]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+os.chdir(tempfile.mkdtemp(prefix="watcher-bench-"))
+
+from sqlalchemy import Integer, case, func, select  # noqa: E402
+
+from database.AuthDB import SessionLocal, UptimeCheck  # noqa: E402
+from services.monitor_service_pkg.check_store import store_monitor_delta  # noqa: E402
+from services.monitor_service_pkg.rollups import MINUTE_RETENTION_HOURS, window_summary  # noqa: E402
+
+MONITOR_ID = 4242
+
+
+def make_payload(days, seed=5):
+    rng = random.Random(seed)
+    now = int(time.time())
+    response_times = [{"datetime": ts, "value": rng.randint(80, 900)} for ts in range(now - days * 86400, now, 60)]
+    logs = [{"id": i, "type": rng.choice((1, 1, 2, 99)), "datetime": now - rng.randrange(days * 86400),
+             "reason": {"code": "503", "detail": "Service Unavailable"}} for i in range(days * 4)]
+    return {"logs": logs, "response_times": response_times}, now
+
+
+def raw_summary(start, end):
+    with SessionLocal() as db:
+        window = (UptimeCheck.website_id == MONITOR_ID,
+                  UptimeCheck.timestamp >= _dt(start), UptimeCheck.timestamp < _dt(end),
+                  (UptimeCheck.source != "log") | UptimeCheck.log_type.in_((1, 2)))
+        up, down, latency_sum, latency_count = db.execute(
+            select(func.sum(case((UptimeCheck.is_up, 1), else_=0), type_=Integer),
+                   func.sum(case((UptimeCheck.is_up, 0), else_=1), type_=Integer),
+                   func.sum(UptimeCheck.response_time), func.count(UptimeCheck.response_time)).where(*window)
+        ).one()
+    return up or 0, down or 0, round(latency_sum / latency_count, 2) if latency_count else 0
+
+
+def _dt(ts):
+    return datetime.utcfromtimestamp(ts)
+
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 90
+    payload, now = make_payload(days)
+    start = time.perf_counter()
+    store_monitor_delta(MONITOR_ID, payload)
+    print(f"ingested {len(payload['response_times'])} response times + {len(payload['logs'])} logs "
+          f"with rollups in {time.perf_counter() - start:.2f}s")
+
+    hour_end = now - now % 3600
+    windows = {
+        "last hour": (now - 3600, now),
+        "last 6 hours": (now - 6 * 3600, now),
+        "last day": (now - 86400, now),
+        "last 7 days": (hour_end - 7 * 86400, hour_end),
+        "last 30 days": (hour_end - 30 * 86400, hour_end),
+        f"last {days} days": (hour_end - days * 86400, hour_end),
+    }
+    print(f"{'window':<16}{'raw scan':>10}{'rollups':>10}{'speed-up':>10}")
+    for name, (lo, hi) in windows.items():
+        if hi - lo <= MINUTE_RETENTION_HOURS * 3600:
+            lo, hi = lo - lo % 60, hi - hi % 60
+        t0 = time.perf_counter()
+        expected = raw_summary(lo, hi)
+        t1 = time.perf_counter()
+        summary = window_summary(MONITOR_ID, lo, hi)
+        t2 = time.perf_counter()
+        actual = (summary["up_count"], summary["down_count"], summary["average_response_time"])
+        assert actual == expected, f"{name}: rollups {actual} != raw {expected}"
+        print(f"{name:<16}{(t1 - t0) * 1000:8.1f}ms{(t2 - t1) * 1000:8.1f}ms{(t1 - t0) / (t2 - t1):9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Regression check + benchmark for the prefix-sum SLA engine.
+
+Ingests a year of random down/up/paused logs for one monitor through the
+check store in several batches (the last one starting at the previous
+batch's final second, which exercises the rebuild path), then compares
+window_sla against a brute-force walk over the logs for random windows and
+calendar months, and times both.
+
+Runs against a throwaway SQLite database in a temporary directory.
+
+Run from backend/:
+    python -m benchmarks.bench_sla [logs]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+os.chdir(tempfile.mkdtemp(prefix="watcher-bench-"))
+
+from database.AuthDB import SessionLocal  # noqa: E402
+from services.monitor_service_pkg.check_store import store_monitor_delta  # noqa: E402
+from services.monitor_service_pkg.sla import month_window, window_sla  # noqa: E402
+
+MONITOR_ID = 777
+
+
+def make_logs(n, seed=9):
+    rng = random.Random(seed)
+    now = int(time.time())
+    start = now - 365 * 86400
+    return [{"id": i, "type": rng.choice((1, 1, 2, 2, 2, 98, 99)), "datetime": rng.randrange(start, now), "reason": {}}
+            for i in range(n)]
+
+
+def brute_force_downtime(logs, start, end):
+    """Walk every log (time-ordered), summing down intervals clipped to [start, end)"""
+    downtime = 0
+    down_since = None
+    for log in logs:
+        ts = log["datetime"]
+        if log["type"] == 1:
+            if down_since is None:
+                down_since = ts
+        elif down_since is not None:
+            downtime += max(0, min(ts, end) - max(down_since, start))
+            down_since = None
+    if down_since is not None:
+        downtime += max(0, end - max(down_since, start))
+    return downtime
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    logs = make_logs(n)
+    logs.sort(key=lambda log: log["datetime"])
+    # A late log at the same second as the last stored one arrives with the final batch
+    logs.insert(len(logs) * 3 // 4, {"id": n, "type": 2, "datetime": logs[len(logs) * 3 // 4 - 1]["datetime"], "reason": {}})
+    quarter = len(logs) // 4
+    batches = [logs[:quarter], logs[quarter:2 * quarter], logs[2 * quarter:3 * quarter], logs[3 * quarter:]]
+    start = time.perf_counter()
+    for batch in batches:
+        store_monitor_delta(MONITOR_ID, {"logs": batch, "response_times": []})
+    print(f"ingested {len(logs)} logs in {len(batches)} batches in {time.perf_counter() - start:.2f}s")
+
+    rng = random.Random(1)
+    now = int(time.time())
+    windows = [tuple(sorted(rng.sample(range(now - 400 * 86400, now + 86400), 2))) for _ in range(200)]
+    months = [time.strftime("%Y-%m", time.gmtime(now - d * 86400)) for d in range(0, 365, 30)]
+    windows += [month_window(month) for month in months]
+
+    with SessionLocal() as db:
+        t0 = time.perf_counter()
+        engine = [window_sla(db, MONITOR_ID, lo, hi)["downtime_seconds"] for lo, hi in windows]
+        engine_elapsed = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    expected = [brute_force_downtime(logs, lo, hi) for lo, hi in windows]
+    brute_elapsed = time.perf_counter() - t0
+    assert engine == expected, "prefix-sum downtime differs from brute force"
+
+    print(f"{len(windows)} windows ({len(months)} calendar months): results identical")
+    print(f"brute force over logs: {brute_elapsed * 1000 / len(windows):8.3f}ms/window")
+    print(f"prefix-sum seeks:      {engine_elapsed * 1000 / len(windows):8.3f}ms/window")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Benchmark + behaviour check for the pooled SMTP sender.
+
+Runs a local aiosmtpd server (pip install aiosmtpd) with STARTTLS (a
+throwaway self-signed certificate) and AUTH LOGIN/PLAIN, like Gmail on port
+587. A small TCP proxy in front of it delays every server reply by the
+given round trip, standing in for the network latency to the real server.
+
+1. N report emails through the previous send_mail (connect, STARTTLS,
+   login, send, quit per message) and through EmailService.send_many.
+2. Reconnect: the server is restarted, dropping the pooled sessions; the
+   next batch is still delivered in full over new sessions.
+
+Every message must arrive exactly once.
+
+Run from backend/:
+    python -m benchmarks.bench_smtp_pool [messages] [rtt_ms]
+"""
+
+import asyncio
+import logging
+import os
+import smtplib
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import AuthResult
+
+WORKDIR = tempfile.mkdtemp(prefix="watcher-bench-")
+os.chdir(WORKDIR)
+
+MESSAGES = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+RTT = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.02
+SERVER_PORT, PROXY_PORT = 18025, 18026
+USER, PASSWORD = "watcher@example.com", "secret"
+
+logging.getLogger("mail.log").setLevel(logging.ERROR)
+
+os.environ.update(SMTP_SERVER="127.0.0.1", SMTP_PORT=str(PROXY_PORT), MAIL_FROM=USER, MAIL_PASSWORD=PASSWORD)
+
+from services.auth_mail_pkg import email_service  # noqa: E402
+from services.auth_mail_pkg.email_service import EmailService  # noqa: E402
+
+
+class Inbox:
+    def __init__(self):
+        self.received = Counter()
+        self.sessions = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        subject = next(line for line in envelope.content.decode().splitlines() if line.startswith("Subject:"))
+        self.received[(envelope.rcpt_tos[0], subject)] += 1
+        return "250 OK"
+
+
+def authenticate(server, session, envelope, mechanism, auth_data):
+    server.event_handler.sessions += 1  # one login per session
+    return AuthResult(success=auth_data.login.decode() == USER and auth_data.password.decode() == PASSWORD)
+
+
+def tls_context():
+    subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1", "-subj", "/CN=localhost",
+                    "-keyout", "key.pem", "-out", "cert.pem"], check=True, capture_output=True)
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain("cert.pem", "key.pem")
+    return context
+
+
+def start_server(inbox, context):
+    controller = Controller(inbox, hostname="127.0.0.1", port=SERVER_PORT, tls_context=context, require_starttls=True,
+                            authenticator=authenticate, auth_require_tls=True)
+    controller.start()
+    return controller
+
+
+def start_proxy():
+    """Forwards to the server, delaying each reply by RTT"""
+    loop = asyncio.new_event_loop()
+
+    async def pipe(reader, writer, delay):
+        try:
+            while data := await reader.read(65536):
+                if delay:
+                    await asyncio.sleep(delay)
+                writer.write(data)
+                await writer.drain()
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            writer.close()
+
+    async def handle(client_reader, client_writer):
+        try:
+            server_reader, server_writer = await asyncio.open_connection("127.0.0.1", SERVER_PORT)
+        except OSError:
+            client_writer.close()
+            return
+        await asyncio.gather(pipe(client_reader, server_writer, 0), pipe(server_reader, client_writer, RTT))
+
+    async def serve():
+        return await asyncio.start_server(handle, "127.0.0.1", PROXY_PORT)
+
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    asyncio.run_coroutine_threadsafe(serve(), loop).result()
+
+
+def old_send_mail(service, recipient_email, subject, text=None, html=None):
+    """send_mail before the pool: a new logged-in session per message"""
+    msg = service.build_message(recipient_email, subject, text=text, html=html)
+    server = smtplib.SMTP(service.smtp_server, service.smtp_port)
+    server.starttls()
+    server.login(service.email, service.password)
+    server.sendmail(service.email, recipient_email, msg.as_string())
+    server.quit()
+    return True
+
+
+def report_messages(tag, n):
+    return [{"recipient_email": f"user{i}@example.com", "subject": f"{tag} report {i}",
+             "html": "<html><body>" + "<p>monitor report</p>\n" * 200 + "</body></html>",
+             "text": "Please view this report in an HTML-compatible client."} for i in range(n)]
+
+
+def check_delivered(inbox, messages):
+    expected = Counter((m["recipient_email"], f"Subject: {m['subject']}") for m in messages)
+    delivered = Counter({key: inbox.received[key] for key in expected})
+    assert delivered == expected, f"{sum(delivered.values())} of {len(messages)} delivered (or duplicated)"
+
+
+def main():
+    inbox = Inbox()
+    context = tls_context()
+    controller = start_server(inbox, context)
+    start_proxy()
+    service = EmailService()
+    print(f"{MESSAGES} report emails, local aiosmtpd with STARTTLS + AUTH, {RTT * 1000:.0f}ms per round trip, "
+          f"pool of {email_service.SMTP_POOL_SIZE} sessions")
+
+    old = report_messages("old", MESSAGES)
+    sessions = inbox.sessions
+    t0 = time.perf_counter()
+    for message in old:
+        old_send_mail(service, **message)
+    old_elapsed, old_sessions = time.perf_counter() - t0, inbox.sessions - sessions
+    check_delivered(inbox, old)
+
+    new = report_messages("pooled", MESSAGES)
+    sessions = inbox.sessions
+    t0 = time.perf_counter()
+    results = service.send_many(new)
+    new_elapsed, new_sessions = time.perf_counter() - t0, inbox.sessions - sessions
+    assert all(results)
+    check_delivered(inbox, new)
+    print(f"  per-message sessions: {old_elapsed:6.2f}s ({old_elapsed * 1000 / MESSAGES:5.1f}ms/email), "
+          f"{old_sessions} SMTP sessions")
+    print(f"  send_many:            {new_elapsed:6.2f}s ({new_elapsed * 1000 / MESSAGES:5.1f}ms/email), "
+          f"{new_sessions} SMTP sessions")
+
+    # The server restarts while sessions sit idle in the pool
+    controller.stop()
+    controller = start_server(inbox, context)
+    after = report_messages("after restart", 20)
+    results = service.send_many(after)
+    assert all(results)
+    check_delivered(inbox, after)
+    stats = service.pool.stats()
+    print(f"  after a server restart: {sum(results)}/{len(after)} delivered, {stats['reconnects']} stale sessions "
+          f"replaced; pool {stats}")
+    assert stats["reconnects"] >= 1 and stats["failed"] == 0
+
+    email_service.close_smtp_pools()
+    controller.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark: one-off requests calls vs the pooled UptimeRobotAPI session.
+
+Spins up a local keep-alive stub of the UptimeRobot getMonitors endpoint and
+counts how many TCP connections each strategy opens and the p50 latency.
+
+Run from backend/:
+    python -m benchmarks.bench_uptimerobot_session [calls]
+"""
+
+import json
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+# The stub has no rate limit; keep the shared token bucket out of the measurement
+os.environ.setdefault("UPTIMEROBOT_RATE_LIMIT_PER_MINUTE", "1000000")
+
+from services.monitor_service_pkg.api_client import UptimeRobotAPI, _build_session
+
+PAYLOAD = json.dumps({"stat": "ok", "monitors": [{"id": 1, "friendly_name": "stub", "logs": []}]}).encode()
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with _StubHandler.lock:
+            _StubHandler.connections += 1
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(PAYLOAD)))
+        self.end_headers()
+        self.wfile.write(PAYLOAD)
+
+    def log_message(self, *args):
+        pass
+
+
+def _run(label, call, calls):
+    _StubHandler.connections = 0
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        call()
+        latencies.append((time.perf_counter() - start) * 1000)
+    print(f"{label:<22} connections={_StubHandler.connections:<5} "
+          f"p50={statistics.median(latencies):.3f}ms p95={sorted(latencies)[int(calls * 0.95) - 1]:.3f}ms")
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v2"
+
+    def one_off():
+        requests.post(f"{base_url}/getMonitors", data={"format": "json"}, timeout=30).json()
+
+    api = UptimeRobotAPI(session=_build_session())
+    api.base_url = base_url
+
+    print(f"{calls} getMonitors calls against local stub")
+    _run("requests.post (before)", one_off, calls)
+    _run("pooled session (after)", lambda: api._get_monitors(1), calls)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+"""
+Async Postgres access for request handlers.
+
+Route handlers run on the event loop, so a blocking psycopg2 round trip to
+Supabase stalls every other request in the process until it returns. The
+functions here are the async counterparts of the AuthDB / MonitorDB
+functions the auth and monitor routes use, with the same arguments and the
+same {"success", "message" / "data"} results, on a psycopg 3
+AsyncConnectionPool shared by the process.
+
+The pool is opened and closed with the app (open_pool / close_pool in
+main.py). It shares the process's DB_POOL_MAX_SIZE budget with the psycopg2
+pool in AuthDB, which scheduler jobs and other background threads keep
+using: DB_ASYNC_POOL_MAX_SIZE of it comes here, the rest goes to AuthDB.
+"""
+
+import asyncio
+import weakref
+from datetime import datetime, timedelta
+from time import monotonic
+from typing import Any, Dict
+
+from psycopg.conninfo import make_conninfo
+from psycopg_pool import AsyncConnectionPool
+
+from database.AuthDB import (
+    DBNAME, HOST, OTP_EXPIRY, PASSWORD, PORT, USER,
+    DB_ASYNC_POOL_MAX_SIZE, DB_POOL_HEALTH_CHECK_SECONDS, DB_POOL_MAX_IDLE_SECONDS, DB_POOL_MIN_SIZE, DB_POOL_TIMEOUT,
+    generate_otp, hash_password, verify_password,
+)
+from database.MonitorDB import MONITOR_SELECT, monitor_from_row, monitor_update_query
+from services.auth_mail_pkg.outbox import enqueue_otp_email
+
+# When each pooled connection was last handed back (or opened)
+_idle_since: "weakref.WeakKeyDictionary[Any, float]" = weakref.WeakKeyDictionary()
+
+
+async def _mark_idle(connection):
+    _idle_since[connection] = monotonic()
+
+
+async def _check_if_idle(connection):
+    """Ping connections idle longer than DB_POOL_HEALTH_CHECK_SECONDS before handing them out"""
+    idle_since = _idle_since.get(connection)
+    if idle_since is None or monotonic() - idle_since >= DB_POOL_HEALTH_CHECK_SECONDS:
+        # Raises if the server dropped it; the pool then replaces it
+        await AsyncConnectionPool.check_connection(connection)
+
+
+async_pool = AsyncConnectionPool(
+    make_conninfo(user=USER, password=PASSWORD, host=HOST, port=PORT, dbname=DBNAME),
+    min_size=min(DB_POOL_MIN_SIZE, DB_ASYNC_POOL_MAX_SIZE),
+    max_size=DB_ASYNC_POOL_MAX_SIZE,
+    timeout=DB_POOL_TIMEOUT,
+    max_idle=DB_POOL_MAX_IDLE_SECONDS,
+    configure=_mark_idle,
+    reset=_mark_idle,
+    check=_check_if_idle,
+    name="watcher-async",
+    open=False,
+)
+
+
+async def open_pool():
+    # Connections are opened in the background, so startup doesn't wait on the database
+    await async_pool.open(wait=False)
+
+
+async def close_pool():
+    await async_pool.close()
+
+
+def db_connection():
+    """Check a pooled connection out for an `async with` block; it is returned however the block exits"""
+    return async_pool.connection()
+
+
+def pool_stats() -> Dict[str, Any]:
+    stats = async_pool.get_stats()
+    stats["open"] = not async_pool.closed
+    return stats
+
+
+#---------------------- auth ---------------
+
+async def signup_user(name, email, password):
+    try:
+        async with db_connection() as connection, connection.cursor() as cursor:
+            # Check if user already exists
+            await cursor.execute("SELECT id FROM users WHERE email = %s", (email,))
+            if await cursor.fetchone():
+                return {"success": False, "message": "Email already exists"}
+
+            # Hash password and generate OTP
+            passhash = hash_password(password)
+            otp = generate_otp()
+            otp_expiry = datetime.now() + timedelta(minutes=OTP_EXPIRY)
+
+            await cursor.execute("""
+                INSERT INTO users (name, email, passhash, email_verified, verification_otp, otp_expiry)
+                VALUES (%s, %s, %s, %s, %s, %s)
+                RETURNING id
+            """, (name, email, passhash, False, otp, otp_expiry))
+
+            user_id = (await cursor.fetchone())[0]
+            await connection.commit()
+        # Sent by the outbox worker, so signup doesn't wait on SMTP
+        await asyncio.to_thread(enqueue_otp_email, email, otp, expire=OTP_EXPIRY)
+
+        return {
+            "success": True,
+            "message": "User created successfully",
+            "user_id": user_id,
+            "otp": otp,
+            "otp_expires": otp_expiry.isoformat()
+        }
+
+    except Exception as e:
+        return {"success": False, "message": f"Signup failed: {str(e)}"}
+
+
+async def login_user(email, password):
+    """Login user with email and password"""
+    try:
+        async with db_connection() as connection, connection.cursor() as cursor:
+            # Get user by email
+            await cursor.execute("""
+                SELECT id, name, email, passhash, email_verified
+                FROM users WHERE email = %s
+            """, (email,))
+            user = await cursor.fetchone()
+
+        if not user:
+            return {"success": False, "message": "User not found"}
+
+        user_id, name, email, stored_hash, email_verified = user
+
+        # Verify password
+        if not verify_password(password, stored_hash):
+            return {"success": False, "message": "Invalid password"}
+
+        return {
+            "success": True,
+            "message": "Login successful",
+            "user": {
+                "id": user_id,
+                "name": name,
+                "email": email,
+                "email_verified": email_verified
+            }
+        }
+
+    except Exception as e:
+        return {"success": False, "message": f"Login failed: {str(e)}"}
+
+
+async def verify_email_otp(email, otp):
+    """Verify email with OTP"""
+    try:
+        async with db_connection() as connection, connection.cursor() as cursor:
+            # Check OTP
+            await cursor.execute("""
+                SELECT id, verification_otp, otp_expiry, email_verified
+                FROM users WHERE email = %s
+            """, (email,))
+
+            user = await cursor.fetchone()
+            if not user:
+                return {"success": False, "message": "User not found"}
+
+            user_id, stored_otp, otp_expiry, email_verified = user
+
+            if email_verified:
+                return {"success": False, "message": "Email already verified"}
+
+            if not stored_otp or stored_otp != otp:
+                return {"success": False, "message": "Invalid OTP"}
+
+            if datetime.now() > otp_expiry:
+                return {"success": False, "message": "OTP expired"}
+
+            # Mark email as verified
+            await cursor.execute("""
+                UPDATE users
+                SET email_verified = TRUE, verification_otp = NULL, otp_expiry = NULL
+                WHERE id = %s
+            """, (user_id,))
+
+            await connection.commit()
+        return {"success": True, "message": "Email verified successfully"}
+
+    except Exception as e:
+        return {"success": False, "message": f"Verification failed: {str(e)}"}
+
+
+async def resend_email_otp(email):
+    """Resend OTP to user's email"""
+    try:
+        # Generate new OTP
+        new_otp = generate_otp()
+        otp_expiry = datetime.now() + timedelta(minutes=OTP_EXPIRY)
+
+        async with db_connection() as connection, connection.cursor() as cursor:
+            # Update OTP in database
+            await cursor.execute("""
+                UPDATE users
+                SET verification_otp = %s, otp_expiry = %s
+                WHERE email = %s
+            """, (new_otp, otp_expiry, email))
+
+            await connection.commit()
+
+        # Send OTP email
+        await asyncio.to_thread(enqueue_otp_email, email, new_otp, expire=OTP_EXPIRY)
+
+        return {"success": True, "message": "OTP resent successfully"}
+
+    except Exception as e:
+        return {"success": False, "message": f"Resend OTP failed: {str(e)}"}
+
+
+#---------------------- monitors ---------------
+
+async def _create_new_monitor(monitor: Dict[str, Any]):
+    try:
+        async with db_connection() as connection, connection.cursor() as cursor:
+            await cursor.execute(
+                """INSERT INTO monitors (monitorid, userid, sitename, site_url, monitor_created, interval)
+                   VALUES (%s, %s, %s, %s, %s, %s) RETURNING monitorid""",
+                (monitor["monitorid"], monitor["userid"], monitor["sitename"], monitor["site_url"],
+                 monitor["monitor_created"], monitor.get("interval"))
+            )
+
+            result = await cursor.fetchone()
+            if result:
+                monitor_id = result[0]
+                await connection.commit()
+                return {"success": True, "message": "Monitor created successfully", "monitor_id": monitor_id}
+            else:
+                return {"success": False, "message": "Failed to create monitor"}
+    except Exception as e:
+        return {"success": False, "message": f"Database error: {str(e)}"}
+
+
+async def _delete_monitor(monitor_id):
+    try:
+        async with db_connection() as connection, connection.cursor() as cursor:
+            await cursor.execute("DELETE FROM monitors WHERE monitorid = %s", (monitor_id,))
+            if cursor.rowcount > 0:
+                await connection.commit()
+                return {"success": True, "message": "Monitor deleted successfully"}
+            else:
+                return {"success": False, "message": "Monitor not found"}
+    except Exception as e:
+        return {"success": False, "message": f"Database error: {str(e)}"}
+
+
+async def _edit_monitor(monitor_id: int, update_data: Dict[str, Any]):
+    """Update monitor fields in the database, safely mapping API fields to DB columns."""
+    if not update_data:
+        return {"success": False, "message": "No data provided to update"}
+
+    try:
+        query = monitor_update_query(monitor_id, update_data)
+        if not query:
+            return {"success": False, "message": "No valid fields to update"}
+
+        async with db_connection() as connection, connection.cursor() as cursor:
+            await cursor.execute(*query)
+            if cursor.rowcount > 0:
+                await connection.commit()
+                return {"success": True, "message": "Monitor updated successfully"}
+            else:
+                return {"success": False, "message": "Monitor not found"}
+    except Exception as e:
+        return {"success": False, "message": f"Database error: {str(e)}"}
+
+
+async def get_monitor_info(monitor_id):
+    try:
+        async with db_connection() as connection, connection.cursor() as cursor:
+            await cursor.execute(f"{MONITOR_SELECT} WHERE monitorid = %s", (int(monitor_id),))
+            monitor = await cursor.fetchone()
+            if not monitor:
+                return {"success": False, "message": "Monitor not found"}
+            return {"success": True, "data": monitor_from_row(monitor)}
+    except Exception as e:
+        return {"success": False, "message": f"Database error: {str(e)}"}
+
+
+async def get_monitor_by_user(user_id: int):
+    try:
+        async with db_connection() as connection, connection.cursor() as cursor:
+            await cursor.execute(f"{MONITOR_SELECT} WHERE userid = %s", (user_id,))
+            monitors = await cursor.fetchall()
+            if not monitors:
+                return {"success": False, "message": "No monitors found for user"}
+            return {"success": True, "data": [monitor_from_row(monitor) for monitor in monitors]}
+    except Exception as e:
+        return {"success": False, "message": f"Database error: {str(e)}"}
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Float, Boolean, Text
+from sqlalchemy import create_engine, Column, Integer, BigInteger, String, DateTime, Float, Boolean, Text, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime, timedelta
@@ -30,14 +30,95 @@ class Website(Base):
     
 class UptimeCheck(Base):
     __tablename__ = "uptime_checks"
+    __table_args__ = (
+        Index("ix_uptime_checks_website_source_ts", "website_id", "source", "timestamp"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    website_id = Column(Integer, nullable=False)
+    website_id = Column(Integer, nullable=False)  # UptimeRobot monitor id
     timestamp = Column(DateTime, default=datetime.utcnow)
     status_code = Column(Integer)
     response_time = Column(Float)  # in milliseconds
     is_up = Column(Boolean)
     error_message = Column(Text, nullable=True)
+    source = Column(String(16), default="log")  # "log", "response_time" or "probe"
+    external_id = Column(BigInteger, nullable=True)  # UptimeRobot log id
+    log_type = Column(Integer, nullable=True)  # UptimeRobot log type (1 down, 2 up, 98 started, 99 paused)
+    # Phase timings of built-in prober checks, in milliseconds (response_time is the total)
+    dns_ms = Column(Float, nullable=True)
+    connect_ms = Column(Float, nullable=True)
+    tls_ms = Column(Float, nullable=True)
+    ttfb_ms = Column(Float, nullable=True)
+
+class MonitorSyncState(Base):
+    """Per-monitor high-water marks of what has been copied into uptime_checks"""
+    __tablename__ = "monitor_sync_state"
+
+    monitor_id = Column(Integer, primary_key=True)
+    last_log_ts = Column(Integer, default=0)  # unix seconds
+    last_response_time_ts = Column(Integer, default=0)  # unix seconds
+    synced_at = Column(DateTime, default=datetime.utcnow)
+
+class CheckRollup(Base):
+    """Per-monitor check aggregates at minute (60), hour (3600) and day (86400) granularity"""
+    __tablename__ = "check_rollups"
+
+    monitor_id = Column(Integer, primary_key=True)
+    bucket_seconds = Column(Integer, primary_key=True)
+    bucket_start = Column(Integer, primary_key=True)  # unix seconds, multiple of bucket_seconds
+    up_count = Column(Integer, default=0)
+    down_count = Column(Integer, default=0)
+    latency_sum = Column(Float, default=0.0)  # in milliseconds
+    latency_count = Column(Integer, default=0)
+    latency_min = Column(Float, nullable=True)
+    latency_max = Column(Float, nullable=True)
+
+class DowntimePoint(Base):
+    """Prefix-sum series: cumulative downtime at each down/up transition of a monitor"""
+    __tablename__ = "downtime_series"
+
+    monitor_id = Column(Integer, primary_key=True)
+    ts = Column(Integer, primary_key=True)  # unix seconds of the transition
+    cumulative_down = Column(BigInteger, default=0)  # downtime seconds before ts
+    is_down = Column(Boolean, default=False)  # state from ts on
+
+class Incident(Base):
+    """A down interval of a monitor, from its down log to the next up/started/paused log"""
+    __tablename__ = "incidents"
+    __table_args__ = (
+        Index("ix_incidents_monitor_end", "monitor_id", "end_ts"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    monitor_id = Column(Integer, nullable=False)
+    start_ts = Column(Integer, nullable=False)  # unix seconds
+    end_ts = Column(BigInteger, nullable=False)  # unix seconds, INCIDENT_OPEN_END while ongoing
+    reason = Column(Text, nullable=True)
+    status_code = Column(Integer, nullable=True)
+
+INCIDENT_OPEN_END = 2 ** 62
+
+class EmailOutboxMessage(Base):
+    """An email waiting for (or done with) the outbox worker; see services/auth_mail_pkg/outbox.py"""
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    idempotency_key = Column(String(255), unique=True, nullable=False)
+    recipient = Column(String(255), nullable=False)
+    subject = Column(Text, nullable=False)
+    text = Column(Text, nullable=True)
+    html = Column(Text, nullable=True)
+    status = Column(String(16), default="pending")  # "pending", "sending", "sent" or "failed"
+    attempts = Column(Integer, default=0)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow)
+    claimed_by = Column(String(64), nullable=True)  # claim token while "sending"
+    claimed_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
 
 # # Create tables
 Base.metadata.create_all(bind=engine)
@@ -57,7 +138,8 @@ from dotenv import load_dotenv
 import hashlib
 import secrets
 
-from services.auth_mail_pkg.email_service import EmailService
+from services.auth_mail_pkg import outbox
+from database.pool import ConnectionPool
 
 USER = os.getenv("user")
 PASSWORD = os.getenv("password")
@@ -66,8 +148,18 @@ PORT = os.getenv("port")
 DBNAME = os.getenv("dbname")
 OTP_EXPIRY = int(os.getenv("OTP_EXPIRY", 1))  # in minutes, default to 1 minute if not set
 
+# Connection pool sizing: DB_POOL_MIN_SIZE stay open per pool when idle, at most DB_POOL_MAX_SIZE at once per
+# process, split between the async request-handler pool (AsyncDB, DB_ASYNC_POOL_MAX_SIZE) and this one (the rest)
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", 1))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", 10))
+DB_ASYNC_POOL_MAX_SIZE = max(1, min(int(os.getenv("DB_ASYNC_POOL_MAX_SIZE", DB_POOL_MAX_SIZE // 2)), DB_POOL_MAX_SIZE - 1))
+DB_SYNC_POOL_MAX_SIZE = max(1, DB_POOL_MAX_SIZE - DB_ASYNC_POOL_MAX_SIZE)
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))  # seconds to wait for a free connection
+DB_POOL_HEALTH_CHECK_SECONDS = float(os.getenv("DB_POOL_HEALTH_CHECK_SECONDS", 30))  # ping connections idle longer
+DB_POOL_MAX_IDLE_SECONDS = float(os.getenv("DB_POOL_MAX_IDLE_SECONDS", 300))
+
 def get_db_connection():
-    """Get database connection"""
+    """Open a new, unpooled database connection (e.g. for a session-level lock); queries use db_connection()"""
     return psycopg2.connect(
         user=USER,
         password=PASSWORD,
@@ -76,6 +168,19 @@ def get_db_connection():
         dbname=DBNAME
     )
 
+db_pool = ConnectionPool(
+    get_db_connection,
+    minconn=min(DB_POOL_MIN_SIZE, DB_SYNC_POOL_MAX_SIZE),
+    maxconn=DB_SYNC_POOL_MAX_SIZE,
+    timeout=DB_POOL_TIMEOUT,
+    health_check_after=DB_POOL_HEALTH_CHECK_SECONDS,
+    max_idle=DB_POOL_MAX_IDLE_SECONDS,
+)
+
+def db_connection():
+    """Check a pooled connection out for a `with` block; it is returned however the block exits"""
+    return db_pool.connection()
+
 def hash_password(password):
     return hashlib.sha256(password.encode()).hexdigest()
 
@@ -88,29 +193,28 @@ def generate_otp():
 
 def signup_user(name, email, password):
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor()
-
-        # Check if user already exists
-        cursor.execute("SELECT id FROM users WHERE email = %s", (email,))
-        if cursor.fetchone():
-            return {"success": False, "message": "Email already exists"}
-        
-        # Hash password and generate OTP
-        passhash = hash_password(password)
-        otp = generate_otp()
-        otp_expiry = datetime.now() + timedelta(minutes=OTP_EXPIRY) 
-        
-        cursor.execute("""
-            INSERT INTO users (name, email, passhash, email_verified, verification_otp, otp_expiry)
-            VALUES (%s, %s, %s, %s, %s, %s)
-            RETURNING id
-        """, (name, email, passhash, False, otp, otp_expiry))
-        
-        user_id = cursor.fetchone()[0]
-        connection.commit()  ; cursor.close()  ; connection.close()
-        EmailService().send_otp_email(recipient_email=email, otp=otp, expire=OTP_EXPIRY)
-        
+        with db_connection() as connection, connection.cursor() as cursor:
+            # Check if user already exists
+            cursor.execute("SELECT id FROM users WHERE email = %s", (email,))
+            if cursor.fetchone():
+                return {"success": False, "message": "Email already exists"}
+
+            # Hash password and generate OTP
+            passhash = hash_password(password)
+            otp = generate_otp()
+            otp_expiry = datetime.now() + timedelta(minutes=OTP_EXPIRY)
+
+            cursor.execute("""
+                INSERT INTO users (name, email, passhash, email_verified, verification_otp, otp_expiry)
+                VALUES (%s, %s, %s, %s, %s, %s)
+                RETURNING id
+            """, (name, email, passhash, False, otp, otp_expiry))
+
+            user_id = cursor.fetchone()[0]
+            connection.commit()
+        # Sent by the outbox worker, so signup doesn't wait on SMTP
+        outbox.enqueue_otp_email(email, otp, expire=OTP_EXPIRY)
+
         return {
             "success": True,
             "message": "User created successfully",
@@ -118,35 +222,30 @@ def signup_user(name, email, password):
             "otp": otp,
             "otp_expires": otp_expiry.isoformat()
         }
-        
+
     except Exception as e:
         return {"success": False, "message": f"Signup failed: {str(e)}"}
 
 def login_user(email, password):
     """Login user with email and password"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor()
-        
-        # Get user by email
-        cursor.execute("""
-            SELECT id, name, email, passhash, email_verified 
-            FROM users WHERE email = %s
-        """, (email,))
-        
-        user = cursor.fetchone()
+        with db_connection() as connection, connection.cursor() as cursor:
+            # Get user by email
+            cursor.execute("""
+                SELECT id, name, email, passhash, email_verified
+                FROM users WHERE email = %s
+            """, (email,))
+            user = cursor.fetchone()
+
         if not user:
             return {"success": False, "message": "User not found"}
-        
+
         user_id, name, email, stored_hash, email_verified = user
-        
+
         # Verify password
         if not verify_password(password, stored_hash):
             return {"success": False, "message": "Invalid password"}
-        
-        cursor.close()
-        connection.close()
-        
+
         return {
             "success": True,
             "message": "Login successful",
@@ -157,47 +256,45 @@ def login_user(email, password):
                 "email_verified": email_verified
             }
         }
-        
+
     except Exception as e:
         return {"success": False, "message": f"Login failed: {str(e)}"}
 
 def verify_email_otp(email, otp):
     """Verify email with OTP"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor()
-        
-        # Check OTP
-        cursor.execute("""
-            SELECT id, verification_otp, otp_expiry, email_verified
-            FROM users WHERE email = %s
-        """, (email,))
-        
-        user = cursor.fetchone()
-        if not user:
-            return {"success": False, "message": "User not found"}
-        
-        user_id, stored_otp, otp_expiry, email_verified = user
-        
-        if email_verified:
-            return {"success": False, "message": "Email already verified"}
-        
-        if not stored_otp or stored_otp != otp:
-            return {"success": False, "message": "Invalid OTP"}
-        
-        if datetime.now() > otp_expiry:
-            return {"success": False, "message": "OTP expired"}
-        
-        # Mark email as verified
-        cursor.execute("""
-            UPDATE users 
-            SET email_verified = TRUE, verification_otp = NULL, otp_expiry = NULL
-            WHERE id = %s
-        """, (user_id,))
-        
-        connection.commit()  ; cursor.close()  ; connection.close()
+        with db_connection() as connection, connection.cursor() as cursor:
+            # Check OTP
+            cursor.execute("""
+                SELECT id, verification_otp, otp_expiry, email_verified
+                FROM users WHERE email = %s
+            """, (email,))
+
+            user = cursor.fetchone()
+            if not user:
+                return {"success": False, "message": "User not found"}
+
+            user_id, stored_otp, otp_expiry, email_verified = user
+
+            if email_verified:
+                return {"success": False, "message": "Email already verified"}
+
+            if not stored_otp or stored_otp != otp:
+                return {"success": False, "message": "Invalid OTP"}
+
+            if datetime.now() > otp_expiry:
+                return {"success": False, "message": "OTP expired"}
+
+            # Mark email as verified
+            cursor.execute("""
+                UPDATE users
+                SET email_verified = TRUE, verification_otp = NULL, otp_expiry = NULL
+                WHERE id = %s
+            """, (user_id,))
+
+            connection.commit()
         return {"success": True, "message": "Email verified successfully"}
-        
+
     except Exception as e:
         return {"success": False, "message": f"Verification failed: {str(e)}"}
 
@@ -205,37 +302,35 @@ def verify_email_otp(email, otp):
 def verify_otp(email, otp):
     """Verify OTP"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor()
-        
-        # Check OTP
-        cursor.execute("""
-            SELECT id, verification_otp, otp_expiry, email_verified
-            FROM users WHERE email = %s
-        """, (email,))
-        
-        user = cursor.fetchone()
-        if not user:
-            return {"success": False, "message": "User not found"}
-        
-        user_id, stored_otp, otp_expiry, email_verified = user
-        
-        if not stored_otp or stored_otp != otp:
-            return {"success": False, "message": "Invalid OTP"}
-        
-        if datetime.now() > otp_expiry:
-            return {"success": False, "message": "OTP expired"}
-        
-        # Mark email as verified
-        cursor.execute("""
-            UPDATE users 
-            SET verification_otp = NULL, otp_expiry = NULL
-            WHERE id = %s
-        """, (user_id,))
-        
-        connection.commit()  ; cursor.close()  ; connection.close()
+        with db_connection() as connection, connection.cursor() as cursor:
+            # Check OTP
+            cursor.execute("""
+                SELECT id, verification_otp, otp_expiry, email_verified
+                FROM users WHERE email = %s
+            """, (email,))
+
+            user = cursor.fetchone()
+            if not user:
+                return {"success": False, "message": "User not found"}
+
+            user_id, stored_otp, otp_expiry, email_verified = user
+
+            if not stored_otp or stored_otp != otp:
+                return {"success": False, "message": "Invalid OTP"}
+
+            if datetime.now() > otp_expiry:
+                return {"success": False, "message": "OTP expired"}
+
+            # Mark email as verified
+            cursor.execute("""
+                UPDATE users
+                SET verification_otp = NULL, otp_expiry = NULL
+                WHERE id = %s
+            """, (user_id,))
+
+            connection.commit()
         return {"success": True, "message": "OTP verified successfully"}
-        
+
     except Exception as e:
         return {"success": False, "message": f"Verification failed: {str(e)}"}
 
@@ -244,18 +339,13 @@ def verify_otp(email, otp):
 def test_connection():
     """Test database connection"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor()
-        cursor.execute("SELECT NOW();")
-        result = cursor.fetchone()
+        with db_connection() as connection, connection.cursor() as cursor:
+            cursor.execute("SELECT NOW();")
+            result = cursor.fetchone()
         print("Connection successful!")
         print("Current Time:", result)
-        
-        cursor.close()
-        connection.close()
-        print("Connection closed.")
         return True
-        
+
     except Exception as e:
         print(f"Failed to connect: {e}")
         return False
@@ -263,29 +353,24 @@ def test_connection():
 def resend_email_otp(email):
     """Resend OTP to user's email"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor()
-        
         # Generate new OTP
         new_otp = generate_otp()
         otp_expiry = datetime.now() + timedelta(minutes=int(os.getenv("OTP_EXPIRY", 5)))
-        
-        # Update OTP in database
-        cursor.execute("""
-            UPDATE users
-            SET verification_otp = %s, otp_expiry = %s
-            WHERE email = %s
-        """, (new_otp, otp_expiry, email))
-        
-        connection.commit()
-        cursor.close()
-        connection.close()
-        
+
+        with db_connection() as connection, connection.cursor() as cursor:
+            # Update OTP in database
+            cursor.execute("""
+                UPDATE users
+                SET verification_otp = %s, otp_expiry = %s
+                WHERE email = %s
+            """, (new_otp, otp_expiry, email))
+
+            connection.commit()
+
         # Send OTP email
-        service = EmailService()
-        service.send_otp_email(email, new_otp, expire=otp_expiry)
-        
+        outbox.enqueue_otp_email(email, new_otp, expire=otp_expiry)
+
         return {"success": True, "message": "OTP resent successfully"}
-        
+
     except Exception as e:
-        return {"success": False, "message": f"Resend OTP failed: {str(e)}"}
\ No newline at end of file
+        return {"success": False, "message": f"Resend OTP failed: {str(e)}"}
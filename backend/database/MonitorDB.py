@@ -1,6 +1,10 @@
-from typing import Dict
+import logging
+from typing import Dict, Iterable, List, Optional
 from pydantic import BaseModel
-from database.AuthDB import get_db_connection
+from psycopg2.extras import execute_values
+from database.AuthDB import db_connection
+
+logger = logging.getLogger(__name__)
 
 
 class MonitorCreate(BaseModel):
@@ -12,148 +16,246 @@ class MonitorCreate(BaseModel):
     interval: int
 
 
+# Map API field names to DB columns
+MONITOR_FIELD_MAP = {
+    "friendlyName": "sitename",
+    "site_url": "site_url",
+    "interval": "interval",
+    "is_active": "is_active",
+    "status": "status",
+}
+
+
+# Named columns: a database migrated with ALTER TABLE has `interval` last, so `SELECT *` positions differ
+MONITOR_SELECT = "SELECT monitorid, userid, sitename, site_url, monitor_created, interval, is_active FROM monitors"
+
+
+def monitor_from_row(monitor):
+    """A MONITOR_SELECT row as a dict"""
+    return {
+        "monitorid": monitor[0],
+        "userid": monitor[1],
+        "sitename": monitor[2],
+        "site_url": monitor[3],
+        "monitor_created": monitor[4],
+        "interval": monitor[5],
+        "is_active": monitor[6]
+    }
+
+
 def _create_new_monitor(monitor: Dict[str, any]):
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor()
-        print("before insert:", monitor)
-        cursor.execute(
-            """INSERT INTO monitors (monitorid, userid, sitename, site_url, monitor_created)
-               VALUES (%s, %s, %s, %s, %s) RETURNING monitorid""",
-            (monitor["monitorid"], monitor["userid"], monitor["sitename"], monitor["site_url"],
-             monitor["monitor_created"])
-        )
-
-        result = cursor.fetchone()
-        print("after insert:", result)
-        if result:
-            monitor_id = result[0]
-            connection.commit()
-            print("after commit:", monitor_id)
-            return {"success": True, "message": "Monitor created successfully", "monitor_id": monitor_id}
-        else:
-            return {"success": False, "message": "Failed to create monitor"}
+        with db_connection() as connection, connection.cursor() as cursor:
+            cursor.execute(
+                """INSERT INTO monitors (monitorid, userid, sitename, site_url, monitor_created, interval)
+                   VALUES (%s, %s, %s, %s, %s, %s) RETURNING monitorid""",
+                (monitor["monitorid"], monitor["userid"], monitor["sitename"], monitor["site_url"],
+                 monitor["monitor_created"], monitor.get("interval"))
+            )
+
+            result = cursor.fetchone()
+            if result:
+                monitor_id = result[0]
+                connection.commit()
+                logger.debug(f"Stored monitor {monitor_id} for user {monitor['userid']}")
+                return {"success": True, "message": "Monitor created successfully", "monitor_id": monitor_id}
+            else:
+                return {"success": False, "message": "Failed to create monitor"}
     except Exception as e:
-        connection.rollback()
         return {"success": False, "message": f"Database error: {str(e)}"}
-    finally:
-        cursor.close()
-        connection.close()
 
 
 def _delete_monitor(monitor_id):
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor()
-        cursor.execute("DELETE FROM monitors WHERE monitorid = %s", (monitor_id,))
-        if cursor.rowcount > 0:
-            connection.commit()
-            return {"success": True, "message": "Monitor deleted successfully"}
-        else:
-            return {"success": False, "message": "Monitor not found"}
+        with db_connection() as connection, connection.cursor() as cursor:
+            cursor.execute("DELETE FROM monitors WHERE monitorid = %s", (monitor_id,))
+            if cursor.rowcount > 0:
+                connection.commit()
+                return {"success": True, "message": "Monitor deleted successfully"}
+            else:
+                return {"success": False, "message": "Monitor not found"}
     except Exception as e:
-        connection.rollback()
         return {"success": False, "message": f"Database error: {str(e)}"}
-    finally:
-        cursor.close()
-        connection.close()
 
 
 def get_monitor_info(monitor_id):
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor()
-        cursor.execute("SELECT * FROM monitors WHERE monitorid = %s", (str(monitor_id),))
-        monitor = cursor.fetchone()
-        if not monitor:
-            return {"success": False, "message": "Monitor not found"}
-        monitor = {
-            "monitorid": monitor[0],
-            "userid": monitor[1],
-            "sitename": monitor[2],
-            "site_url": monitor[3],
-            "monitor_created": monitor[4],
-            "interval": monitor[5],
-            "is_active": monitor[6]
-        }
-        return {"success": True, "data": monitor}
+        with db_connection() as connection, connection.cursor() as cursor:
+            cursor.execute(f"{MONITOR_SELECT} WHERE monitorid = %s", (str(monitor_id),))
+            monitor = cursor.fetchone()
+            if not monitor:
+                return {"success": False, "message": "Monitor not found"}
+            return {"success": True, "data": monitor_from_row(monitor)}
+    except Exception as e:
+        return {"success": False, "message": f"Database error: {str(e)}"}
+
+
+def get_active_monitors():
+    """Every active monitor with its name, URL and check interval (seconds), for the built-in prober"""
+    try:
+        with db_connection() as connection, connection.cursor() as cursor:
+            cursor.execute("SELECT monitorid, sitename, site_url, interval FROM monitors WHERE is_active IS NOT FALSE")
+            monitors = [
+                {"monitorid": monitor[0], "sitename": monitor[1], "site_url": monitor[2], "interval": monitor[3]}
+                for monitor in cursor.fetchall()
+            ]
+            return {"success": True, "data": monitors}
+    except Exception as e:
+        return {"success": False, "message": f"Database error: {str(e)}"}
+
+
+def heartbeat_prober_worker(worker_id: str, ttl_seconds: float):
+    """Record a prober worker's heartbeat and return the ids of every worker heard from within the TTL"""
+    try:
+        with db_connection() as connection, connection.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO prober_workers (worker_id, heartbeat_at) VALUES (%s, NOW())
+                ON CONFLICT (worker_id) DO UPDATE SET heartbeat_at = EXCLUDED.heartbeat_at
+            """, (worker_id,))
+            cursor.execute(
+                "SELECT worker_id FROM prober_workers WHERE heartbeat_at > NOW() - make_interval(secs => %s)",
+                (ttl_seconds,),
+            )
+            workers = [row[0] for row in cursor.fetchall()]
+            connection.commit()
+            return {"success": True, "data": workers}
+    except Exception as e:
+        return {"success": False, "message": f"Database error: {str(e)}"}
+
+
+def remove_prober_worker(worker_id: str):
+    try:
+        with db_connection() as connection, connection.cursor() as cursor:
+            cursor.execute("DELETE FROM prober_workers WHERE worker_id = %s", (worker_id,))
+            connection.commit()
+            return {"success": True}
+    except Exception as e:
+        return {"success": False, "message": f"Database error: {str(e)}"}
+
+
+def resolve_monitor_owners(monitor_ids: Iterable[int]):
+    """Owner (user id, email) of each monitor in one JOIN; monitors without an owner are left out"""
+    monitor_ids = list({monitor_id for monitor_id in monitor_ids if monitor_id is not None})
+    if not monitor_ids:
+        return {"success": True, "data": {}}
+    try:
+        with db_connection() as connection, connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT m.monitorid, u.id, u.email
+                FROM monitors m JOIN users u ON u.id = m.userid
+                WHERE m.monitorid = ANY(%s)
+            """, (monitor_ids,))
+            owners = {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+            return {"success": True, "data": owners}
+    except Exception as e:
+        return {"success": False, "message": f"Database error: {str(e)}"}
+
+
+ALERT_STATE_COLUMNS = ("monitorid", "state", "down_since", "last_notified_at", "reminders_sent", "acknowledged_at")
+
+
+def get_alert_states(monitor_ids: Optional[List[int]] = None):
+    """Stored alert states keyed by monitor id: all of them (one query per alert run) or just `monitor_ids`"""
+    try:
+        with db_connection() as connection, connection.cursor() as cursor:
+            query = f"SELECT {', '.join(ALERT_STATE_COLUMNS)} FROM monitor_alert_state"
+            if monitor_ids is None:
+                cursor.execute(query)
+            else:
+                cursor.execute(query + " WHERE monitorid = ANY(%s)", (list(monitor_ids),))
+            states = {row[0]: dict(zip(ALERT_STATE_COLUMNS, row)) for row in cursor.fetchall()}
+            return {"success": True, "data": states}
+    except Exception as e:
+        return {"success": False, "message": f"Database error: {str(e)}"}
+
+
+def save_alert_states(states: List[Dict]):
+    """Upsert changed alert states in one statement"""
+    if not states:
+        return {"success": True}
+    try:
+        with db_connection() as connection, connection.cursor() as cursor:
+            updates = ", ".join(f"{column} = EXCLUDED.{column}" for column in ALERT_STATE_COLUMNS[1:])
+            execute_values(
+                cursor,
+                f"INSERT INTO monitor_alert_state ({', '.join(ALERT_STATE_COLUMNS)}) VALUES %s "
+                f"ON CONFLICT (monitorid) DO UPDATE SET {updates}, updated_at = NOW()",
+                [tuple(state.get(column) for column in ALERT_STATE_COLUMNS) for state in states],
+                page_size=1000,
+            )
+            connection.commit()
+            return {"success": True}
+    except Exception as e:
+        return {"success": False, "message": f"Database error: {str(e)}"}
+
+
+def acknowledge_alert(monitor_id: int):
+    """Silence reminders for a monitor that is currently down"""
+    try:
+        with db_connection() as connection, connection.cursor() as cursor:
+            cursor.execute("""
+                UPDATE monitor_alert_state
+                SET state = 'acknowledged', acknowledged_at = NOW(), updated_at = NOW()
+                WHERE monitorid = %s AND state = 'down'
+                RETURNING down_since
+            """, (monitor_id,))
+            row = cursor.fetchone()
+            connection.commit()
+            if not row:
+                return {"success": False, "message": "Monitor has no unacknowledged down alert"}
+            return {"success": True, "data": {"monitorid": monitor_id, "state": "acknowledged", "down_since": row[0]}}
     except Exception as e:
         return {"success": False, "message": f"Database error: {str(e)}"}
-    finally:
-        cursor.close()
-        connection.close()
 
 
 def get_monitor_by_user(user_id: int):
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor()
-        cursor.execute("SELECT * FROM monitors WHERE userid = %s", (user_id,))
-        monitors = cursor.fetchall()
-        if not monitors:
-            return {"success": False, "message": "No monitors found for user"}
-        monitors = [
-            {
-                "monitorid": monitor[0],
-                "userid": monitor[1],
-                "sitename": monitor[2],
-                "site_url": monitor[3],
-                "monitor_created": monitor[4],
-                "interval": monitor[5],
-                "is_active": monitor[6]
-            }
-            for monitor in monitors
-        ]
-        return {"success": True, "data": monitors}
+        with db_connection() as connection, connection.cursor() as cursor:
+            cursor.execute(f"{MONITOR_SELECT} WHERE userid = %s", (user_id,))
+            monitors = cursor.fetchall()
+            if not monitors:
+                return {"success": False, "message": "No monitors found for user"}
+            return {"success": True, "data": [monitor_from_row(monitor) for monitor in monitors]}
     except Exception as e:
         return {"success": False, "message": f"Database error: {str(e)}"}
-    finally:
-        cursor.close()
-        connection.close()
+
+def monitor_update_query(monitor_id: int, update_data: Dict[str, any]):
+    """(UPDATE statement, params) for the fields of update_data that map to monitor columns, or None"""
+    set_clauses = []
+    values = []
+
+    for key, value in update_data.items():
+        db_key = MONITOR_FIELD_MAP.get(key)
+        if not db_key:
+            # Skip fields that do not exist in DB
+            continue
+        set_clauses.append(f"{db_key} = %s")
+        values.append(value)
+
+    if not set_clauses:
+        return None
+
+    values.append(monitor_id)
+    set_clause_str = ", ".join(set_clauses)
+    return f"UPDATE monitors SET {set_clause_str} WHERE monitorid = %s", tuple(values)
+
 
 def _edit_monitor(monitor_id: int, update_data: Dict[str, any]):
     """Update monitor fields in the database, safely mapping API fields to DB columns."""
     if not update_data:
         return {"success": False, "message": "No data provided to update"}
 
-    # Map API field names to DB columns
-    field_map = {
-        "friendlyName": "sitename",
-        "site_url": "site_url",
-        # "interval": None,  # interval not in DB, skip it
-        "is_active": "is_active",
-        "status": "status",
-    }
-
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor()
-        set_clauses = []
-        values = []
-
-        for key, value in update_data.items():
-            db_key = field_map.get(key)
-            if not db_key:
-                # Skip fields that do not exist in DB
-                continue
-            set_clauses.append(f"{db_key} = %s")
-            values.append(value)
-
-        if not set_clauses:
+        query = monitor_update_query(monitor_id, update_data)
+        if not query:
             return {"success": False, "message": "No valid fields to update"}
 
-        values.append(monitor_id)
-        set_clause_str = ", ".join(set_clauses)
-
-        cursor.execute(f"UPDATE monitors SET {set_clause_str} WHERE monitorid = %s", tuple(values))
-        if cursor.rowcount > 0:
-            connection.commit()
-            return {"success": True, "message": "Monitor updated successfully"}
-        else:
-            return {"success": False, "message": "Monitor not found"}
+        with db_connection() as connection, connection.cursor() as cursor:
+            cursor.execute(*query)
+            if cursor.rowcount > 0:
+                connection.commit()
+                return {"success": True, "message": "Monitor updated successfully"}
+            else:
+                return {"success": False, "message": "Monitor not found"}
     except Exception as e:
-        connection.rollback()
         return {"success": False, "message": f"Database error: {str(e)}"}
-    finally:
-        cursor.close()
-        connection.close()
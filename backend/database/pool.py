@@ -0,0 +1,201 @@
+"""
+Process-wide pool of Postgres connections.
+
+A ThreadedConnectionPool with the parts psycopg2 leaves out:
+
+- Waiting: when all `maxconn` connections are checked out, callers wait (up
+  to `timeout` seconds) for one to come back instead of getting
+  "connection pool exhausted" straight away. Returned slots go to waiters
+  in arrival order, so a thread that keeps checking out can't starve them.
+- Idle retention: psycopg2 closes every returned connection once `minconn`
+  are idle, so a burst of queries would reconnect each time. Here up to
+  `maxconn` stay open; those beyond `minconn` are closed after `max_idle`
+  seconds unused.
+- Health checks: a connection idle for longer than `health_check_after`
+  seconds is pinged (`SELECT 1`) before it is handed out and replaced if
+  the server dropped it. Connections returned mid-transaction are rolled
+  back, broken ones discarded.
+
+Use `with pool.connection() as connection:`; the connection always goes back,
+whichever way the block exits.
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator
+
+from psycopg2.pool import PoolError, ThreadedConnectionPool
+
+
+class _FairSlots:
+    """Counting semaphore that hands released slots to waiters first-come first-served"""
+
+    def __init__(self, size: int):
+        self._free = size
+        self._lock = threading.Lock()
+        self._waiters: Deque[threading.Event] = deque()
+
+    def acquire(self, timeout: float) -> bool:
+        with self._lock:
+            if self._free > 0 and not self._waiters:
+                self._free -= 1
+                return True
+            granted = threading.Event()
+            self._waiters.append(granted)
+        if granted.wait(timeout):
+            return True
+        with self._lock:
+            if granted.is_set():  # handed over just as the wait timed out
+                return True
+            self._waiters.remove(granted)
+            return False
+
+    def release(self):
+        with self._lock:
+            if self._waiters:
+                self._waiters.popleft().set()
+            else:
+                self._free += 1
+
+
+class ConnectionPool(ThreadedConnectionPool):
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        minconn: int = 1,
+        maxconn: int = 10,
+        timeout: float = 10.0,
+        health_check_after: float = 30.0,
+        max_idle: float = 300.0,
+    ):
+        self._factory = connect
+        # Nothing is opened until the first checkout
+        super().__init__(0, maxconn)
+        self.min_size = minconn
+        # psycopg2 keeps at most `minconn` idle connections; idle ones are trimmed by age instead
+        self.minconn = maxconn
+        self.timeout = timeout
+        self.health_check_after = health_check_after
+        self.max_idle = max_idle
+        self._slots = _FairSlots(maxconn)
+        self._last_used: Dict[int, float] = {}
+        self._waits: Deque[float] = deque(maxlen=2000)
+        self.in_use = 0
+        self.counters = {"checkouts": 0, "waited": 0, "timeouts": 0, "connects": 0, "discarded": 0}
+        self.max_wait = 0.0
+
+    def _checkout(self):
+        """An idle connection, or a new one; connecting happens outside the lock so connects run in parallel"""
+        with self._lock:
+            if self.closed:
+                raise PoolError("connection pool is closed")
+            key = self._getkey()
+            conn = self._pool.pop() if self._pool else None
+            if conn is not None:
+                self._used[key] = conn
+                self._rused[id(conn)] = key
+                return conn
+        conn = self._factory()
+        with self._lock:
+            self.counters["connects"] += 1
+            self._used[key] = conn
+            self._rused[id(conn)] = key
+        return conn
+
+    def _healthy(self, conn) -> bool:
+        if conn.closed:
+            return False
+        last_used = self._last_used.get(id(conn))
+        if last_used is None or time.monotonic() - last_used < self.health_check_after:
+            return True
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            cursor.close()
+            return True
+        except Exception:
+            return False
+
+    def getconn(self):
+        started = time.monotonic()
+        if not self._slots.acquire(timeout=self.timeout):
+            self.counters["timeouts"] += 1
+            raise PoolError(f"no database connection free after {self.timeout:g}s ({self.maxconn} in use)")
+        waited = time.monotonic() - started
+        try:
+            while True:
+                conn = self._checkout()
+                if self._healthy(conn):
+                    break
+                self.counters["discarded"] += 1
+                self._last_used.pop(id(conn), None)
+                super().putconn(conn, close=True)
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self.in_use += 1
+            self.counters["checkouts"] += 1
+            if waited > 0.001:
+                self.counters["waited"] += 1
+            self.max_wait = max(self.max_wait, waited)
+            self._waits.append(waited)
+        return conn
+
+    def putconn(self, conn, close=False):
+        try:
+            # Rolls back an open transaction and drops the connection if the server closed it
+            super().putconn(conn, close=close)
+            now = time.monotonic()
+            with self._lock:
+                if conn.closed:
+                    self._last_used.pop(id(conn), None)
+                else:
+                    self._last_used[id(conn)] = now
+                self._trim_idle(now)
+        finally:
+            with self._lock:
+                self.in_use -= 1
+            self._slots.release()
+
+    def _trim_idle(self, now: float):
+        # self._pool is used LIFO, so the longest idle connections are at the front
+        while len(self._pool) > self.min_size and now - self._last_used.get(id(self._pool[0]), now) > self.max_idle:
+            conn = self._pool.pop(0)
+            self._last_used.pop(id(conn), None)
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        conn = self.getconn()
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    def close(self):
+        if not self.closed:
+            self.closeall()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = sorted(self._waits)
+            open_connections = len(self._pool) + len(self._used)
+            idle = len(self._pool)
+        return {
+            "max_size": self.maxconn,
+            "open": open_connections,
+            "idle": idle,
+            "in_use": self.in_use,
+            "saturation": round(self.in_use / self.maxconn, 3),
+            **self.counters,
+            "wait_ms_p50": round(waits[len(waits) // 2] * 1000, 2) if waits else 0.0,
+            "wait_ms_p99": round(waits[min(len(waits) - 1, int(len(waits) * 0.99))] * 1000, 2) if waits else 0.0,
+            "wait_ms_max": round(self.max_wait * 1000, 2),
+        }
@@ -25,14 +25,41 @@ CREATE TABLE monitors (
     sitename VARCHAR(255) NOT NULL,
     site_url VARCHAR(500) NOT NULL,
     monitor_created TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    interval INTEGER, -- check interval in seconds, NULL for the prober default
     is_active BOOLEAN DEFAULT TRUE,
     last_checked TIMESTAMP,
     status VARCHAR(20) DEFAULT 'unknown' -- up, down, unknown
 );
 
+-- ==========================================
+-- Prober Workers Table (heartbeats of the processes sharing the checks)
+-- ==========================================
+CREATE TABLE prober_workers (
+    worker_id VARCHAR(255) PRIMARY KEY,
+    heartbeat_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+-- ==========================================
+-- Monitor Alert State Table (last notified state per monitor)
+-- ==========================================
+CREATE TABLE monitor_alert_state (
+    monitorid INTEGER PRIMARY KEY,
+    state VARCHAR(20) NOT NULL DEFAULT 'up', -- up, down, acknowledged, recovered
+    down_since TIMESTAMP,
+    last_notified_at TIMESTAMP,
+    reminders_sent INTEGER NOT NULL DEFAULT 0,
+    acknowledged_at TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- ==========================================
 -- Indexes for better performance
 -- ==========================================
 CREATE INDEX idx_users_email ON users(email);
 CREATE INDEX idx_monitors_userid ON monitors(userid);
-CREATE INDEX idx_monitors_status ON monitors(status);
\ No newline at end of file
+CREATE INDEX idx_monitors_status ON monitors(status);
+
+-- ==========================================
+-- Migrations for existing databases
+-- ==========================================
+ALTER TABLE monitors ADD COLUMN IF NOT EXISTS interval INTEGER;
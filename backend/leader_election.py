@@ -0,0 +1,172 @@
+"""
+Scheduler leadership across uvicorn workers and nodes.
+
+Every process runs the startup hook, but the periodic jobs (down-monitor
+alerts, history sync, the built-in prober) must run in exactly one of them.
+Each process keeps one dedicated Postgres connection and polls
+`pg_try_advisory_lock` on it; the process holding the session-level lock is
+the leader and runs the jobs, the rest keep polling.
+
+Failover needs no extra bookkeeping: a session-level advisory lock belongs to
+its connection, so when the leader exits, crashes or loses its connection,
+Postgres drops the lock and the next poller to ask gets it. A leader that
+finds its own connection dead demotes itself and stops the jobs. Between the
+server dropping a half-open connection and the old leader noticing, both may
+run a tick, so the window is bounded by LEADER_CHECK_SECONDS.
+
+The lock must be taken on a direct (session mode) connection: through a
+transaction-mode pooler such as Supabase's port 6543 the lock would be tied
+to whichever server connection ran the statement.
+"""
+
+import asyncio
+import hashlib
+import inspect
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# On by default only when a Postgres host is configured; a single local process just runs the jobs
+LEADER_ELECTION_ENABLED = os.getenv("LEADER_ELECTION_ENABLED", "true" if os.getenv("host") else "false").lower() in ("1", "true", "yes")
+LEADER_LOCK_NAME = os.getenv("LEADER_LOCK_NAME", "thewatcher-scheduler")
+LEADER_CHECK_SECONDS = float(os.getenv("LEADER_CHECK_SECONDS", 10))
+
+Callback = Callable[[], Union[None, Awaitable[None]]]
+
+
+def advisory_lock_key(name: str) -> int:
+    """Stable signed 64-bit key for pg_try_advisory_lock(bigint)"""
+    return int.from_bytes(hashlib.sha256(name.encode()).digest()[:8], "big", signed=True)
+
+
+def _default_connect():
+    from database.AuthDB import get_db_connection
+    return get_db_connection()
+
+
+class LeaderElector:
+    """Polls an advisory lock and runs `on_elected` / `on_demoted` on every change of leadership"""
+
+    def __init__(
+        self,
+        on_elected: Optional[Callback] = None,
+        on_demoted: Optional[Callback] = None,
+        lock_name: str = LEADER_LOCK_NAME,
+        check_seconds: float = LEADER_CHECK_SECONDS,
+        connect: Callable[[], Any] = _default_connect,
+    ):
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.lock_name = lock_name
+        self.lock_key = advisory_lock_key(lock_name)
+        self.check_seconds = check_seconds
+        self._connect = connect
+        self._conn = None
+        self._is_leader = False
+        self._task: Optional[asyncio.Task] = None
+        self.counters = {"elections": 0, "demotions": 0, "connection_errors": 0}
+        self.leader_since: Optional[float] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._is_leader
+
+    def _close_connection(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+    def _poll(self) -> bool:
+        """Blocking: try to take the lock, or check the connection that holds it is still alive"""
+        try:
+            if self._conn is None:
+                self._conn = self._connect()
+                self._conn.autocommit = True
+            cursor = self._conn.cursor()
+            try:
+                if self._is_leader:
+                    cursor.execute("SELECT 1")
+                    cursor.fetchone()
+                    return True
+                cursor.execute("SELECT pg_try_advisory_lock(%s)", (self.lock_key,))
+                return bool(cursor.fetchone()[0])
+            finally:
+                cursor.close()
+        except Exception as e:
+            # Whatever the lock was held on is gone with this connection
+            self.counters["connection_errors"] += 1
+            logger.warning(f"⚠️ Leader election connection error: {e}")
+            self._close_connection()
+            return False
+
+    def _release(self, held: bool):
+        if self._conn is not None and held:
+            try:
+                cursor = self._conn.cursor()
+                cursor.execute("SELECT pg_advisory_unlock(%s)", (self.lock_key,))
+                cursor.close()
+            except Exception:
+                pass
+        self._close_connection()
+
+    async def _call(self, callback: Optional[Callback]):
+        if callback is None:
+            return
+        try:
+            result = callback()
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            logger.error(f"❌ Leadership callback failed: {e}")
+
+    async def _set_leader(self, leader: bool):
+        if leader == self._is_leader:
+            return
+        self._is_leader = leader
+        if leader:
+            self.counters["elections"] += 1
+            self.leader_since = time.time()
+            logger.info(f"👑 Elected scheduler leader (lock '{self.lock_name}')")
+            await self._call(self.on_elected)
+        else:
+            self.counters["demotions"] += 1
+            self.leader_since = None
+            logger.warning(f"⚠️ Lost scheduler leadership (lock '{self.lock_name}')")
+            await self._call(self.on_demoted)
+
+    async def _run(self):
+        while True:
+            await self._set_leader(await asyncio.to_thread(self._poll))
+            await asyncio.sleep(self.check_seconds)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop polling; if leading, stop the jobs first, then release the lock so another process takes over at once"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        was_leader = self._is_leader
+        await self._set_leader(False)
+        await asyncio.to_thread(self._release, was_leader)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self._task is not None,
+            "is_leader": self._is_leader,
+            "lock": self.lock_name,
+            "leader_since": self.leader_since,
+            **self.counters,
+        }
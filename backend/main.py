@@ -1,5 +1,6 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 import logging
 import uvicorn
 
@@ -7,6 +8,17 @@ from routes.uptime import router as uptime_router
 from routes.auth_routes.auth_routes import auth_router
 from routes.monitor_routes.monitor_route import router as monitor_router
 from scheduler import TaskScheduler  # 👈 single scheduler
+from services.monitor_service_pkg.async_api_client import async_uptime_api
+from services.monitor_service_pkg.rate_limit import UptimeRobotAPIError, uptime_call_metrics
+from services.monitor_service_pkg.prober import PROBER_ENABLED, prober
+from services.monitor_service_pkg.sharding import PROBER_SHARDING
+from leader_election import LEADER_ELECTION_ENABLED, LeaderElector
+from database.AuthDB import db_pool
+from database import AsyncDB
+from services.auth_mail_pkg.email_service import close_smtp_pools, smtp_pool_stats
+from services.auth_mail_pkg.outbox import outbox
+from services.monitor_service_pkg.alerts import alert_delivery_stats
+from services.monitor_service_pkg.discord_dispatcher import discord_dispatcher
 
 # ----------------- Logging -----------------
 logging.basicConfig(
@@ -14,6 +26,8 @@ logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 )
 logger = logging.getLogger(__name__)
+# httpx logs every request URL at INFO, Discord webhook tokens included
+logging.getLogger("httpx").setLevel(logging.WARNING)
 
 app = FastAPI(
     title="Website Maintenance Agent",
@@ -30,6 +44,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# UptimeRobot still failing after the client's retries / deadline: tell the caller to come back later
+@app.exception_handler(UptimeRobotAPIError)
+async def uptimerobot_unavailable(request: Request, exc: UptimeRobotAPIError):
+    logger.error(f"UptimeRobot API unavailable: {exc}")
+    return JSONResponse(status_code=503, content={"detail": "UptimeRobot API unavailable, try again shortly"})
+
+
 # Include routers
 app.include_router(auth_router, prefix="/api/v1")
 app.include_router(uptime_router, prefix="/api/v1", tags=["uptime"])
@@ -38,17 +59,60 @@ app.include_router(monitor_router, prefix="/api/v1", tags=["monitors"])
 # ----------------- Scheduler reference -----------------
 task_scheduler: TaskScheduler | None = None
 
+# Set your desired interval here (in minutes)
+INTERVAL_MINUTES = 50  # 👈 change this once, not in scheduler.py
+HISTORY_SYNC_MINUTES = 10  # local check store catch-up
+PROBE_ALERT_MINUTES = 1  # without an API key: alert on the prober's latest checks
+ROLLUP_PRUNE_MINUTES = 60  # without an API key: no history sync prunes the rollups
+
+
+async def start_leader_jobs():
+    """Periodic jobs that must run in exactly one process"""
+    global task_scheduler
+    task_scheduler = TaskScheduler()
+    if async_uptime_api.api_key:
+        task_scheduler.start(interval_minutes=INTERVAL_MINUTES)
+        task_scheduler.start_history_sync(interval_minutes=HISTORY_SYNC_MINUTES)
+    else:
+        # UptimeRobot-only jobs would fail every run; the prober's checks drive alerts and rollups instead
+        task_scheduler.start_probe_alerts(interval_minutes=PROBE_ALERT_MINUTES)
+        task_scheduler.start_rollup_prune(interval_minutes=ROLLUP_PRUNE_MINUTES)
+
+    # A sharded prober runs in every worker instead (started below)
+    if PROBER_ENABLED and not PROBER_SHARDING:
+        prober.start()
+
+
+async def stop_leader_jobs():
+    global task_scheduler
+    if task_scheduler:
+        task_scheduler.shutdown()
+        task_scheduler = None
+    if not PROBER_SHARDING:
+        await prober.stop()
+
+
+leader = LeaderElector(on_elected=start_leader_jobs, on_demoted=stop_leader_jobs)
+
 # ----------------- Startup & Shutdown -----------------
 @app.on_event("startup")
 async def startup_event():
-    global task_scheduler
     logger.info("🚀 Starting Website Maintenance Agent")
 
-    # Set your desired interval here (in minutes)
-    INTERVAL_MINUTES = 50  # 👈 change this once, not in scheduler.py
+    await async_uptime_api.startup()
+    await AsyncDB.open_pool()
+    # Every worker sends queued emails; rows are claimed, so none goes out twice
+    outbox.start()
+    discord_dispatcher.start()
 
-    task_scheduler = TaskScheduler()
-    task_scheduler.start(interval_minutes=INTERVAL_MINUTES)
+    # With several workers / nodes only the advisory-lock holder runs the jobs
+    if LEADER_ELECTION_ENABLED:
+        leader.start()
+    else:
+        await start_leader_jobs()
+
+    if PROBER_ENABLED and PROBER_SHARDING:
+        prober.start()
 
     logger.info("✅ Application startup complete")
 
@@ -56,6 +120,18 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("🛑 Shutting down Website Maintenance Agent")
+    if LEADER_ELECTION_ENABLED:
+        await leader.stop()
+    else:
+        await stop_leader_jobs()
+    if PROBER_SHARDING:
+        await prober.stop()
+    await outbox.stop()
+    await discord_dispatcher.stop()
+    await async_uptime_api.aclose()
+    db_pool.close()
+    await AsyncDB.close_pool()
+    close_smtp_pools()
 
 
 # ----------------- Health & Root -----------------
@@ -73,5 +149,21 @@ async def health_check():
         raise HTTPException(status_code=500, detail="System unhealthy")
 
 
+@app.get("/api/v1/metrics")
+async def metrics():
+    return {
+        "uptimerobot_calls": uptime_call_metrics.snapshot(),
+        "monitor_cache": async_uptime_api.monitor_cache.stats(),
+        "prober": prober.stats(),
+        "leader": leader.stats(),
+        "db_pool": db_pool.stats(),
+        "async_db_pool": AsyncDB.pool_stats(),
+        "smtp_pools": smtp_pool_stats(),
+        "email_outbox": outbox.stats(),
+        "alert_digest": dict(alert_delivery_stats),
+        "discord": discord_dispatcher.stats(),
+    }
+
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True, log_level="info")
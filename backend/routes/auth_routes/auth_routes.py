@@ -6,7 +6,7 @@ Clean and reusable API endpoints for user authentication
 from fastapi import APIRouter, HTTPException, status
 from pydantic import BaseModel, EmailStr
 from typing import Optional
-from database.AuthDB import resend_email_otp, signup_user, login_user, verify_email_otp
+from database.AsyncDB import resend_email_otp, signup_user, login_user, verify_email_otp
 import logging
 
 logger = logging.getLogger(__name__)
@@ -54,7 +54,7 @@ async def signup(request: SignupRequest):
             )
         
         # Call database function
-        result = signup_user(request.name.strip(), request.email, request.password)
+        result = await signup_user(request.name.strip(), request.email, request.password)
         
         if not result["success"]:
             raise HTTPException(
@@ -86,7 +86,7 @@ async def login(request: LoginRequest):
     """
     try:
         # Call database function
-        result = login_user(request.email, request.password)
+        result = await login_user(request.email, request.password)
         
         if not result["success"]:
             raise HTTPException(
@@ -125,7 +125,7 @@ async def verify_email(request: VerifyEmailRequest):
             )
         
         # Call database function
-        result = verify_email_otp(request.email, request.otp)
+        result = await verify_email_otp(request.email, request.otp)
         
         if not result["success"]:
             raise HTTPException(
@@ -156,7 +156,7 @@ async def resend_otp(request: VerifyEmailRequest):
     """
     try:
         # Call database function to resend OTP
-        result = resend_email_otp(request.email)
+        result = await resend_email_otp(request.email)
         
         if not result["success"]:
             raise HTTPException(
@@ -0,0 +1,37 @@
+import asyncio
+import logging
+
+from fastapi import APIRouter, HTTPException
+
+from database.MonitorDB import acknowledge_alert, get_alert_states
+from services.monitor_service_pkg.alerts import STATE_UP
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/alerts", tags=["alerts"])
+
+
+@router.get("/monitor/{monitor_id}")
+async def get_monitor_alert_state(monitor_id: int):
+    """Current alert state of a monitor (up when it has never alerted)"""
+    result = await asyncio.to_thread(get_alert_states, [monitor_id])
+    if not result.get("success"):
+        logger.error(f"Error fetching alert state for monitor {monitor_id}: {result.get('message')}")
+        raise HTTPException(status_code=500, detail="Failed to fetch alert state")
+    return result["data"].get(monitor_id) or {"monitorid": monitor_id, "state": STATE_UP}
+
+
+@router.post("/monitor/{monitor_id}/ack")
+async def acknowledge_monitor_alert(monitor_id: int):
+    """Acknowledge a down alert: reminders stop, the recovery notice is still sent"""
+    result = await asyncio.to_thread(acknowledge_alert, monitor_id)
+    if not result.get("success"):
+        if result.get("message", "").startswith("Database error"):
+            logger.error(f"Error acknowledging alert for monitor {monitor_id}: {result['message']}")
+            raise HTTPException(status_code=500, detail="Failed to acknowledge alert")
+        raise HTTPException(status_code=409, detail=result["message"])
+    return result["data"]
+
+
+def register(main_router):
+    main_router.include_router(router)
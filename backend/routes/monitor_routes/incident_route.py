@@ -0,0 +1,56 @@
+import asyncio
+import logging
+import time
+from typing import Optional, Tuple
+
+from fastapi import APIRouter, HTTPException
+
+from database.AsyncDB import get_monitor_by_user
+from services.monitor_service_pkg.incidents import incidents_overlapping
+
+logger = logging.getLogger(__name__)
+
+# Default window when no range is given
+DEFAULT_WINDOW_DAYS = 30
+
+router = APIRouter(prefix="/incidents", tags=["incidents"])
+
+
+def _resolve_window(start: Optional[int], end: Optional[int]) -> Tuple[int, int]:
+    end = int(end if end is not None else time.time())
+    start = int(start if start is not None else end - DEFAULT_WINDOW_DAYS * 86400)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    return start, end
+
+
+@router.get("/monitor/{monitor_id}")
+async def get_monitor_incidents(monitor_id: int, start: Optional[int] = None, end: Optional[int] = None):
+    """Incidents of one monitor overlapping [start, end) (unix seconds, default last 30 days)"""
+    start, end = _resolve_window(start, end)
+    try:
+        incidents = await asyncio.to_thread(incidents_overlapping, [monitor_id], start, end)
+        return {"monitor_id": monitor_id, "start": start, "end": end, "incidents": incidents}
+    except Exception as e:
+        logger.error(f"Error fetching incidents for monitor {monitor_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to fetch incidents")
+
+
+@router.get("/user/{user_id}")
+async def get_user_incidents(user_id: int, start: Optional[int] = None, end: Optional[int] = None):
+    """What was down in [start, end) across all of a user's monitors"""
+    start, end = _resolve_window(start, end)
+    try:
+        user_monitors = (await get_monitor_by_user(user_id)).get("data", [])
+        sitenames = {monitor["monitorid"]: monitor.get("sitename") for monitor in user_monitors}
+        incidents = await asyncio.to_thread(incidents_overlapping, list(sitenames), start, end)
+        for incident in incidents:
+            incident["sitename"] = sitenames.get(incident["monitor_id"])
+        return {"user_id": user_id, "start": start, "end": end, "incidents": incidents}
+    except Exception as e:
+        logger.error(f"Error fetching incidents for user {user_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to fetch incidents")
+
+
+def register(main_router):
+    main_router.include_router(router)
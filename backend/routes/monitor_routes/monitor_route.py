@@ -7,8 +7,11 @@ from fastapi import Depends, HTTPException, APIRouter, Request
 from sqlalchemy.orm import Session
 
 from database.AuthDB import get_db
-from database.MonitorDB import MonitorCreate, _create_new_monitor, _delete_monitor, get_monitor_by_user, _edit_monitor as db_edit_monitor
-from services.monitor_service_pkg.api_client import UptimeRobotAPI, filter_by_user_id
+from database.AsyncDB import _create_new_monitor, _delete_monitor, get_monitor_by_user, _edit_monitor as db_edit_monitor
+from services.monitor_service_pkg.api_client import filter_by_user_id
+from services.monitor_service_pkg.async_api_client import async_uptime_api
+from services.monitor_service_pkg.rate_limit import UptimeRobotAPIError
+from services.monitor_service_pkg.prober import prober
 
 logger = logging.getLogger(__name__)
 
@@ -40,10 +43,12 @@ router = APIRouter(prefix="/monitors", tags=["monitors"])
 async def get_monitor_by_id(request: DeleteRequest, db: Session = Depends(get_db)):
     try:
         user_id = request.user_id
-        all_monitors = UptimeRobotAPI()._get_all_monitors()
-        user_monitors = get_monitor_by_user(user_id).get("data", [])
+        all_monitors = await async_uptime_api._get_all_monitors()
+        user_monitors = (await get_monitor_by_user(user_id)).get("data", [])
         filtered_monitors = filter_by_user_id(all_monitors, user_monitors)
         return {"monitors": filtered_monitors}
+    except UptimeRobotAPIError:
+        raise
     except Exception as e:
         logger.error(f"Error fetching monitor by ID: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch monitor by ID")
@@ -61,17 +66,22 @@ async def create_monitor(request: CreateMonitorRequest, db: Session = Depends(ge
             "interval": request.monitor.interval
         }
 
-        data = UptimeRobotAPI()._create_new_monitor(user_id=request.user_id, monitor=monitor)
+        data = await async_uptime_api._create_new_monitor(user_id=request.user_id, monitor=monitor)
         monitor["monitorid"] = data.get("id", 0)
+        async_uptime_api.invalidate_monitor_cache()
 
         result = {}
         if data.get("success"):
-            result = _create_new_monitor(monitor)
+            result = await _create_new_monitor(monitor)
 
         if result.get("success"):
+            if prober.running:
+                prober.schedule_monitor(result.get("monitor_id"), monitor["site_url"], monitor["interval"])
             return {"message": "Monitor created successfully", "monitor_id": result.get("monitor_id")}
         else:
             raise HTTPException(status_code=400, detail=result.get("message", "Failed to create monitor"))
+    except UptimeRobotAPIError:
+        raise
     except Exception as e:
         logger.error(f"Error creating monitor: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to create monitor: {str(e)}")
@@ -80,12 +90,16 @@ async def create_monitor(request: CreateMonitorRequest, db: Session = Depends(ge
 async def delete_monitor(request: DeleteRequest, db: Session = Depends(get_db)):
     """Delete a monitor"""
     try:
-        result = _delete_monitor(request.monitor_id)
+        result = await _delete_monitor(request.monitor_id)
         if result.get("success"):
-            UptimeRobotAPI()._delete_monitor(request.monitor_id)
+            await async_uptime_api._delete_monitor(request.monitor_id)
+            async_uptime_api.invalidate_monitor_cache()
+            prober.unschedule_monitor(request.monitor_id)
             return {"message": "Monitor deleted successfully"}
         else:
             raise HTTPException(status_code=404, detail="Monitor not found")
+    except UptimeRobotAPIError:
+        raise
     except Exception as e:
         logger.error(f"Error deleting monitor: {e}")
         raise HTTPException(status_code=500, detail="Failed to delete monitor")
@@ -114,7 +128,7 @@ async def edit_monitor(request: EditMonitorRequest, db: Session = Depends(get_db
 
         if request.interval is not None:
             api_update_data["interval"] = request.interval
-            # Do NOT add to db_update_data
+            db_update_data["interval"] = request.interval
 
         if not api_update_data:
             raise HTTPException(status_code=400, detail="No fields provided to update")
@@ -122,8 +136,8 @@ async def edit_monitor(request: EditMonitorRequest, db: Session = Depends(get_db
         logger.info(f"Updating monitor {request.monitor_id} via API with: {api_update_data}")
 
         # Call UptimeRobot API
-        api = UptimeRobotAPI()
-        api_response = api.edit_monitor(request.monitor_id, api_update_data)
+        api_response = await async_uptime_api.edit_monitor(request.monitor_id, api_update_data)
+        async_uptime_api.invalidate_monitor_cache()
 
         if not api_response.get("success", False):
             message = api_response.get("message") or "Failed to update monitor via UptimeRobot"
@@ -133,15 +147,18 @@ async def edit_monitor(request: EditMonitorRequest, db: Session = Depends(get_db
         # Update database only if there are fields for DB
         if db_update_data:
             logger.info(f"Updating monitor {request.monitor_id} in DB with: {db_update_data}")
-            db_response = db_edit_monitor(request.monitor_id, db_update_data)
+            db_response = await db_edit_monitor(request.monitor_id, db_update_data)
             if not db_response.get("success", False):
                 message = db_response.get("message") or "Failed to update monitor in local database"
                 logger.error(f"DB update error: {message}")
                 raise HTTPException(status_code=400, detail=message)
 
+        if prober.running:
+            prober.schedule_monitor(request.monitor_id, request.site_url, request.interval)
+
         return {"message": "Monitor updated successfully"}
 
-    except HTTPException:
+    except (HTTPException, UptimeRobotAPIError):
         raise
     except Exception as e:
         logger.exception(f"Unexpected error editing monitor {request.monitor_id}")
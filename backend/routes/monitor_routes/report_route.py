@@ -6,8 +6,9 @@ from typing import List, Dict, Optional, Any
 from collections import defaultdict
 from jinja2 import Template
 
-from database.AuthDB import get_db_connection
-from services.monitor_service_pkg.api_client import UptimeRobotAPI
+from database.MonitorDB import resolve_monitor_owners
+from services.monitor_service_pkg.async_api_client import async_uptime_api
+from services.monitor_service_pkg.rate_limit import UptimeRobotAPIError
 from services.monitor_service_pkg.performance_service import fetch_lighthouse_score
 from services.monitor_service_pkg.ssl_check import SSL_Check
 from services.linkscan_pkg.scanner import LinkScannerService
@@ -19,7 +20,6 @@ from fastapi import BackgroundTasks
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/report", tags=["report"])
 
-uptime_api = UptimeRobotAPI()
 email_service = EmailService()
 scanner = LinkScannerService()
 ssl_checker = SSL_Check()
@@ -94,6 +94,25 @@ def build_html_report(user_email: str, reports: List[Dict[str, Any]]) -> str:
     return template.render(user_email=user_email, reports=reports)
 
 
+async def send_reports(user_reports: Dict[str, List[Dict[str, Any]]]):
+    """Email each user their report, all over the pooled SMTP sessions"""
+    messages = [
+        {
+            "recipient_email": user_email,
+            "subject": "📊 Your Website Monitoring Report",
+            "html": build_html_report(user_email, reports),
+            "text": "Please view this report in an HTML-compatible client.",
+        }
+        for user_email, reports in user_reports.items()
+    ]
+    results = await asyncio.to_thread(email_service.send_many, messages)
+    for message, sent in zip(messages, results):
+        if sent:
+            logger.info(f"📧 Report sent to {message['recipient_email']}")
+        else:
+            logger.error(f"❌ Failed to send report to {message['recipient_email']}")
+
+
 @router.get("/")
 async def get_full_report(
     urls: Optional[List[str]] = Query(None, description="Specific URLs to scan"),
@@ -101,10 +120,8 @@ async def get_full_report(
 ):
     try:
         # Fetch all monitors with uptime stats
-        all_monitors_summary = uptime_api.get_all_monitor_stats()
+        all_monitors_summary = await async_uptime_api.get_all_monitor_stats()
 
-        connection = get_db_connection()
-        cursor = connection.cursor()
         user_reports: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
 
         monitor_targets = (
@@ -112,6 +129,12 @@ async def get_full_report(
             if not urls
             else [{"id": None, "url": u, "friendlyName": u} for u in urls]
         )
+        owner_result = await asyncio.to_thread(
+            resolve_monitor_owners, [monitor.get("id") for monitor in monitor_targets]
+        )
+        if not owner_result.get("success"):
+            raise RuntimeError(owner_result.get("message"))
+        owners = owner_result["data"]
 
         for monitor in monitor_targets:
             monitor_id = monitor.get("id")
@@ -119,16 +142,7 @@ async def get_full_report(
             site_name = monitor.get("friendlyName", site_url)
 
             # User email
-            user_email = "admin@example.com"
-            if monitor_id:
-                cursor.execute("SELECT userid FROM monitors WHERE monitorid = %s", (monitor_id,))
-                row = cursor.fetchone()
-                if row:
-                    user_id = row[0]
-                    cursor.execute("SELECT email FROM users WHERE id = %s", (user_id,))
-                    user_row = cursor.fetchone()
-                    if user_row:
-                        user_email = user_row[0]
+            user_email = owners[monitor_id][1] if monitor_id in owners else "admin@example.com"
 
             # SSL Info
             ssl_data = ssl_checker.get_ssl_certificate_info(site_url)
@@ -158,24 +172,12 @@ async def get_full_report(
             user_reports[user_email].append(report)
 
         # Send email per user
-        for user_email, reports in user_reports.items():
-            try:
-                html_body = build_html_report(user_email, reports)
-                email_service.send_mail(
-                    recipient_email=user_email,
-                    subject="📊 Your Website Monitoring Report",
-                    html=html_body,
-                    text="Please view this report in an HTML-compatible client."
-                )
-                logger.info(f"📧 Report sent to {user_email}")
-            except Exception as e:
-                logger.error(f"❌ Failed to send report to {user_email}: {e}")
-
-        cursor.close()
-        connection.close()
+        await send_reports(user_reports)
 
         return {"monitors": all_monitors_summary, "user_reports": user_reports}
 
+    except UptimeRobotAPIError:
+        raise
     except Exception as e:
         logger.error(f"Error in report generation: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch detailed report")
@@ -207,16 +209,20 @@ def register(main_router):
 async def get_report(max_pages=15):
   try:
       # Fetch all monitors with uptime stats
-      all_monitors_summary = uptime_api.get_all_monitor_stats()
+      all_monitors_summary = await async_uptime_api.get_all_monitor_stats()
 
-      connection = get_db_connection()
-      cursor = connection.cursor()
       user_reports: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
       urls = []
 
       monitor_targets = (
           all_monitors_summary
       )
+      owner_result = await asyncio.to_thread(
+          resolve_monitor_owners, [monitor.get("id") for monitor in monitor_targets]
+      )
+      if not owner_result.get("success"):
+          raise RuntimeError(owner_result.get("message"))
+      owners = owner_result["data"]
 
       for monitor in monitor_targets:
           print("monitor:", monitor)
@@ -225,16 +231,7 @@ async def get_report(max_pages=15):
           site_name = monitor.get("friendlyName", site_url)
 
           # User email
-          user_email = "admin@example.com"
-          if monitor_id:
-              cursor.execute("SELECT userid FROM monitors WHERE monitorid = %s", (monitor_id,))
-              row = cursor.fetchone()
-              if row:
-                  user_id = row[0]
-                  cursor.execute("SELECT email FROM users WHERE id = %s", (user_id,))
-                  user_row = cursor.fetchone()
-                  if user_row:
-                      user_email = user_row[0]
+          user_email = owners[monitor_id][1] if monitor_id in owners else "admin@example.com"
 
           # SSL Info
           ssl_data = ssl_checker.get_ssl_certificate_info(site_url)
@@ -264,21 +261,7 @@ async def get_report(max_pages=15):
           user_reports[user_email].append(report)
 
       # Send email per user
-      for user_email, reports in user_reports.items():
-          try:
-              html_body = build_html_report(user_email, reports)
-              email_service.send_mail(
-                  recipient_email=user_email,
-                  subject="📊 Your Website Monitoring Report",
-                  html=html_body,
-                  text="Please view this report in an HTML-compatible client."
-              )
-              logger.info(f"📧 Report sent to {user_email}")
-          except Exception as e:
-              logger.error(f"❌ Failed to send report to {user_email}: {e}")
-
-      cursor.close()
-      connection.close()
+      await send_reports(user_reports)
   except Exception as e:
       logger.error(f"Error in report generation: {e}")
       
\ No newline at end of file
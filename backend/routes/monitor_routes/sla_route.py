@@ -0,0 +1,73 @@
+import asyncio
+import logging
+import time
+from typing import Optional, Tuple
+
+from fastapi import APIRouter, HTTPException
+
+from database.AsyncDB import get_monitor_by_user
+from services.monitor_service_pkg.sla import month_window, sla_report
+
+logger = logging.getLogger(__name__)
+
+# Default window when neither a range nor a month is given
+DEFAULT_WINDOW_DAYS = 30
+
+router = APIRouter(prefix="/sla", tags=["sla"])
+
+
+def _resolve_window(start: Optional[int], end: Optional[int], month: Optional[str]) -> Tuple[int, int]:
+    """
+    [start, end) in unix seconds from explicit bounds or a calendar month (YYYY-MM, UTC).
+
+    The end is clamped to now: time that has not elapsed yet is neither uptime
+    nor downtime.
+    """
+    now = int(time.time())
+    if month:
+        try:
+            start, end = month_window(month)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="month must be YYYY-MM")
+    else:
+        end = int(end if end is not None else now)
+        start = int(start if start is not None else end - DEFAULT_WINDOW_DAYS * 86400)
+        if start >= end:
+            raise HTTPException(status_code=400, detail="start must be before end")
+    end = min(end, now)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="window starts in the future")
+    return start, end
+
+
+@router.get("/monitor/{monitor_id}")
+async def get_monitor_sla(monitor_id: int, start: Optional[int] = None, end: Optional[int] = None, month: Optional[str] = None):
+    """Uptime of one monitor over [start, end) or a calendar month"""
+    start, end = _resolve_window(start, end, month)
+    try:
+        report = await asyncio.to_thread(sla_report, [monitor_id], start, end)
+        return report[0]
+    except Exception as e:
+        logger.error(f"Error computing SLA for monitor {monitor_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to compute SLA")
+
+
+@router.get("/user/{user_id}")
+async def get_user_sla(user_id: int, start: Optional[int] = None, end: Optional[int] = None, month: Optional[str] = None):
+    """SLA figures for every monitor of a user over the same window, in one call"""
+    start, end = _resolve_window(start, end, month)
+    try:
+        user_monitors = (await get_monitor_by_user(user_id)).get("data", [])
+        monitor_ids = [monitor["monitorid"] for monitor in user_monitors]
+        report = await asyncio.to_thread(sla_report, monitor_ids, start, end)
+        for monitor, sla in zip(user_monitors, report):
+            sla["sitename"] = monitor.get("sitename")
+            sla["site_url"] = monitor.get("site_url")
+        return {"user_id": user_id, "start": start, "end": end, "monitors": report}
+    except Exception as e:
+        logger.error(f"Error computing SLA report for user {user_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to compute SLA report")
+
+
+def register(main_router):
+    main_router.include_router(router)
@@ -1,24 +1,38 @@
+import asyncio
 import logging
+import time
+from typing import Optional
 
-from fastapi import Depends
+from fastapi import Depends, HTTPException
 from sqlalchemy.orm import Session
 
 from database.AuthDB import get_db
 from services.uptime_service import uptime_service
-from services.monitor_service_pkg.api_client import UptimeRobotAPI
+from services.monitor_service_pkg.async_api_client import async_uptime_api
 from services.monitor_service_pkg.stats_service import get_uptime_stats
+from services.monitor_service_pkg.rollups import window_summary
 logger = logging.getLogger(__name__)
 
 
 def register(router):
     @router.get("/stats")
-    async def get_uptime_stats_endpoint( monitorid : str,db: Session = Depends(get_db)):
+    async def get_uptime_stats_endpoint( monitorid : str, start: Optional[int] = None, end: Optional[int] = None,
+                                         include_checks: bool = True, db: Session = Depends(get_db)):
         print(monitorid)
-        return await get_uptime_stats(monitorid=monitorid)
+        return await get_uptime_stats(monitorid=monitorid, start=start, end=end, include_checks=include_checks)
+
+    @router.get("/stats/rollup")
+    async def get_rollup_stats_endpoint(monitorid: int, start: Optional[int] = None, end: Optional[int] = None):
+        """Uptime / latency summary for any window (unix seconds, default last 24h) from the rollups"""
+        end = int(end if end is not None else time.time())
+        start = int(start if start is not None else end - 86400)
+        if start >= end:
+            raise HTTPException(status_code=400, detail="start must be before end")
+        return await asyncio.to_thread(window_summary, monitorid, start, end)
     
 
     @router.get("/monitors")
     async def get_uptime_monitors_endpoint(db: Session = Depends(get_db)):
-        monitors = UptimeRobotAPI()._get_all_monitors()
+        monitors = await async_uptime_api._get_all_monitors()
         print(monitors)
         return monitors
@@ -4,7 +4,7 @@ from sqlalchemy.orm import Session
 
 from database.AuthDB import get_db, Website
 from database.schemas import WebsiteResponse
-from database.MonitorDB import get_monitor_info
+from database.AsyncDB import get_monitor_info
 from services.uptime_service import uptime_service
 
 logger = logging.getLogger(__name__)
@@ -15,7 +15,7 @@ def register(router):
     async def get_ssl_cert(monitorid : str ):
         """Get SSL certificate info for monitored website"""
         print(monitorid)
-        monitor = get_monitor_info(monitorid).get("data")
+        monitor = (await get_monitor_info(monitorid)).get("data")
         domain = monitor.get("site_url") if monitor else None
         print(domain)
         cert_info = uptime_service.get_ssl_certificate_info(domain=domain+"/")
@@ -28,7 +28,7 @@ def register(router):
     @router.get("/website")
     async def get_website_info(monitorid: str):
         """Get website info for monitored website"""
-        website_info = get_monitor_info(monitorid).get("data")
+        website_info = (await get_monitor_info(monitorid)).get("data")
         print(website_info)
         website_info = {
             "id": website_info.get("monitorid", ""),
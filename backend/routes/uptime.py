@@ -12,6 +12,9 @@ from .monitor_routes.performance_route import register as register_performance
 from .monitor_routes.monitor_route import register as register_monitor
 from .monitor_routes.website_route import register as register_website
 from .monitor_routes.report_route import register as register_report
+from .monitor_routes.sla_route import register as register_sla
+from .monitor_routes.incident_route import register as register_incident
+from .monitor_routes.alert_route import register as register_alert
 
 
 
@@ -24,4 +27,7 @@ register_performance(router)   # ← add this line
 register_monitor(router)
 register_website(router)
 register_report(router)
+register_sla(router)
+register_incident(router)
+register_alert(router)
 
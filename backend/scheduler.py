@@ -1,85 +1,27 @@
-import atexit
 import logging
 from datetime import datetime, timedelta
 
-from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 
-from database.AuthDB import get_db_connection
-from services.monitor_service_pkg.api_client import UptimeRobotAPI
-from services.auth_mail_pkg.email_service import EmailService
+from services.monitor_service_pkg.alerts import check_down_monitors, check_probe_monitors
+from services.monitor_service_pkg.check_store import sync_all_monitors
+from services.monitor_service_pkg.rollups import prune_rollups
 
 # ----------------- Logging -----------------
 logger = logging.getLogger(__name__)
 
-# ----------------- Services -----------------
-uptime_api = UptimeRobotAPI()
-email_service = EmailService()
-
-
-def send_email(to_email, site_name, site_url):
-    """Send email notification that site is down using EmailService."""
-    subject = f"[ALERT] Your site {site_name} is down!"
-    body = f"""
-Hello,
-
-We noticed that your monitored site {site_name} ({site_url}) is currently DOWN.
-Please check your website immediately.
-
-Regards,
-The Watcher Team
-"""
-    try:
-        email_service.send_mail(recipient_email=to_email, subject=subject, text=body)
-        logger.info(f"✅ Email sent to {to_email} for {site_name}")
-    except Exception as e:
-        logger.error(f"❌ Failed to send email to {to_email}: {e}")
-
-
-def check_down_monitors():
-    """Fetch monitors from API, check DB, and notify users if DOWN."""
-    logger.info(f"[{datetime.now()}] Running uptime check...")
-    connection = get_db_connection()
-    cursor = connection.cursor()
-
-    try:
-        all_monitors = uptime_api._get_all_monitors()
-        logger.info(f"Fetched {len(all_monitors)} monitors from UptimeRobot API")
-
-        for monitor in all_monitors:
-            monitor_id = monitor.get("id")
-            status = monitor.get("status")
-            site_url = monitor.get("url")
-            site_name = monitor.get("friendlyName")
-
-            if status.lower() == "down":
-                cursor.execute("SELECT userid FROM monitors WHERE monitorid = %s", (monitor_id,))
-                row = cursor.fetchone()
-                if row:
-                    user_id = row[0]
-                    cursor.execute("SELECT email FROM users WHERE id = %s", (user_id,))
-                    user_row = cursor.fetchone()
-                    if user_row:
-                        email = user_row[0]
-                        logger.info(f"🚨 {site_name} ({site_url}) is DOWN. Notifying {email}")
-                        send_email(email, site_name, site_url)
-
-        logger.info(f"[{datetime.now()}] Completed uptime check")
-    except Exception as e:
-        logger.error(f"Error during uptime check: {e}")
-    finally:
-        cursor.close()
-        connection.close()
-
 
 class TaskScheduler:
-    """Background scheduler for uptime checks."""
+    """Scheduler for uptime checks, running jobs on the application's event loop."""
 
     def __init__(self):
-        self.scheduler = BackgroundScheduler()
+        self.scheduler = AsyncIOScheduler()
         self.scheduler.start()
-        atexit.register(lambda: self.scheduler.shutdown())
-        logger.info("✅ BackgroundScheduler initialized")
+        logger.info("✅ AsyncIOScheduler initialized")
+
+    def shutdown(self):
+        self.scheduler.shutdown(wait=False)
 
     def start(self, interval_minutes: int):
         """Start the scheduler with given interval in minutes."""
@@ -93,6 +35,7 @@ class TaskScheduler:
             next_run = datetime.now() + timedelta(minutes=interval_minutes)
             self.scheduler.add_job(
                 func=check_down_monitors,
+                kwargs={"poll_minutes": interval_minutes},
                 trigger=IntervalTrigger(minutes=interval_minutes),
                 id="uptime_check",
                 name="Check website uptime",
@@ -102,3 +45,49 @@ class TaskScheduler:
             logger.info(f"✅ Scheduler started: first run at {next_run}, repeating every {interval_minutes} minutes")
         except Exception as e:
             logger.error(f"Failed to start scheduler: {e}")
+
+    def start_history_sync(self, interval_minutes: int):
+        """Periodically copy new UptimeRobot logs/response times into the local check store."""
+        try:
+            self.scheduler.add_job(
+                func=sync_all_monitors,
+                trigger=IntervalTrigger(minutes=interval_minutes),
+                id="check_history_sync",
+                name="Sync check history",
+                replace_existing=True,
+                next_run_time=datetime.now()
+            )
+            logger.info(f"✅ Check history sync scheduled every {interval_minutes} minutes")
+        except Exception as e:
+            logger.error(f"Failed to schedule check history sync: {e}")
+
+    def start_probe_alerts(self, interval_minutes: int):
+        """Without an UptimeRobot key: alert on the built-in prober's latest checks."""
+        try:
+            self.scheduler.add_job(
+                func=check_probe_monitors,
+                kwargs={"poll_minutes": interval_minutes},
+                trigger=IntervalTrigger(minutes=interval_minutes),
+                id="probe_alerts",
+                name="Alert on prober checks",
+                replace_existing=True,
+                next_run_time=datetime.now() + timedelta(minutes=interval_minutes)
+            )
+            logger.info(f"✅ Prober alerts scheduled every {interval_minutes} minutes")
+        except Exception as e:
+            logger.error(f"Failed to schedule prober alerts: {e}")
+
+    def start_rollup_prune(self, interval_minutes: int):
+        """Drop minute / hour rollup buckets past their retention when no history sync does it."""
+        try:
+            self.scheduler.add_job(
+                func=prune_rollups,
+                trigger=IntervalTrigger(minutes=interval_minutes),
+                id="rollup_prune",
+                name="Prune check rollups",
+                replace_existing=True,
+                next_run_time=datetime.now()
+            )
+            logger.info(f"✅ Rollup pruning scheduled every {interval_minutes} minutes")
+        except Exception as e:
+            logger.error(f"Failed to schedule rollup pruning: {e}")
@@ -1,13 +1,178 @@
 import smtplib
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from dotenv import load_dotenv
 from pydantic import EmailStr
 
 load_dotenv()
 
+# Authenticated SMTP sessions kept open per process and reused across messages
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", 2))
+SMTP_MAX_MESSAGES_PER_SESSION = int(os.getenv("SMTP_MAX_MESSAGES_PER_SESSION", 100))  # Gmail's per-connection limit
+SMTP_MAX_IDLE_SECONDS = float(os.getenv("SMTP_MAX_IDLE_SECONDS", 60))  # servers drop idle sessions; reconnect instead
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", 30))
+
+# Errors that mean the session is gone rather than the message being refused
+_SESSION_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, TimeoutError)
+
+
+class _Session:
+    def __init__(self, server: smtplib.SMTP):
+        self.server = server
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+
+class SMTPPool:
+    """
+    Up to `size` logged-in SMTP sessions shared by every EmailService in the
+    process. A session is reused for many messages and replaced after
+    `max_messages`, after `max_idle` seconds unused, or when the server drops
+    it; a message that fails on a reused session is retried once on a new one.
+    """
+
+    def __init__(self, host: str, port: int, user: str, password: str, size: int = SMTP_POOL_SIZE,
+                 max_messages: int = SMTP_MAX_MESSAGES_PER_SESSION, max_idle: float = SMTP_MAX_IDLE_SECONDS,
+                 timeout: float = SMTP_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.size = size
+        self.max_messages = max_messages
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._idle: List[_Session] = []
+        self.counters = {"sent": 0, "failed": 0, "connects": 0, "reconnects": 0}
+
+    def _connect(self) -> _Session:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            server.starttls()
+            server.login(self.user, self.password)
+        except Exception:
+            server.close()
+            raise
+        self._count("connects")
+        return _Session(server)
+
+    @staticmethod
+    def _quit(session: _Session):
+        try:
+            session.server.quit()
+        except Exception:
+            session.server.close()
+
+    @contextmanager
+    def session(self):
+        """An idle session (or a new one) for a `with` block; it goes back to the pool unless the connection failed"""
+        self._slots.acquire()
+        try:
+            session = None
+            with self._lock:
+                while self._idle and session is None:
+                    candidate = self._idle.pop()
+                    if time.monotonic() - candidate.last_used > self.max_idle:
+                        self._quit(candidate)
+                    else:
+                        session = candidate
+            if session is None:
+                session = self._connect()
+            try:
+                yield session
+            except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused):
+                # The server refused the message; the session itself is fine
+                self._release(session)
+                raise
+            except Exception:
+                self._quit(session)
+                raise
+            session.sent += 1
+            self._release(session)
+        finally:
+            self._slots.release()
+
+    def _release(self, session: _Session):
+        session.last_used = time.monotonic()
+        if session.sent >= self.max_messages:
+            self._quit(session)
+        else:
+            with self._lock:
+                self._idle.append(session)
+
+    def send(self, sender: str, recipient: str, message: str):
+        """Send one message; raises if it could not be delivered"""
+        for attempt in (1, 2):
+            reused = False
+            try:
+                with self.session() as session:
+                    reused = session.sent > 0
+                    session.server.sendmail(sender, recipient, message)
+                break
+            except _SESSION_ERRORS:
+                if attempt == 2 or not reused:
+                    self._count("failed")
+                    raise
+                # The server closed a pooled session while it sat idle, likely the other idle ones too:
+                # once more on a fresh one
+                self._count("reconnects")
+                self.close()
+            except Exception:
+                self._count("failed")
+                raise
+        self._count("sent")
+
+    def _count(self, counter: str):
+        with self._lock:
+            self.counters[counter] += 1
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for session in idle:
+            self._quit(session)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"size": self.size, "idle": len(self._idle), **self.counters}
+
+
+OTP_SUBJECT = "Your The Watcher OTP Code"
+
+
+_pools: Dict[Tuple[str, int, str], SMTPPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_smtp_pool(host: str, port: int, user: str, password: str) -> SMTPPool:
+    """The process-wide pool for one SMTP account"""
+    with _pools_lock:
+        pool = _pools.get((host, port, user))
+        if pool is None:
+            pool = _pools[(host, port, user)] = SMTPPool(host, port, user, password)
+        return pool
+
+
+def smtp_pool_stats() -> List[Dict[str, Any]]:
+    with _pools_lock:
+        pools = list(_pools.values())
+    return [{"server": f"{pool.host}:{pool.port}", **pool.stats()} for pool in pools]
+
+
+def close_smtp_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close()
+
 
 class EmailService:
     def __init__(self):
@@ -25,6 +190,39 @@ class EmailService:
             f"✅ Email service initialized with: {self.email[:3]}***@{self.email.split('@')[1]}"
         )
 
+    @property
+    def pool(self) -> SMTPPool:
+        return get_smtp_pool(self.smtp_server, self.smtp_port, self.email, self.password)
+
+    def build_message(
+        self,
+        recipient_email: str,
+        subject: str,
+        text: Optional[str] = None,
+        html: Optional[str] = None,
+    ) -> MIMEMultipart:
+        msg = MIMEMultipart("alternative")
+        msg["From"] = f"The Watcher <{self.email}>"
+        msg["To"] = recipient_email
+        msg["Subject"] = subject
+
+        if text:
+            msg.attach(MIMEText(text, "plain"))
+        if html:
+            msg.attach(MIMEText(html, "html"))
+        return msg
+
+    def deliver(
+        self,
+        recipient_email: str,
+        subject: str,
+        text: Optional[str] = None,
+        html: Optional[str] = None,
+    ):
+        """Send one email over a pooled session; raises the SMTP error if it was not accepted"""
+        msg = self.build_message(recipient_email, subject, text=text, html=html)
+        self.pool.send(self.email, recipient_email, msg.as_string())
+
     def send_mail(
         self,
         recipient_email: str,
@@ -36,21 +234,7 @@ class EmailService:
         Send an email with optional text + HTML versions.
         """
         try:
-            msg = MIMEMultipart("alternative")
-            msg["From"] = f"The Watcher <{self.email}>"
-            msg["To"] = recipient_email
-            msg["Subject"] = subject
-
-            if text:
-                msg.attach(MIMEText(text, "plain"))
-            if html:
-                msg.attach(MIMEText(html, "html"))
-
-            server = smtplib.SMTP(self.smtp_server, self.smtp_port)
-            server.starttls()
-            server.login(self.email, self.password)
-            server.sendmail(self.email, recipient_email, msg.as_string())
-            server.quit()
+            self.deliver(recipient_email, subject, text=text, html=html)
 
             print(f"📧 Email sent successfully to {recipient_email}")
             return True
@@ -61,15 +245,27 @@ class EmailService:
         except Exception as e:
             print(f"❌ Error sending email: {e}")
             return False
-        
+
+    def send_many(self, messages: Iterable[Dict[str, Any]]) -> List[bool]:
+        """
+        Send several emails over the pooled sessions; each message is a dict of
+        send_mail's arguments. Returns whether each one was sent, in order.
+        """
+        messages = list(messages)
+        if not messages:
+            return []
+        workers = min(self.pool.size, len(messages))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="smtp") as executor:
+            return list(executor.map(lambda message: self.send_mail(**message), messages))
+
     def send_otp_email(self, recipient_email: str, otp: str, expire: int) -> bool:
         """Send an OTP email."""
-        subject = "Your The Watcher OTP Code"
         html_content = self.get_otp_template(otp, expire)
-        return self.send_mail(recipient_email, subject, html=html_content)
+        return self.send_mail(recipient_email, OTP_SUBJECT, html=html_content)
     
 
-    def get_otp_template(self, otp: str, expire: int) -> str:
+    @staticmethod
+    def get_otp_template(otp: str, expire: int) -> str:
         """Return an HTML OTP template."""
         return f"""
         <html>
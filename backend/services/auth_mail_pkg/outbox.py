@@ -0,0 +1,326 @@
+"""
+Durable email outbox.
+
+Callers (signup, OTP resend, alerts) write the email to the `email_outbox`
+table with enqueue_email and return straight away; a background worker in
+every process claims due rows and sends them over the pooled SMTP sessions.
+
+- Idempotency: each row has a unique key, so enqueueing the same logical
+  email twice (a retried request, an alert run repeated after a crash) is a
+  no-op. Keys are kept for OUTBOX_RETENTION_DAYS.
+- Retries: a failed send is retried with exponential backoff (with jitter)
+  up to OUTBOX_MAX_ATTEMPTS; permanent SMTP refusals (5xx) fail at once.
+- Durability: rows survive restarts. A row claimed by a worker that died
+  mid-send is picked up again after OUTBOX_CLAIM_TIMEOUT_SECONDS.
+
+Claims are a conditional UPDATE per batch, so several workers or processes
+can share the table without sending a row twice.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import smtplib
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Deque, Dict, List, Optional
+
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from database.AuthDB import EmailOutboxMessage, SessionLocal
+from .email_service import OTP_SUBJECT, SMTP_POOL_SIZE, EmailService
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_WORKERS = int(os.getenv("OUTBOX_WORKERS", SMTP_POOL_SIZE))
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", 50))
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", 5))  # new rows also wake the worker straight away
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 8))
+OUTBOX_BACKOFF_SECONDS = float(os.getenv("OUTBOX_BACKOFF_SECONDS", 10))  # doubled after every failed attempt
+OUTBOX_MAX_BACKOFF_SECONDS = float(os.getenv("OUTBOX_MAX_BACKOFF_SECONDS", 3600))
+OUTBOX_CLAIM_TIMEOUT_SECONDS = float(os.getenv("OUTBOX_CLAIM_TIMEOUT_SECONDS", 300))
+OUTBOX_RETENTION_DAYS = int(os.getenv("OUTBOX_RETENTION_DAYS", 7))
+
+STATUS_PENDING = "pending"
+STATUS_SENDING = "sending"
+STATUS_SENT = "sent"
+STATUS_FAILED = "failed"
+
+PURGE_EVERY_SECONDS = 3600
+
+
+def backoff_seconds(attempts: int) -> float:
+    """Delay before the next try after `attempts` failed ones"""
+    delay = min(OUTBOX_MAX_BACKOFF_SECONDS, OUTBOX_BACKOFF_SECONDS * 2 ** (attempts - 1))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def is_permanent(error: Exception) -> bool:
+    """A 5xx reply to the message itself won't change on retry (auth failures are config, so they are retried)"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(500 <= code < 600 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        return False
+    return isinstance(error, smtplib.SMTPResponseException) and 500 <= error.smtp_code < 600
+
+
+def enqueue_email(
+    recipient_email: str,
+    subject: str,
+    text: Optional[str] = None,
+    html: Optional[str] = None,
+    idempotency_key: Optional[str] = None,
+) -> bool:
+    """
+    Queue an email for the outbox worker. Returns False if a message with the
+    same idempotency key was already queued, or if the row could not be written.
+    """
+    db = SessionLocal()
+    try:
+        db.add(EmailOutboxMessage(
+            idempotency_key=idempotency_key or uuid.uuid4().hex,
+            recipient=recipient_email,
+            subject=subject,
+            text=text,
+            html=html,
+            status=STATUS_PENDING,
+            next_attempt_at=datetime.utcnow(),
+        ))
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        outbox.counters["deduplicated"] += 1
+        return False
+    except SQLAlchemyError as e:
+        db.rollback()
+        logger.error(f"❌ Could not queue email to {recipient_email}: {e}")
+        return False
+    finally:
+        db.close()
+    outbox.counters["enqueued"] += 1
+    outbox.notify()
+    return True
+
+
+def enqueue_otp_email(recipient_email: str, otp: str, expire: Any) -> bool:
+    """Queue the OTP email; one per (recipient, OTP) however often it is enqueued"""
+    return enqueue_email(
+        recipient_email,
+        OTP_SUBJECT,
+        html=EmailService.get_otp_template(otp, expire),
+        idempotency_key=f"otp:{recipient_email}:{otp}",
+    )
+
+
+def claim_due(token: str, limit: int, now: datetime, claim_timeout: float) -> List[Dict[str, Any]]:
+    """Mark up to `limit` due rows as sending under the claim `token` and return them"""
+    due = or_(
+        and_(EmailOutboxMessage.status == STATUS_PENDING, EmailOutboxMessage.next_attempt_at <= now),
+        # Claimed by a worker that died mid-send
+        and_(EmailOutboxMessage.status == STATUS_SENDING,
+             EmailOutboxMessage.claimed_at < now - timedelta(seconds=claim_timeout)),
+    )
+    db = SessionLocal()
+    try:
+        ids = db.execute(
+            select(EmailOutboxMessage.id).where(due).order_by(EmailOutboxMessage.next_attempt_at).limit(limit)
+        ).scalars().all()
+        if not ids:
+            return []
+        # Re-checks `due` so a row another worker claimed in the meantime is skipped
+        db.execute(
+            update(EmailOutboxMessage)
+            .where(EmailOutboxMessage.id.in_(ids), due)
+            .values(status=STATUS_SENDING, claimed_by=token, claimed_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        rows = db.execute(
+            select(EmailOutboxMessage).where(EmailOutboxMessage.id.in_(ids), EmailOutboxMessage.claimed_by == token)
+        ).scalars().all()
+        return [
+            {"id": row.id, "claim": token, "recipient": row.recipient, "subject": row.subject, "text": row.text,
+             "html": row.html, "attempts": row.attempts, "created_at": row.created_at}
+            for row in rows
+        ]
+    finally:
+        db.close()
+
+
+def finish(message_id: int, token: str, values: Dict[str, Any]):
+    """Record a send outcome on a row still held under the claim `token`"""
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(EmailOutboxMessage)
+            .where(EmailOutboxMessage.id == message_id, EmailOutboxMessage.claimed_by == token,
+                   EmailOutboxMessage.status == STATUS_SENDING)
+            .values(claimed_by=None, claimed_at=None, **values)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def queue_depth() -> Dict[str, int]:
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            select(EmailOutboxMessage.status, func.count()).group_by(EmailOutboxMessage.status)
+        ).all()
+        return {status: count for status, count in rows}
+    finally:
+        db.close()
+
+
+def purge_finished(older_than: datetime) -> int:
+    """Drop sent / failed rows (and with them their idempotency keys) older than the retention window"""
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            delete(EmailOutboxMessage).where(
+                EmailOutboxMessage.status.in_((STATUS_SENT, STATUS_FAILED)),
+                EmailOutboxMessage.created_at < older_than,
+            )
+        )
+        db.commit()
+        return result.rowcount
+    finally:
+        db.close()
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+class EmailOutbox:
+    """Background worker: claims due outbox rows in batches and sends them on a small thread pool"""
+
+    def __init__(self, workers: int = OUTBOX_WORKERS, batch_size: int = OUTBOX_BATCH_SIZE,
+                 poll_seconds: float = OUTBOX_POLL_SECONDS, max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+                 claim_timeout: float = OUTBOX_CLAIM_TIMEOUT_SECONDS):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts
+        self.claim_timeout = claim_timeout
+        self.service: Optional[EmailService] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Seconds from enqueue to accepted by the SMTP server
+        self._latencies: Deque[float] = deque(maxlen=2000)
+        self.depth: Dict[str, int] = {}
+        self.counters = {"enqueued": 0, "deduplicated": 0, "sent": 0, "retried": 0, "failed": 0, "errors": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def notify(self):
+        """Wake the worker for a new row; callable from any thread"""
+        if self._loop is not None and self._wake is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._wake.set)
+            except RuntimeError:  # loop already closed
+                pass
+
+    def _send(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """Send one claimed row; returns the column values recording the outcome"""
+        attempts = message["attempts"] + 1
+        try:
+            self.service.deliver(message["recipient"], message["subject"], text=message["text"], html=message["html"])
+        except Exception as e:
+            if is_permanent(e) or attempts >= self.max_attempts:
+                self.counters["failed"] += 1
+                logger.error(f"❌ Giving up on email to {message['recipient']} after {attempts} attempts: {e}")
+                return {"status": STATUS_FAILED, "attempts": attempts, "last_error": str(e)[:1000]}
+            self.counters["retried"] += 1
+            delay = backoff_seconds(attempts)
+            logger.warning(f"Email to {message['recipient']} failed ({e}), retrying in {delay:.1f}s")
+            return {"status": STATUS_PENDING, "attempts": attempts, "last_error": str(e)[:1000],
+                    "next_attempt_at": datetime.utcnow() + timedelta(seconds=delay)}
+        now = datetime.utcnow()
+        self.counters["sent"] += 1
+        self._latencies.append((now - message["created_at"]).total_seconds())
+        return {"status": STATUS_SENT, "attempts": attempts, "sent_at": now, "last_error": None}
+
+    def _process(self, message: Dict[str, Any]):
+        finish(message["id"], message["claim"], self._send(message))
+
+    async def run_once(self) -> int:
+        """Claim and send one batch; returns how many rows were claimed"""
+        loop = asyncio.get_running_loop()
+        claimed = await loop.run_in_executor(
+            self._executor, claim_due, uuid.uuid4().hex, self.batch_size, datetime.utcnow(), self.claim_timeout
+        )
+        if claimed:
+            await asyncio.gather(*(loop.run_in_executor(self._executor, self._process, message) for message in claimed))
+        return len(claimed)
+
+    async def _run(self):
+        last_purge = last_depth = float("-inf")
+        while True:
+            self._wake.clear()
+            try:
+                if self.service is None:
+                    self.service = EmailService()
+                now = time.monotonic()
+                if now - last_depth >= self.poll_seconds:
+                    self.depth = await asyncio.to_thread(queue_depth)
+                    last_depth = now
+                if now - last_purge >= PURGE_EVERY_SECONDS:
+                    await asyncio.to_thread(purge_finished, datetime.utcnow() - timedelta(days=OUTBOX_RETENTION_DAYS))
+                    last_purge = now
+                if await self.run_once():
+                    continue  # more may be due already
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.counters["errors"] += 1
+                logger.error(f"Email outbox worker error: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._wake = asyncio.Event()
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="outbox")
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"✅ Email outbox worker started ({self.workers} senders)")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            # Rows being sent right now finish in the background; unfinished claims are retaken after the timeout
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            self._loop = self._wake = None
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = sorted(self._latencies)
+        return {
+            **self.counters,
+            "queue_depth": self.depth.get(STATUS_PENDING, 0) + self.depth.get(STATUS_SENDING, 0),
+            "by_status": self.depth,
+            "send_latency_ms_p50": round(_percentile(latencies, 0.5) * 1000, 1),
+            "send_latency_ms_p99": round(_percentile(latencies, 0.99) * 1000, 1),
+        }
+
+
+outbox = EmailOutbox()
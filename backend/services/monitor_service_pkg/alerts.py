@@ -0,0 +1,340 @@
+"""
+Down / recovery alerts driven by a persisted per-monitor alert state.
+
+Each run compares the monitors' current status with the stored state and
+notifies only on a change:
+
+    up / recovered --down--> down          "site is down"
+    down ----------down----> down          reminder every ALERT_REMINDER_MINUTES (to the nearest run)
+    acknowledged --down----> acknowledged  (silenced via the ack endpoint)
+    down / ack ----up------> recovered     "site is back up" with the outage length
+    recovered -----up------> up
+
+A run reads every state in one query and upserts the ones that changed in
+one statement; monitors that stay up cost nothing. Paused or unknown
+statuses leave the state alone. Without an UptimeRobot API key the statuses
+come from each monitor's latest built-in prober check instead.
+
+Each run's notifications are then grouped per recipient: everything one
+user is alerted about in a run goes out as a single email and a single
+Discord embed, so a provider outage that takes 30 of a customer's
+monitors down costs one message per channel instead of 30.
+Embeds are posted by discord_dispatcher, which packs several users'
+digests into one webhook message.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+
+from database.MonitorDB import get_active_monitors, get_alert_states, resolve_monitor_owners, save_alert_states
+from services.auth_mail_pkg.outbox import enqueue_email
+from .async_api_client import async_uptime_api
+from .check_store import latest_probe_statuses
+from .discord_dispatcher import COLOR_GREEN, COLOR_ORANGE, COLOR_RED, discord_dispatcher, make_embed
+
+logger = logging.getLogger(__name__)
+
+# Repeat the down alert this often while a monitor stays down and unacknowledged (0 = never)
+ALERT_REMINDER_MINUTES = int(os.getenv("ALERT_REMINDER_MINUTES", 60))
+DISCORD_MESSAGE_LIMIT = 2000
+# Without an API key, a monitor whose latest prober check is older than this has no current status
+PROBE_STATUS_MAX_AGE = 3600
+
+STATE_UP = "up"
+STATE_DOWN = "down"
+STATE_ACKNOWLEDGED = "acknowledged"
+STATE_RECOVERED = "recovered"
+
+NOTIFY_DOWN = "down"
+NOTIFY_REMINDER = "reminder"
+NOTIFY_RECOVERED = "recovered"
+
+Notification = Tuple[str, Dict[str, Any], Dict[str, Any]]  # (kind, monitor, new state)
+DigestItem = Tuple[str, Dict[str, Any], Dict[str, Any], datetime]  # (kind, monitor, new state, run time)
+
+
+def next_alert_state(
+    monitor_id: int,
+    previous: Optional[Dict[str, Any]],
+    is_down: bool,
+    now: datetime,
+    reminder_interval: Optional[timedelta],
+) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """(new state row or None if unchanged, notification kind or None)"""
+    state = previous["state"] if previous else STATE_UP
+    if is_down:
+        if state in (STATE_UP, STATE_RECOVERED):
+            return {"monitorid": monitor_id, "state": STATE_DOWN, "down_since": now, "last_notified_at": now,
+                    "reminders_sent": 0, "acknowledged_at": None}, NOTIFY_DOWN
+        if state == STATE_DOWN and reminder_interval and now - previous["last_notified_at"] >= reminder_interval:
+            return {**previous, "last_notified_at": now,
+                    "reminders_sent": previous["reminders_sent"] + 1}, NOTIFY_REMINDER
+        return None, None
+    if state in (STATE_DOWN, STATE_ACKNOWLEDGED):
+        return {**previous, "state": STATE_RECOVERED, "last_notified_at": now}, NOTIFY_RECOVERED
+    if state == STATE_RECOVERED:
+        return {**previous, "state": STATE_UP, "down_since": None, "reminders_sent": 0,
+                "acknowledged_at": None}, None
+    return None, None
+
+
+def evaluate_alerts(
+    states: Dict[int, Dict[str, Any]],
+    monitors: Iterable[Dict[str, Any]],
+    now: datetime,
+    reminder_interval: Optional[timedelta],
+) -> Tuple[List[Dict[str, Any]], List[Notification]]:
+    """Apply one run's statuses to `states` (in place); returns the changed rows and the notifications to send"""
+    changed, notifications = [], []
+    for monitor in monitors:
+        status = (monitor.get("status") or "").lower()
+        if status not in ("up", "down") or monitor.get("id") is None:
+            continue
+        monitor_id = monitor["id"]
+        new_state, kind = next_alert_state(monitor_id, states.get(monitor_id), status == "down", now, reminder_interval)
+        if new_state is None:
+            continue
+        states[monitor_id] = new_state
+        changed.append(new_state)
+        if kind:
+            notifications.append((kind, monitor, new_state))
+    return changed, notifications
+
+
+def _duration(delta: timedelta) -> str:
+    minutes = int(delta.total_seconds() // 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes}m" if hours else f"{minutes}m"
+
+
+def format_notification(kind: str, monitor: Dict[str, Any], state: Dict[str, Any], now: datetime) -> Tuple[str, str, str]:
+    """(email subject, email body, Discord message)"""
+    site_name, site_url = monitor.get("friendlyName"), monitor.get("url")
+    down_for = _duration(now - state["down_since"]) if state.get("down_since") else "unknown"
+    if kind == NOTIFY_RECOVERED:
+        subject = f"[RECOVERED] Your site {site_name} is back up"
+        line = f"your monitored site {site_name} ({site_url}) is back UP after {down_for} of downtime."
+        discord = f"✅ RECOVERED: {site_name} ({site_url}) is back UP after {down_for}"
+    elif kind == NOTIFY_REMINDER:
+        subject = f"[ALERT] Your site {site_name} is still down"
+        line = f"your monitored site {site_name} ({site_url}) has been DOWN for {down_for}.\nPlease check your website immediately."
+        discord = f"🚨 STILL DOWN: {site_name} ({site_url}) has been DOWN for {down_for}"
+    else:
+        subject = f"[ALERT] Your site {site_name} is down!"
+        line = f"your monitored site {site_name} ({site_url}) is currently DOWN.\nPlease check your website immediately."
+        discord = f"🚨 ALERT: {site_name} ({site_url}) is DOWN!"
+    body = f"""
+Hello,
+
+We noticed that {line}
+
+Regards,
+The Watcher Team
+"""
+    return subject, body, discord
+
+
+def format_digest(items: List[DigestItem]) -> Tuple[str, str, str]:
+    """(email subject, email body, Discord message) for all of one recipient's alerts from one run"""
+    if len(items) == 1:
+        kind, monitor, state, at = items[0]
+        return format_notification(kind, monitor, state, at)
+
+    sections = {NOTIFY_DOWN: [], NOTIFY_REMINDER: [], NOTIFY_RECOVERED: []}
+    for kind, monitor, state, at in items:
+        site_name, site_url = monitor.get("friendlyName"), monitor.get("url")
+        down_for = _duration(at - state["down_since"]) if state.get("down_since") else "unknown"
+        if kind == NOTIFY_RECOVERED:
+            sections[kind].append(f"{site_name} ({site_url}), back up after {down_for}")
+        elif kind == NOTIFY_REMINDER:
+            sections[kind].append(f"{site_name} ({site_url}), down for {down_for}")
+        else:
+            sections[kind].append(f"{site_name} ({site_url})")
+
+    counts = [f"{len(sections[NOTIFY_DOWN])} down", f"{len(sections[NOTIFY_REMINDER])} still down",
+              f"{len(sections[NOTIFY_RECOVERED])} recovered"]
+    summary = ", ".join(count for count in counts if not count.startswith("0 "))
+    if sections[NOTIFY_DOWN] or sections[NOTIFY_REMINDER]:
+        subject = f"[ALERT] {len(items)} of your sites changed status: {summary}"
+    else:
+        subject = f"[RECOVERED] {len(items)} of your sites are back up"
+
+    titles = {NOTIFY_DOWN: "DOWN", NOTIFY_REMINDER: "STILL DOWN", NOTIFY_RECOVERED: "RECOVERED"}
+    blocks = [f"{titles[kind]}:\n" + "\n".join(f"  - {line}" for line in lines)
+              for kind, lines in sections.items() if lines]
+    body = f"""
+Hello,
+
+We noticed status changes on {len(items)} of your monitored sites ({summary}):
+
+{chr(10).join(blocks)}
+
+Please check the sites that are down.
+
+Regards,
+The Watcher Team
+"""
+    icons = {NOTIFY_DOWN: "🚨 DOWN", NOTIFY_REMINDER: "🚨 STILL DOWN", NOTIFY_RECOVERED: "✅ RECOVERED"}
+    discord = f"🚨 {len(items)} sites changed status: {summary}"
+    total, included = len(items), 0
+    for kind, lines in sections.items():
+        for line in lines:
+            entry = f"\n{icons[kind]}: {line}"
+            if len(discord) + len(entry) > DISCORD_MESSAGE_LIMIT - 40:
+                return subject, body, discord + f"\n…and {total - included} more"
+            discord += entry
+            included += 1
+    return subject, body, discord
+
+
+def _item_key(item: DigestItem) -> str:
+    kind, monitor, state, _ = item
+    return f"{monitor.get('id')}:{kind}:{state['last_notified_at'].isoformat()}"
+
+
+def digest_embed(items: List[DigestItem], subject: str, discord: str) -> Dict[str, Any]:
+    """Discord embed for a digest: red while anything is down, green if everything recovered"""
+    kinds = {kind for kind, _, _, _ in items}
+    if kinds == {NOTIFY_RECOVERED}:
+        color = COLOR_GREEN
+    elif NOTIFY_DOWN in kinds:
+        color = COLOR_RED
+    else:
+        color = COLOR_ORANGE
+    return make_embed(subject, discord, color=color, timestamp=max(item[3] for item in items))
+
+
+def deliver_digest(email: str, items: List[DigestItem]):
+    """Queue one email and one Discord embed covering all of a recipient's alerts"""
+    subject, body, discord = format_digest(items)
+    logger.info(f"🚨 {len(items)} alert(s) for {email}: {subject}")
+    # Keyed on the transitions it covers, so the same digest is never queued twice
+    keys = sorted(_item_key(item) for item in items)
+    enqueue_email(email, subject, text=body,
+                  idempotency_key="alert:" + hashlib.sha256("|".join(keys).encode()).hexdigest())
+    # Queued only; the dispatcher batches it with other users' digests and paces the webhook
+    discord_dispatcher.submit(digest_embed(items, subject, discord))
+
+
+# Alerts and digests delivered since startup (reported by /metrics)
+alert_delivery_stats = {"alerts": 0, "digests": 0, "failures": 0}
+
+
+async def deliver_digests(by_recipient: Dict[str, List[DigestItem]], deliver: Callable = deliver_digest):
+    """Deliver one run's alerts as one digest per recipient, recipients in parallel"""
+
+    async def deliver_one(email: str, items: List[DigestItem]):
+        alert_delivery_stats["alerts"] += len(items)
+        alert_delivery_stats["digests"] += 1
+        try:
+            await asyncio.to_thread(deliver, email, items)
+        except Exception as e:
+            alert_delivery_stats["failures"] += 1
+            logger.error(f"❌ Failed to deliver alerts to {email}: {e}")
+
+    await asyncio.gather(*(deliver_one(email, items) for email, items in by_recipient.items()))
+
+
+async def deliver_notifications(notifications: List[Notification], now: datetime):
+    """Group a run's notifications by monitor owner and deliver one digest each"""
+    result = await asyncio.to_thread(resolve_monitor_owners, [monitor.get("id") for _, monitor, _ in notifications])
+    if not result.get("success"):
+        logger.error(f"❌ Could not resolve monitor owners: {result.get('message')}")
+        return
+    owners = result["data"]
+    by_recipient: Dict[str, List[DigestItem]] = {}
+    for kind, monitor, state in notifications:
+        owner = owners.get(monitor.get("id"))
+        if owner:
+            by_recipient.setdefault(owner[1], []).append((kind, monitor, state, now))
+    await deliver_digests(by_recipient, deliver_digest)
+
+
+def reminder_interval_for(poll_minutes: float) -> Optional[timedelta]:
+    """
+    Time since the last notification after which a run sends a reminder.
+
+    Runs only happen every `poll_minutes`, so a reminder due at exactly
+    ALERT_REMINDER_MINUTES would wait for the first run after it (60 with
+    50-minute polls fires at 100). Half a poll of slack sends it on the run
+    nearest to ALERT_REMINDER_MINUTES instead, and on every run when polls are
+    more than twice as far apart.
+    """
+    if ALERT_REMINDER_MINUTES <= 0:
+        return None
+    return timedelta(minutes=max(ALERT_REMINDER_MINUTES - poll_minutes / 2, poll_minutes / 2))
+
+
+# Scheduled runs and /alert share one process-wide lock: two overlapping runs
+# would both read state 'up' and both send the same "down" notification
+_alert_run_lock = asyncio.Lock()
+
+
+async def _alert_run(source: str, pages: AsyncIterator[List[Dict[str, Any]]], poll_minutes: float):
+    """One alert run over monitor pages shaped like UptimeRobot's (id, status, friendlyName, url)"""
+    async with _alert_run_lock:
+        await _alert_run_locked(source, pages, poll_minutes)
+
+
+async def _alert_run_locked(source: str, pages: AsyncIterator[List[Dict[str, Any]]], poll_minutes: float):
+    logger.info(f"[{datetime.now()}] Running uptime check...")
+    now = datetime.now()
+    reminder_interval = reminder_interval_for(poll_minutes)
+
+    result = await asyncio.to_thread(get_alert_states)
+    if not result.get("success"):
+        # Without the stored states every down monitor would be re-alerted
+        logger.error(f"Skipping uptime check, could not load alert states: {result.get('message')}")
+        return
+    states = result["data"]
+
+    try:
+        fetched = 0
+        changed: List[Dict[str, Any]] = []
+        notifications: List[Notification] = []
+        async for page in pages:
+            fetched += len(page)
+            page_changed, page_notifications = evaluate_alerts(states, page, now, reminder_interval)
+            changed.extend(page_changed)
+            notifications.extend(page_notifications)
+        logger.info(f"Checked {fetched} monitors from {source}: "
+                    f"{len(notifications)} notifications, {len(changed)} state changes")
+
+        if notifications:
+            await deliver_notifications(notifications, now)
+        saved = await asyncio.to_thread(save_alert_states, changed)
+        if not saved.get("success"):
+            logger.error(f"Failed to save alert states: {saved.get('message')}")
+
+        logger.info(f"[{datetime.now()}] Completed uptime check")
+    except Exception as e:
+        logger.error(f"Error during uptime check: {e}")
+
+
+async def check_down_monitors(poll_minutes: float = 0):
+    """Stream monitors from API page by page and notify owners on down / reminder / recovery transitions."""
+    # The next page is already downloading while this one is processed
+    await _alert_run("UptimeRobot API", async_uptime_api.iter_monitor_pages(), poll_minutes)
+
+
+async def _probe_monitor_pages() -> AsyncIterator[List[Dict[str, Any]]]:
+    """The active monitors with the status of their latest built-in prober check, as one page"""
+    result = await asyncio.to_thread(get_active_monitors)
+    if not result.get("success"):
+        raise RuntimeError(f"could not load monitors: {result.get('message')}")
+    statuses = await asyncio.to_thread(latest_probe_statuses, int(time.time()) - PROBE_STATUS_MAX_AGE)
+    yield [
+        {"id": monitor["monitorid"], "status": "up" if statuses[monitor["monitorid"]] else "down",
+         "friendlyName": monitor["sitename"], "url": monitor["site_url"]}
+        for monitor in result["data"] if monitor["monitorid"] in statuses
+    ]
+
+
+async def check_probe_monitors(poll_minutes: float = 0):
+    """Scheduled job without an UptimeRobot key: the same transitions, from the built-in prober's checks"""
+    await _alert_run("built-in prober", _probe_monitor_pages(), poll_minutes)
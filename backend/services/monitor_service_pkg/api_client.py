@@ -1,10 +1,21 @@
 import requests
+from requests.adapters import HTTPAdapter
 import time
+from bisect import bisect_left, bisect_right
 import os
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterable, Iterator, List, NamedTuple, Optional, Sequence
 import logging
 from database.schemas import UptimeCheckResponse
+from .rate_limit import (
+    RETRYABLE_STATUS_CODES,
+    UPTIMEROBOT_CALL_DEADLINE,
+    UptimeRobotAPIError,
+    parse_retry_after,
+    uptime_call_metrics,
+    uptime_rate_limiter,
+    uptime_retry_policy,
+)
 
 from sqlalchemy import false
 
@@ -18,10 +29,37 @@ except ImportError:
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Connection pool / timeout settings shared by every UptimeRobotAPI instance
+UPTIMEROBOT_POOL_SIZE = int(os.getenv("UPTIMEROBOT_POOL_SIZE", 10))
+UPTIMEROBOT_CONNECT_TIMEOUT = float(os.getenv("UPTIMEROBOT_CONNECT_TIMEOUT", 5))
+UPTIMEROBOT_READ_TIMEOUT = float(os.getenv("UPTIMEROBOT_READ_TIMEOUT", 30))
+
+_shared_session: Optional[requests.Session] = None
+
+
+def _build_session(pool_size: int = UPTIMEROBOT_POOL_SIZE) -> requests.Session:
+    """Create a keep-alive session with a bounded connection pool"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_shared_session() -> requests.Session:
+    """Return the process-wide session so every client reuses the same pool"""
+    global _shared_session
+    if _shared_session is None:
+        _shared_session = _build_session()
+    return _shared_session
+
+
 class UptimeRobotAPI:
     """UptimeRobot API client for monitoring website uptime"""
     
-    def __init__(self):
+    def __init__(self, session: Optional[requests.Session] = None):
+        self.session = session or get_shared_session()
+        self.timeout = (UPTIMEROBOT_CONNECT_TIMEOUT, UPTIMEROBOT_READ_TIMEOUT)
         self.api_key = os.getenv("UPTIMEROBOT_API_KEY")
         self.base_url = "https://api.uptimerobot.com/v2"
         self.updates_url = "https://api.uptimerobot.com/v3"
@@ -32,25 +70,58 @@ class UptimeRobotAPI:
 
         logger.info(f"Initializing UptimeRobot API. API Key available: {bool(self.api_key)}")
         if not self.api_key:
-            logger.warning("UptimeRobot API key not found. Will use direct HTTP checks as fallback.")
+            logger.warning("UptimeRobot API key not found. Monitors will be checked by the built-in prober.")
+
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request over the pooled session. Every call takes a token from the
+        shared rate limiter; 429/5xx and connection errors are retried with
+        jittered backoff (honouring Retry-After) until the per-call deadline.
+        """
+        deadline = time.monotonic() + UPTIMEROBOT_CALL_DEADLINE
+        attempt = 0
+        while True:
+            wait = uptime_rate_limiter.acquire(deadline)
+            if wait is None:
+                uptime_call_metrics.incr("deadline_exceeded")
+                raise UptimeRobotAPIError(f"{method} {url}: rate limit wait exceeds call deadline")
+            uptime_call_metrics.record_throttle(wait)
+            uptime_call_metrics.incr("calls")
+
+            remaining = max(0.1, deadline - time.monotonic())
+            kwargs["timeout"] = (self.timeout[0], min(self.timeout[1], remaining))
+            retry_after = None
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                error = str(e)
+            else:
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    return response
+                error = f"HTTP {response.status_code}"
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                if response.status_code == 429:
+                    uptime_call_metrics.incr("rate_limited")
+                    uptime_rate_limiter.pause(retry_after or uptime_retry_policy.base_delay)
+
+            delay = uptime_retry_policy.next_delay(attempt, deadline, retry_after)
+            if delay is None:
+                uptime_call_metrics.incr("failed")
+                raise UptimeRobotAPIError(f"{method} {url} failed after {attempt + 1} attempts: {error}")
+            uptime_call_metrics.incr("retried")
+            logger.warning(f"UptimeRobot {method} {url} failed ({error}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+            attempt += 1
     
 
-    def _get_monitors(self, monitor_id: int) -> Dict[str, Any]:
-        """Get all monitors from UptimeRobot"""
+    def _get_monitors(self, monitor_id: int, logs_since: Optional[int] = None,
+                      response_times_since: Optional[int] = None) -> Dict[str, Any]:
+        """Get a monitor with its logs and response times (optionally only those after the given unix times)"""
         try:
             url = f"{self.base_url}/getMonitors"
-            data = {
-                "api_key": self.api_key,
-                "format": "json",
-                "monitors": monitor_id,
-                "logs": "1",
-                "response_times": "1",
-                # "response_times_limit": "1000",
-                "response_times_average": "1",
-                "custom_uptime_ratios": "30-7-1"
-            }
+            data = _monitor_detail_params(self.api_key, monitor_id, logs_since, response_times_since)
             # logger.debug(f"Making request to {url}")
-            response = requests.post(url, data=data, timeout=30)
+            response = self._request("POST", url, data=data)
             response.raise_for_status()
             result = response.json()
             # logger.debug(f"UptimeRobot response: {result}")
@@ -59,6 +130,8 @@ class UptimeRobotAPI:
             else:
                 logger.error(f"UptimeRobot API error: {result}")
                 return {}
+        except UptimeRobotAPIError:
+            raise
         except requests.exceptions.RequestException as e:
             logger.error(f"Request error when getting monitors: {e}")
             return {}
@@ -66,27 +139,22 @@ class UptimeRobotAPI:
             logger.error(f"Unexpected error when getting monitors: {e}")
             return {}
     
-    def _get_all_monitors(self) -> List[Dict[str, Any]]:
-        """Get all monitors from UptimeRobot API"""
-        try:
-            url = f"{self.updates_url}/monitors"
-            response = requests.get(url, headers=self.headers)
+    def iter_monitor_pages(self, fields: Optional[Sequence[str]] = None) -> Iterator[List[Dict[str, Any]]]:
+        """Yield v3 monitors one page at a time, following the API's next-page cursor"""
+        url = f"{self.updates_url}/monitors"
+        while url:
+            response = self._request("GET", url, headers=self.headers)
             response.raise_for_status()
             data = response.json()
-            monitors_arr = data.get("data", [])
-            # Select only specific fields from each monitor
-            monitors = [
-                {
-                    "id": monitor.get("id"),
-                    "interval": monitor.get("interval"),
-                    "friendlyName": monitor.get("friendlyName"),
-                    "url": monitor.get("url"),
-                    "status": monitor.get("status"),
-                    "createDateTime": monitor.get("createDateTime")
-                }
-                for monitor in monitors_arr
-            ]
-            return monitors
+            yield [_project_monitor(monitor, fields) for monitor in data.get("data", [])]
+            url = _next_page_url(url, data)
+
+    def _get_all_monitors(self, fields: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """Get all monitors from UptimeRobot API"""
+        try:
+            return [monitor for page in self.iter_monitor_pages(fields) for monitor in page]
+        except UptimeRobotAPIError:
+            raise
         except requests.exceptions.RequestException as e:
             logger.error(f"Error fetching monitors: {e}")
             return []
@@ -102,15 +170,8 @@ class UptimeRobotAPI:
         """
         try:
             url = f"{self.base_url}/getMonitors"
-            data = {
-                "api_key": self.api_key,
-                "format": "json",
-                "logs": "1",  # Include logs to count them
-                "response_times": "1",  # ✅ include response times
-                "response_times_average": "180",  # ✅ average over last 180 mins (3 hours)
-                "custom_uptime_ratios": "30-7-1",
-            }
-            response = requests.post(url, data=data, timeout=30)
+            data = _monitor_stats_params(self.api_key)
+            response = self._request("POST", url, data=data)
             response.raise_for_status()
             result = response.json()
 
@@ -118,26 +179,10 @@ class UptimeRobotAPI:
                 logger.error(f"UptimeRobot API error: {result}")
                 return []
 
-            summary_list = []
-            for monitor in result.get("monitors", []):
-                logs = monitor.get("logs", [])
-                errors_count = sum(1 for log in logs if log.get("type") == 1)  # type 1 = error
-                summary_list.append({
-                    "id": monitor.get("id"),
-                    "friendlyName": monitor.get("friendly_name"),
-                    "url": monitor.get("url"),
-                    "status": monitor.get("status"),
-                    "interval": monitor.get("interval"),
-                    "average_response_time": monitor.get("average_response_time") or "N/A",  # ✅ fallback
-                    "custom_uptime_ratios": monitor.get("custom_uptime_ratios"),
-                    "total_logs": len(logs),
-                    "total_errors": errors_count,
-                    # don't include raw last_log if you don't want it in reports
-                    "createDateTime": monitor.get("create_datetime"),
-                })
-
-            return summary_list
+            return [_monitor_stats_summary(monitor) for monitor in result.get("monitors", [])]
 
+        except UptimeRobotAPIError:
+            raise
         except requests.exceptions.RequestException as e:
             logger.error(f"Request error when fetching summarized monitor stats: {e}")
             return []
@@ -150,16 +195,12 @@ class UptimeRobotAPI:
         """Get a specific monitor by ID from UptimeRobot API"""
         try:
             url = f"{self.updates_url}/monitors/{monitor_id}"
-            response = requests.get(url, headers=self.headers)
+            response = self._request("GET", url, headers=self.headers)
             response.raise_for_status()
             data = response.json()
-            return {
-                "id": data.get("id"),
-                "friendlyName": data.get("friendlyName"),
-                "url": data.get("url"),
-                "status": data.get("status"),
-                "createDateTime": data.get("createDateTime")
-            }
+            return _monitor_detail(data)
+        except UptimeRobotAPIError:
+            raise
         except requests.exceptions.RequestException as e:
             logger.error(f"Error fetching monitor {monitor_id}: {e}")
             return {}
@@ -168,43 +209,19 @@ class UptimeRobotAPI:
         try:
             # Use UptimeRobot API v2 which is more stable
             url = f"{self.base_url}/newMonitor"
-
-            siteurl = monitor["site_url"]
-            sitename = monitor["sitename"]
-            interval = monitor["interval"]
-
-            # Use form data format for v2 API
-            data = {
-                "api_key": self.api_key,
-                "format": "json",
-                "type": "1",  # HTTP(s)
-                "url": siteurl,
-                "friendly_name": sitename,
-                "interval": str(interval)
-            }
+            data = _new_monitor_params(self.api_key, monitor)
             
-            print(f"Creating monitor with data: {data}")
-            response = requests.post(url, data=data)
-            print(f"Response status: {response.status_code}")
-            print(f"Response text: {response.text}")
+            logger.debug(f"Creating monitor for {monitor['site_url']} every {monitor['interval']}s")
+            response = self._request("POST", url, data=data)
+            logger.debug(f"newMonitor response status: {response.status_code}")
             
             response.raise_for_status()
             result = response.json()
-            print(f"API Response: {result}")
-            
-            if result.get("stat") == "ok":
-                return {
-                    "success": True,
-                    "id": result.get("monitor", {}).get("id"),
-                    "monitor_id": result.get("monitor", {}).get("id"),
-                    "message": "Monitor created successfully"
-                }
-            else:
-                return {
-                    "success": False,
-                    "message": result.get("error", {}).get("message", "Failed to create monitor")
-                }
+            logger.debug(f"newMonitor result: {result.get('stat')} {result.get('monitor')}")
+            return _new_monitor_result(result)
 
+        except UptimeRobotAPIError:
+            raise
         except requests.exceptions.RequestException as e:
             logger.error(f"\nError creating monitor {monitor}: {e}")
             # Return mock success for development
@@ -219,18 +236,20 @@ class UptimeRobotAPI:
     def _delete_monitor(self, monitor_id: str):
         try :
             url = f"{self.updates_url}/monitors/{monitor_id}"
-            response =  requests.delete(url, headers=self.headers)
+            response = self._request("DELETE", url, headers=self.headers)
             response.raise_for_status()
             
             # Check if response has content before parsing JSON
             if response.text.strip():
                 data = response.json()
-                print(data)
+                logger.debug(f"Deleted monitor {monitor_id}: {data}")
                 return data
             else:
                 # Empty response indicates successful deletion
                 return {"success": True, "message": "Monitor deleted successfully"}
 
+        except UptimeRobotAPIError:
+            raise
         except requests.exceptions.RequestException as e:
             logger.error(f"\nError deleting monitor {monitor_id}: {e}")
             return {}
@@ -244,7 +263,7 @@ class UptimeRobotAPI:
         """
         try:
             url = f"{self.updates_url}/monitors/{monitor_id}"
-            response = requests.patch(url, headers=self.headers, json=updates, timeout=30)
+            response = self._request("PATCH", url, headers=self.headers, json=updates)
             response.raise_for_status()
 
             data = response.json() if response.text.strip() else {}
@@ -253,15 +272,175 @@ class UptimeRobotAPI:
                 "message": "Monitor updated successfully",
                 "data": data
             }
+        except UptimeRobotAPIError:
+            raise
         except requests.exceptions.RequestException as e:
             logger.error(f"Error updating monitor {monitor_id}: {e}")
             return {"success": False, "message": str(e)}
         except Exception as e:
             logger.error(f"Unexpected error updating monitor {monitor_id}: {e}")
             return {"success": False, "message": str(e)}
-    
 
-def _process_uptimerobot_log(log: Dict[str, Any], response_times_dict: Dict[int, float]) -> Optional[UptimeCheckResponse]:
+
+# Process-wide client: routes and the scheduler share one connection pool
+uptime_api = UptimeRobotAPI()
+
+
+# ----------------- Request/response shaping shared by the sync and async clients -----------------
+
+# getMonitors rejects response-time ranges longer than this
+MAX_RESPONSE_TIMES_RANGE = 7 * 86400
+
+
+def _monitor_detail_params(api_key: str, monitor_id: int, logs_since: Optional[int] = None,
+                           response_times_since: Optional[int] = None) -> Dict[str, Any]:
+    """getMonitors form data for a single monitor with logs and response times"""
+    data = {
+        "api_key": api_key,
+        "format": "json",
+        "monitors": monitor_id,
+        "logs": "1",
+        "response_times": "1",
+        # "response_times_limit": "1000",
+        "response_times_average": "1",
+        "custom_uptime_ratios": "30-7-1"
+    }
+    now = int(time.time())
+    if logs_since:
+        data["logs_start_date"] = logs_since
+        data["logs_end_date"] = now
+    if response_times_since and now - response_times_since <= MAX_RESPONSE_TIMES_RANGE:
+        data["response_times_start_date"] = response_times_since
+        data["response_times_end_date"] = now
+    return data
+
+
+def _monitor_stats_params(api_key: str) -> Dict[str, Any]:
+    """getMonitors form data for the account-wide summary"""
+    return {
+        "api_key": api_key,
+        "format": "json",
+        "logs": "1",  # Include logs to count them
+        "response_times": "1",  # ✅ include response times
+        "response_times_average": "180",  # ✅ average over last 180 mins (3 hours)
+        "custom_uptime_ratios": "30-7-1",
+    }
+
+
+def _new_monitor_params(api_key: str, monitor: Dict[str, Any]) -> Dict[str, Any]:
+    """newMonitor form data (v2 API) for an HTTP(s) monitor"""
+    return {
+        "api_key": api_key,
+        "format": "json",
+        "type": "1",  # HTTP(s)
+        "url": monitor["site_url"],
+        "friendly_name": monitor["sitename"],
+        "interval": str(monitor["interval"])
+    }
+
+
+def _new_monitor_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    if result.get("stat") == "ok":
+        return {
+            "success": True,
+            "id": result.get("monitor", {}).get("id"),
+            "monitor_id": result.get("monitor", {}).get("id"),
+            "message": "Monitor created successfully"
+        }
+    return {
+        "success": False,
+        "message": result.get("error", {}).get("message", "Failed to create monitor")
+    }
+
+
+def _monitor_listing(monitor: Dict[str, Any]) -> Dict[str, Any]:
+    """Select the fields the dashboard uses from a v3 monitor"""
+    return {
+        "id": monitor.get("id"),
+        "interval": monitor.get("interval"),
+        "friendlyName": monitor.get("friendlyName"),
+        "url": monitor.get("url"),
+        "status": monitor.get("status"),
+        "createDateTime": monitor.get("createDateTime")
+    }
+
+
+def _project_monitor(monitor: Dict[str, Any], fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """Keep only `fields` of a v3 monitor (the dashboard listing fields by default)"""
+    if fields is None:
+        return _monitor_listing(monitor)
+    return {field: monitor.get(field) for field in fields}
+
+
+def _next_page_url(current_url: str, page: Dict[str, Any]) -> Optional[str]:
+    """Resolve the v3 pagination cursor of a monitors page into the next URL"""
+    next_link = page.get("nextLink")
+    if next_link:
+        return next_link
+    cursor = page.get("nextCursor") or page.get("cursor")
+    if cursor:
+        return f"{current_url.split('?')[0]}?cursor={cursor}"
+    return None
+
+
+def _monitor_detail(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": data.get("id"),
+        "friendlyName": data.get("friendlyName"),
+        "url": data.get("url"),
+        "status": data.get("status"),
+        "createDateTime": data.get("createDateTime")
+    }
+
+
+def _monitor_stats_summary(monitor: Dict[str, Any]) -> Dict[str, Any]:
+    """Summarize a v2 monitor (with logs) for reports"""
+    logs = monitor.get("logs", [])
+    errors_count = sum(1 for log in logs if log.get("type") == 1)  # type 1 = error
+    return {
+        "id": monitor.get("id"),
+        "friendlyName": monitor.get("friendly_name"),
+        "url": monitor.get("url"),
+        "status": monitor.get("status"),
+        "interval": monitor.get("interval"),
+        "average_response_time": monitor.get("average_response_time") or "N/A",  # ✅ fallback
+        "custom_uptime_ratios": monitor.get("custom_uptime_ratios"),
+        "total_logs": len(logs),
+        "total_errors": errors_count,
+        # don't include raw last_log if you don't want it in reports
+        "createDateTime": monitor.get("create_datetime"),
+    }
+
+
+class ResponseTimeIndex(NamedTuple):
+    """Response times as parallel arrays sorted by timestamp"""
+    timestamps: List[int]
+    values: List[float]
+    ranks: List[int]  # position of each timestamp in the API payload, used to break ties
+
+
+def _build_response_time_index(response_times: List[Dict[str, Any]]) -> ResponseTimeIndex:
+    """Index a response_times payload for O(log n) nearest-timestamp lookups"""
+    # Same semantics as the old {timestamp: value} dict: a repeated timestamp
+    # keeps its first position but its last value
+    by_timestamp: Dict[int, float] = {}
+    for rt in response_times:
+        rt_timestamp = rt.get("datetime")
+        if rt_timestamp:
+            try:
+                by_timestamp[int(rt_timestamp)] = float(rt.get("value", 0))
+            except (ValueError, TypeError):
+                continue
+
+    ranked = sorted((ts, value, rank) for rank, (ts, value) in enumerate(by_timestamp.items()))
+    return ResponseTimeIndex(
+        timestamps=[ts for ts, _, _ in ranked],
+        values=[value for _, value, _ in ranked],
+        ranks=[rank for _, _, rank in ranked],
+    )
+
+
+def _process_uptimerobot_log(log: Dict[str, Any], response_times: ResponseTimeIndex) -> Optional[UptimeCheckResponse]:
     """Process a single UptimeRobot log entry"""
     timestamp = log.get("datetime", 0)
     log_datetime = _validate_timestamp(timestamp)
@@ -289,7 +468,7 @@ def _process_uptimerobot_log(log: Dict[str, Any], response_times_dict: Dict[int,
     # Get response time for successful checks
     response_time = None
     if is_up:
-        response_time = _find_closest_response_time(int(timestamp), response_times_dict)
+        response_time = _find_closest_response_time(int(timestamp), response_times)
     
     return UptimeCheckResponse(
         id=int(log.get('id', timestamp)),
@@ -303,7 +482,16 @@ def _process_uptimerobot_log(log: Dict[str, Any], response_times_dict: Dict[int,
 
 
 
-def _process_response_time_entry(rt: Dict[str, Any], existing_log_timestamps: set) -> Optional[UptimeCheckResponse]:
+# A response time within this many seconds of a log is already represented by that log
+LOG_DEDUP_WINDOW = 300
+
+
+def _has_timestamp_within(sorted_timestamps: List[int], timestamp: int, window: int = LOG_DEDUP_WINDOW) -> bool:
+    """True if any of `sorted_timestamps` lies in [timestamp - window, timestamp + window]"""
+    return bisect_right(sorted_timestamps, timestamp + window) > bisect_left(sorted_timestamps, timestamp - window)
+
+
+def _process_response_time_entry(rt: Dict[str, Any], sorted_log_timestamps: List[int]) -> Optional[UptimeCheckResponse]:
     """Process a response time entry that doesn't have a corresponding log"""
     timestamp = rt.get("datetime", 0)
     rt_datetime = _validate_timestamp(timestamp)
@@ -319,12 +507,7 @@ def _process_response_time_entry(rt: Dict[str, Any], existing_log_timestamps: se
     
     # Check if this response time already has a log entry (within 5 minutes)
     timestamp_int = int(timestamp)
-    has_log_entry = any(
-        abs(log_ts - timestamp_int) <= 300 
-        for log_ts in existing_log_timestamps
-    )
-    
-    if has_log_entry:
+    if _has_timestamp_within(sorted_log_timestamps, timestamp_int):
         return None
         
     return UptimeCheckResponse(
@@ -357,44 +540,55 @@ def _validate_timestamp(timestamp: Any) -> Optional[datetime]:
         return None
 
 
-def _find_closest_response_time(target_timestamp: int, response_times_dict: Dict[int, float], max_diff: int = 3600) -> Optional[float]:
-    """Find the closest response time within max_diff seconds"""
-    closest_time = None
-    min_diff = float('inf')
-    
-    for rt_timestamp, rt_value in response_times_dict.items():
-        time_diff = abs(rt_timestamp - target_timestamp)
-        if time_diff < min_diff and time_diff <= max_diff:
-            min_diff = time_diff
-            closest_time = rt_value
-            
-    return closest_time
-
+def _find_closest_response_time(target_timestamp: int, response_times: ResponseTimeIndex, max_diff: int = 3600) -> Optional[float]:
+    """Find the closest response time within max_diff seconds (binary search)"""
+    timestamps = response_times.timestamps
+    pos = bisect_left(timestamps, target_timestamp)
+
+    best = None
+    for candidate in (pos - 1, pos):
+        if 0 <= candidate < len(timestamps):
+            time_diff = abs(timestamps[candidate] - target_timestamp)
+            if time_diff > max_diff:
+                continue
+            if best is None:
+                best = candidate
+                continue
+            best_diff = abs(timestamps[best] - target_timestamp)
+            # Equidistant neighbours: the one listed first in the payload wins
+            if time_diff < best_diff or (time_diff == best_diff and response_times.ranks[candidate] < response_times.ranks[best]):
+                best = candidate
+
+    return response_times.values[best] if best is not None else None
+
+
+def filter_by_user_id(Allmonitors: Iterable[Dict[str, Any]], userMonitors: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Filter monitors by user ID.
+    Hash join on monitor id: the user's monitors are indexed once and
+    `Allmonitors` is consumed in a single pass, so it may be any iterable,
+    e.g. itertools.chain.from_iterable(api.iter_monitor_pages()).
+    """
+    # Index the user's monitors by id (first row wins, as before)
+    user_monitors_by_id: Dict[Any, Dict[str, Any]] = {}
+    for user_monitor in userMonitors:
+        user_monitors_by_id.setdefault(user_monitor.get('monitorid'), user_monitor)
 
-def filter_by_user_id(Allmonitors: List[Dict[str, Any]], userMonitors: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Filter monitors by user ID"""
-    # Create a set of monitor IDs that belong to the user
-    # print(userMonitors)
-    user_monitor_ids = {monitor.get('monitorid') for monitor in userMonitors}
-    
-    # Filter all monitors to only include those belonging to the user
     filtered_monitors = []
     for monitor in Allmonitors:
-        print(monitor)
-        if monitor.get('id') in user_monitor_ids:
-            # Find corresponding user monitor data
-            user_monitor = next((um for um in userMonitors if um.get('monitorid') == monitor.get('id')), None)
-            
-            # Merge data, prioritizing Allmonitors data but adding user-specific fields
-            merged_monitor = monitor.copy()
-            if user_monitor:
-                merged_monitor['userid'] = user_monitor.get('userid')
-                merged_monitor['monitor_created'] = user_monitor.get('monitor_created')
-                # Keep the accurate sitename from Allmonitors as friendlyName
-                # but add user's sitename as a separate field if different
-                if user_monitor.get('sitename') != monitor.get('friendlyName'):
-                    merged_monitor['user_sitename'] = user_monitor.get('sitename')
-            
-            filtered_monitors.append(merged_monitor)
-    
+        user_monitor = user_monitors_by_id.get(monitor.get('id'))
+        if user_monitor is None:
+            continue
+
+        # Merge data, prioritizing Allmonitors data but adding user-specific fields
+        merged_monitor = monitor.copy()
+        merged_monitor['userid'] = user_monitor.get('userid')
+        merged_monitor['monitor_created'] = user_monitor.get('monitor_created')
+        # Keep the accurate sitename from Allmonitors as friendlyName
+        # but add user's sitename as a separate field if different
+        if user_monitor.get('sitename') != monitor.get('friendlyName'):
+            merged_monitor['user_sitename'] = user_monitor.get('sitename')
+
+        filtered_monitors.append(merged_monitor)
+
     return filtered_monitors
\ No newline at end of file
@@ -0,0 +1,280 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Dict, Any, AsyncIterator, List, Optional, Sequence, Tuple
+
+import httpx
+
+from .api_client import (
+    UPTIMEROBOT_POOL_SIZE,
+    UPTIMEROBOT_CONNECT_TIMEOUT,
+    UPTIMEROBOT_READ_TIMEOUT,
+    _monitor_detail_params,
+    _monitor_stats_params,
+    _new_monitor_params,
+    _new_monitor_result,
+    _project_monitor,
+    _next_page_url,
+    _monitor_detail,
+    _monitor_stats_summary,
+)
+from .monitor_cache import AsyncTTLCache
+from .rate_limit import (
+    RETRYABLE_STATUS_CODES,
+    UPTIMEROBOT_CALL_DEADLINE,
+    UptimeRobotAPIError,
+    parse_retry_after,
+    uptime_call_metrics,
+    uptime_rate_limiter,
+    uptime_retry_policy,
+)
+
+logger = logging.getLogger(__name__)
+
+# All-monitors listing cache: served fresh for TTL seconds, then served stale
+# for up to STALE_TTL more seconds while a single refresh runs in the background
+MONITOR_CACHE_TTL = float(os.getenv("MONITOR_CACHE_TTL", 30))
+MONITOR_CACHE_STALE_TTL = float(os.getenv("MONITOR_CACHE_STALE_TTL", 120))
+
+
+class AsyncUptimeRobotAPI:
+    """
+    asyncio UptimeRobot client for the FastAPI routes.
+    Mirrors UptimeRobotAPI's method set; the underlying httpx.AsyncClient is
+    opened in main.py's startup hook and closed on shutdown.
+    """
+
+    def __init__(self, pool_size: int = UPTIMEROBOT_POOL_SIZE):
+        self.api_key = os.getenv("UPTIMEROBOT_API_KEY")
+        self.base_url = "https://api.uptimerobot.com/v2"
+        self.updates_url = "https://api.uptimerobot.com/v3"
+        self.headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Accept": "application/json"
+        }
+        self.pool_size = pool_size
+        self._client: Optional[httpx.AsyncClient] = None
+        self.monitor_cache = AsyncTTLCache(ttl=MONITOR_CACHE_TTL, stale_ttl=MONITOR_CACHE_STALE_TTL)
+
+    async def startup(self):
+        """Open the shared connection pool"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.pool_size,
+                    max_keepalive_connections=self.pool_size,
+                ),
+                timeout=httpx.Timeout(UPTIMEROBOT_READ_TIMEOUT, connect=UPTIMEROBOT_CONNECT_TIMEOUT),
+            )
+            logger.info(f"Async UptimeRobot client started (pool size {self.pool_size})")
+
+    async def aclose(self):
+        """Close the shared connection pool"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            logger.info("Async UptimeRobot client closed")
+
+    async def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Rate-limited, retrying request; see UptimeRobotAPI._request"""
+        if self._client is None:
+            # Scripts and tests that skip the app lifecycle still get a pooled client
+            await self.startup()
+
+        deadline = time.monotonic() + UPTIMEROBOT_CALL_DEADLINE
+        attempt = 0
+        while True:
+            wait = await uptime_rate_limiter.acquire_async(deadline)
+            if wait is None:
+                uptime_call_metrics.incr("deadline_exceeded")
+                raise UptimeRobotAPIError(f"{method} {url}: rate limit wait exceeds call deadline")
+            uptime_call_metrics.record_throttle(wait)
+            uptime_call_metrics.incr("calls")
+
+            remaining = max(0.1, deadline - time.monotonic())
+            kwargs["timeout"] = httpx.Timeout(min(UPTIMEROBOT_READ_TIMEOUT, remaining), connect=UPTIMEROBOT_CONNECT_TIMEOUT)
+            retry_after = None
+            try:
+                response = await self._client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                error = str(e) or type(e).__name__
+            else:
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    return response
+                error = f"HTTP {response.status_code}"
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                if response.status_code == 429:
+                    uptime_call_metrics.incr("rate_limited")
+                    uptime_rate_limiter.pause(retry_after or uptime_retry_policy.base_delay)
+
+            delay = uptime_retry_policy.next_delay(attempt, deadline, retry_after)
+            if delay is None:
+                uptime_call_metrics.incr("failed")
+                raise UptimeRobotAPIError(f"{method} {url} failed after {attempt + 1} attempts: {error}")
+            uptime_call_metrics.incr("retried")
+            logger.warning(f"UptimeRobot {method} {url} failed ({error}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _get_monitors(self, monitor_id: int, logs_since: Optional[int] = None,
+                            response_times_since: Optional[int] = None) -> Dict[str, Any]:
+        """Get a monitor with its logs and response times (optionally only those after the given unix times)"""
+        try:
+            url = f"{self.base_url}/getMonitors"
+            data = _monitor_detail_params(self.api_key, monitor_id, logs_since, response_times_since)
+            response = await self._request("POST", url, data=data)
+            response.raise_for_status()
+            result = response.json()
+            if result.get("stat") == "ok":
+                return result
+            logger.error(f"UptimeRobot API error: {result}")
+            return {}
+        except UptimeRobotAPIError:
+            raise
+        except httpx.HTTPError as e:
+            logger.error(f"Request error when getting monitors: {e}")
+            return {}
+        except Exception as e:
+            logger.error(f"Unexpected error when getting monitors: {e}")
+            return {}
+
+    async def _fetch_monitor_page(self, url: str) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        response = await self._request("GET", url, headers=self.headers)
+        response.raise_for_status()
+        data = response.json()
+        return data.get("data", []), _next_page_url(url, data)
+
+    async def iter_monitor_pages(self, fields: Optional[Sequence[str]] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Yield v3 monitors one page at a time, following the next-page cursor.
+        The next page is requested before the current one is handed to the
+        caller, so processing page N overlaps the download of page N+1 while
+        at most two pages are held in memory.
+        """
+        pending: Optional[asyncio.Task] = asyncio.create_task(
+            self._fetch_monitor_page(f"{self.updates_url}/monitors")
+        )
+        try:
+            while pending is not None:
+                monitors, next_url = await pending
+                pending = asyncio.create_task(self._fetch_monitor_page(next_url)) if next_url else None
+                yield [_project_monitor(monitor, fields) for monitor in monitors]
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+    async def _fetch_all_monitors(self, fields: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        return [monitor async for page in self.iter_monitor_pages(fields) for monitor in page]
+
+    async def _get_all_monitors(self, fields: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Get all monitors from UptimeRobot API through the listing cache.
+        The returned list is shared between callers and must not be mutated.
+        """
+        key = tuple(fields) if fields is not None else None
+        try:
+            return await self.monitor_cache.get(key, lambda: self._fetch_all_monitors(fields))
+        except UptimeRobotAPIError:
+            raise
+        except httpx.HTTPError as e:
+            logger.error(f"Error fetching monitors: {e}")
+            return []
+
+    def invalidate_monitor_cache(self):
+        """Drop the cached listing after a create/edit/delete"""
+        self.monitor_cache.invalidate()
+
+    async def get_all_monitor_stats(self) -> List[Dict[str, Any]]:
+        """Get summarized info (status, response time, ratios, log counts) for all monitors"""
+        try:
+            url = f"{self.base_url}/getMonitors"
+            response = await self._request("POST", url, data=_monitor_stats_params(self.api_key))
+            response.raise_for_status()
+            result = response.json()
+
+            if result.get("stat") != "ok":
+                logger.error(f"UptimeRobot API error: {result}")
+                return []
+
+            return [_monitor_stats_summary(monitor) for monitor in result.get("monitors", [])]
+        except UptimeRobotAPIError:
+            raise
+        except httpx.HTTPError as e:
+            logger.error(f"Request error when fetching summarized monitor stats: {e}")
+            return []
+        except Exception as e:
+            logger.error(f"Unexpected error when fetching summarized monitor stats: {e}")
+            return []
+
+    async def _get_monitor_by_monitor_id(self, monitor_id: str) -> Dict[str, Any]:
+        """Get a specific monitor by ID from UptimeRobot API"""
+        try:
+            url = f"{self.updates_url}/monitors/{monitor_id}"
+            response = await self._request("GET", url, headers=self.headers)
+            response.raise_for_status()
+            return _monitor_detail(response.json())
+        except UptimeRobotAPIError:
+            raise
+        except httpx.HTTPError as e:
+            logger.error(f"Error fetching monitor {monitor_id}: {e}")
+            return {}
+
+    async def _create_new_monitor(self, user_id: str, monitor: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            url = f"{self.base_url}/newMonitor"
+            response = await self._request("POST", url, data=_new_monitor_params(self.api_key, monitor))
+            response.raise_for_status()
+            return _new_monitor_result(response.json())
+        except UptimeRobotAPIError:
+            raise
+        except httpx.HTTPError as e:
+            logger.error(f"Error creating monitor {monitor}: {e}")
+            return {
+                "success": False,
+                "id": 0,
+                "monitor_id": 0,
+                "message": "Monitor created failed"
+            }
+
+    async def _delete_monitor(self, monitor_id: str):
+        try:
+            url = f"{self.updates_url}/monitors/{monitor_id}"
+            response = await self._request("DELETE", url, headers=self.headers)
+            response.raise_for_status()
+
+            # Empty response indicates successful deletion
+            if response.text.strip():
+                return response.json()
+            return {"success": True, "message": "Monitor deleted successfully"}
+        except UptimeRobotAPIError:
+            raise
+        except httpx.HTTPError as e:
+            logger.error(f"Error deleting monitor {monitor_id}: {e}")
+            return {}
+
+    async def edit_monitor(self, monitor_id: str, updates: Dict[str, Any]) -> Dict[str, Any]:
+        """Edit an existing monitor using UptimeRobot v3 PATCH API"""
+        try:
+            url = f"{self.updates_url}/monitors/{monitor_id}"
+            response = await self._request("PATCH", url, headers=self.headers, json=updates)
+            response.raise_for_status()
+
+            data = response.json() if response.text.strip() else {}
+            return {
+                "success": True,
+                "message": "Monitor updated successfully",
+                "data": data
+            }
+        except UptimeRobotAPIError:
+            raise
+        except httpx.HTTPError as e:
+            logger.error(f"Error updating monitor {monitor_id}: {e}")
+            return {"success": False, "message": str(e)}
+        except Exception as e:
+            logger.error(f"Unexpected error updating monitor {monitor_id}: {e}")
+            return {"success": False, "message": str(e)}
+
+
+# Process-wide async client; lifecycle is driven by main.py startup/shutdown
+async_uptime_api = AsyncUptimeRobotAPI()
@@ -0,0 +1,323 @@
+"""
+Local check-history store.
+
+UptimeRobot logs and response times are copied into the `uptime_checks` table
+incrementally: each monitor has a high-water mark in `monitor_sync_state`, and
+only entries newer than it are requested from getMonitors and inserted.
+get_uptime_stats then rebuilds its timeline from the local rows, so a /stats
+call only downloads the delta since the previous sync.
+"""
+
+import asyncio
+import calendar
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from database.AuthDB import SessionLocal, UptimeCheck, MonitorSyncState
+from .async_api_client import async_uptime_api
+from .rate_limit import UptimeRobotAPIError
+from .rollups import apply_rollups, prune_rollups
+from .sla import extend_downtime_series
+from .incidents import extend_incidents
+
+logger = logging.getLogger(__name__)
+
+SOURCE_LOG = "log"
+SOURCE_RESPONSE_TIME = "response_time"
+SOURCE_PROBE = "probe"
+
+# How much local history /stats replays into makeCheck
+STATS_RESPONSE_TIME_HOURS = int(os.getenv("STATS_RESPONSE_TIME_HOURS", 24))
+STATS_LOG_DAYS = int(os.getenv("STATS_LOG_DAYS", 30))
+
+
+def _to_int(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def _epoch(dt: datetime) -> int:
+    return calendar.timegm(dt.utctimetuple())
+
+
+def _log_row(monitor_id: int, log: Dict[str, Any], timestamp: int) -> Dict[str, Any]:
+    """Keep a log's raw reason so the payload can be rebuilt exactly"""
+    reason = log.get("reason") or {}
+    return {
+        "website_id": monitor_id,
+        "source": SOURCE_LOG,
+        "external_id": _to_int(log.get("id")),
+        "log_type": _to_int(log.get("type")),
+        "timestamp": datetime.utcfromtimestamp(timestamp),
+        "is_up": log.get("type") == 2,
+        "status_code": _to_int(reason.get("code")) if reason.get("code") else None,
+        "error_message": reason.get("detail"),
+        "response_time": None,
+    }
+
+
+def _response_time_row(monitor_id: int, timestamp: int, value: float) -> Dict[str, Any]:
+    return {
+        "website_id": monitor_id,
+        "source": SOURCE_RESPONSE_TIME,
+        "external_id": None,
+        "log_type": None,
+        "timestamp": datetime.utcfromtimestamp(timestamp),
+        "is_up": True,
+        "status_code": None,
+        "error_message": None,
+        "response_time": value,
+    }
+
+
+def read_high_water_marks(monitor_id: int) -> Tuple[int, int]:
+    """(last stored log time, last stored response time) as unix seconds"""
+    with SessionLocal() as db:
+        state = db.get(MonitorSyncState, monitor_id)
+        if state is None:
+            return 0, 0
+        return state.last_log_ts or 0, state.last_response_time_ts or 0
+
+
+def _lock_sync_state(db, monitor_id: int) -> MonitorSyncState:
+    """
+    The monitor's sync state, locked until the session commits so concurrent syncs
+    of one monitor (/stats and sync_all_monitors) can't both read the same
+    high-water marks and store the delta twice. An UPDATE locks the row on
+    Postgres and takes the write lock on SQLite, which ignores FOR UPDATE.
+    """
+    touch = (update(MonitorSyncState).where(MonitorSyncState.monitor_id == monitor_id)
+             .values(synced_at=datetime.utcnow()))
+    if not db.execute(touch).rowcount:
+        state = MonitorSyncState(monitor_id=monitor_id, last_log_ts=0, last_response_time_ts=0)
+        db.add(state)
+        try:
+            db.flush()
+            return state
+        except IntegrityError:
+            # Another writer created the row first; wait for and lock theirs
+            db.rollback()
+            db.execute(touch)
+    return db.get(MonitorSyncState, monitor_id, populate_existing=True)
+
+
+def store_monitor_delta(monitor_id: int, monitor: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Insert the logs / response times newer than the monitor's high-water marks and roll them up / extend the SLA series and incidents; returns the new rows"""
+    with SessionLocal() as db:
+        state = _lock_sync_state(db, monitor_id)
+        last_log_ts = state.last_log_ts or 0
+        last_rt_ts = state.last_response_time_ts or 0
+
+        # Logs at exactly the high-water second may already be stored; dedupe those by log id
+        known_log_ids = set(db.scalars(
+            select(UptimeCheck.external_id).where(
+                UptimeCheck.website_id == monitor_id,
+                UptimeCheck.source == SOURCE_LOG,
+                UptimeCheck.timestamp >= datetime.utcfromtimestamp(last_log_ts),
+            )
+        ))
+
+        rows = []
+        for log in monitor.get("logs", []):
+            timestamp = _to_int(log.get("datetime"))
+            if not timestamp or timestamp < last_log_ts or _to_int(log.get("id")) in known_log_ids:
+                continue
+            rows.append(_log_row(monitor_id, log, timestamp))
+            state.last_log_ts = max(state.last_log_ts or 0, timestamp)
+
+        seen_rt = set()
+        for rt in monitor.get("response_times", []):
+            timestamp = _to_int(rt.get("datetime"))
+            if not timestamp or timestamp <= last_rt_ts or timestamp in seen_rt:
+                continue
+            try:
+                value = float(rt.get("value", 0))
+            except (ValueError, TypeError):
+                continue
+            seen_rt.add(timestamp)
+            rows.append(_response_time_row(monitor_id, timestamp, value))
+            state.last_response_time_ts = max(state.last_response_time_ts or 0, timestamp)
+
+        if rows:
+            db.execute(insert(UptimeCheck), rows)
+            apply_rollups(db, monitor_id, rows)
+            extend_downtime_series(db, monitor_id, rows)
+            extend_incidents(db, monitor_id, rows)
+        state.synced_at = datetime.utcnow()
+        db.commit()
+        return rows
+
+
+def store_probe_results(results: List[Dict[str, Any]]) -> int:
+    """Insert built-in prober results (see prober._result) and roll them up; returns rows written"""
+    rows_by_monitor: Dict[int, List[Dict[str, Any]]] = {}
+    for result in results:
+        rows_by_monitor.setdefault(result["monitor_id"], []).append({
+            "website_id": result["monitor_id"],
+            "source": SOURCE_PROBE,
+            "external_id": None,
+            "log_type": None,
+            "timestamp": datetime.utcfromtimestamp(result["timestamp"]),
+            "is_up": result["is_up"],
+            "status_code": result["status_code"],
+            "error_message": result["error_message"],
+            "response_time": result["response_time"],
+            "dns_ms": result["dns_ms"],
+            "connect_ms": result["connect_ms"],
+            "tls_ms": result["tls_ms"],
+            "ttfb_ms": result["ttfb_ms"],
+        })
+    if not rows_by_monitor:
+        return 0
+    with SessionLocal() as db:
+        db.execute(insert(UptimeCheck), [row for rows in rows_by_monitor.values() for row in rows])
+        for monitor_id, rows in rows_by_monitor.items():
+            apply_rollups(db, monitor_id, rows)
+        db.commit()
+    return len(results)
+
+
+def latest_probe_statuses(since: int) -> Dict[int, bool]:
+    """is_up of each monitor's most recent prober check at or after `since` (unix seconds)"""
+    with SessionLocal() as db:
+        latest = (
+            select(UptimeCheck.website_id, func.max(UptimeCheck.timestamp).label("timestamp"))
+            .where(UptimeCheck.source == SOURCE_PROBE, UptimeCheck.timestamp >= datetime.utcfromtimestamp(since))
+            .group_by(UptimeCheck.website_id)
+            .subquery()
+        )
+        rows = db.execute(
+            select(UptimeCheck.website_id, UptimeCheck.is_up)
+            .join(latest, (UptimeCheck.website_id == latest.c.website_id) & (UptimeCheck.timestamp == latest.c.timestamp))
+            .where(UptimeCheck.source == SOURCE_PROBE)
+        ).all()
+    return {website_id: bool(is_up) for website_id, is_up in rows}
+
+
+def load_probe_checks(monitor_id: int, start: int, end: int) -> List[Dict[str, Any]]:
+    """Prober checks of a monitor in [start, end), newest first, shaped like UptimeCheckResponse plus timings"""
+    with SessionLocal() as db:
+        rows = db.execute(
+            select(UptimeCheck.id, UptimeCheck.timestamp, UptimeCheck.status_code, UptimeCheck.response_time,
+                   UptimeCheck.is_up, UptimeCheck.error_message, UptimeCheck.dns_ms, UptimeCheck.connect_ms,
+                   UptimeCheck.tls_ms, UptimeCheck.ttfb_ms)
+            .where(UptimeCheck.website_id == monitor_id, UptimeCheck.source == SOURCE_PROBE,
+                   UptimeCheck.timestamp >= datetime.utcfromtimestamp(start),
+                   UptimeCheck.timestamp < datetime.utcfromtimestamp(end))
+            .order_by(UptimeCheck.timestamp.desc())
+        ).all()
+    return [
+        {
+            "id": row.id,
+            "website_id": monitor_id,
+            "timestamp": row.timestamp.isoformat() + "Z",
+            "status_code": row.status_code,
+            "response_time": row.response_time,
+            "is_up": row.is_up,
+            "error_message": row.error_message,
+            "dns_ms": row.dns_ms,
+            "connect_ms": row.connect_ms,
+            "tls_ms": row.tls_ms,
+            "ttfb_ms": row.ttfb_ms,
+        }
+        for row in rows
+    ]
+
+
+def load_history(monitor_id: int) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Rebuild getMonitors-shaped `logs` and `response_times` (newest first) from the local store"""
+    now = time.time()
+    with SessionLocal() as db:
+        log_rows = db.execute(
+            select(UptimeCheck.external_id, UptimeCheck.log_type, UptimeCheck.timestamp,
+                   UptimeCheck.status_code, UptimeCheck.error_message)
+            .where(UptimeCheck.website_id == monitor_id, UptimeCheck.source == SOURCE_LOG,
+                   UptimeCheck.timestamp >= datetime.utcfromtimestamp(now - STATS_LOG_DAYS * 86400))
+            .order_by(UptimeCheck.timestamp.desc())
+        ).all()
+        rt_rows = db.execute(
+            select(UptimeCheck.timestamp, UptimeCheck.response_time)
+            .where(UptimeCheck.website_id == monitor_id, UptimeCheck.source == SOURCE_RESPONSE_TIME,
+                   UptimeCheck.timestamp >= datetime.utcfromtimestamp(now - STATS_RESPONSE_TIME_HOURS * 3600))
+            .order_by(UptimeCheck.timestamp.desc())
+        ).all()
+
+    logs = []
+    for external_id, log_type, timestamp, status_code, error_message in log_rows:
+        reason = {}
+        if status_code is not None:
+            reason["code"] = str(status_code)
+        if error_message is not None:
+            reason["detail"] = error_message
+        log = {"type": log_type, "datetime": _epoch(timestamp), "reason": reason}
+        if external_id is not None:
+            log["id"] = external_id
+        logs.append(log)
+    response_times = [{"datetime": _epoch(timestamp), "value": value} for timestamp, value in rt_rows]
+    return logs, response_times
+
+
+async def sync_monitor(monitor_id: int) -> Dict[str, Any]:
+    """Pull the delta since the last sync into the store; returns the getMonitors monitor payload"""
+    last_log_ts, last_rt_ts = await asyncio.to_thread(read_high_water_marks, monitor_id)
+    result = await async_uptime_api._get_monitors(
+        monitor_id,
+        logs_since=last_log_ts or None,
+        response_times_since=last_rt_ts + 1 if last_rt_ts else None,
+    )
+    monitors = result.get("monitors", [])
+    if not monitors:
+        return {}
+    monitor = monitors[0]
+    await asyncio.to_thread(store_monitor_delta, monitor_id, monitor)
+    return monitor
+
+
+async def get_monitor_history(monitor_id: int) -> Tuple[Dict[str, Any], List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """(monitor payload, logs, response_times) with history served from the local store"""
+    try:
+        monitor = await sync_monitor(monitor_id)
+        if not monitor:
+            return {}, [], []
+        logs, response_times = await asyncio.to_thread(load_history, monitor_id)
+        return monitor, logs, response_times
+    except SQLAlchemyError as e:
+        # Store unavailable: fall back to the full history from the API
+        logger.warning(f"Check store unavailable for monitor {monitor_id}, using API history: {e}")
+        result = await async_uptime_api._get_monitors(monitor_id)
+        monitor = (result.get("monitors") or [{}])[0]
+        return monitor, monitor.get("logs", []), monitor.get("response_times", [])
+
+
+async def sync_all_monitors():
+    """Scheduled job: bring every monitor's local history up to date"""
+    synced = 0
+    try:
+        async for page in async_uptime_api.iter_monitor_pages(fields=["id"]):
+            for monitor in page:
+                monitor_id = _to_int(monitor.get("id"))
+                if monitor_id is None:
+                    continue
+                try:
+                    await sync_monitor(monitor_id)
+                    synced += 1
+                except SQLAlchemyError as e:
+                    logger.error(f"Failed to store history for monitor {monitor_id}: {e}")
+                except (UptimeRobotAPIError, httpx.HTTPError) as e:
+                    # One monitor's 429 / timeout must not skip the rest of the run
+                    logger.warning(f"Failed to fetch history for monitor {monitor_id}: {e}")
+    finally:
+        try:
+            await asyncio.to_thread(prune_rollups)
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to prune check rollups: {e}")
+        logger.info(f"Check history synced for {synced} monitors")
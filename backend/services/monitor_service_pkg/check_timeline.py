@@ -0,0 +1,177 @@
+"""
+Vectorized check-timeline builder for large monitor histories.
+
+Produces the same check list as stats_service.makeCheck's pure-Python path, but
+parses the logs / response_times payload into NumPy arrays and does timestamp
+validation, nearest-response-time matching, the ±300s log dedup and the final
+sort as array operations. Rows are only materialized (as JSON-ready dicts with
+the UptimeCheckResponse field layout) after the final ordering is known.
+
+NumPy is optional: when it is not installed `np` is None and makeCheck keeps
+using the pure-Python path.
+"""
+
+import logging
+import time
+from typing import Any, Dict, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+    logging.info("NumPy not available, makeCheck will use the pure-Python path")
+
+from .api_client import LOG_DEDUP_WINDOW
+
+# Same limits as _validate_timestamp / _find_closest_response_time
+MAX_AGE_SECONDS = 365 * 86400
+MAX_MATCH_DIFF = 3600
+
+
+def _as_float_array(values: List[Any]) -> "np.ndarray":
+    """Numeric payload values as float64; anything unparsable becomes NaN"""
+    try:
+        return np.array(values, dtype=np.float64)
+    except (ValueError, TypeError):
+        parsed = np.empty(len(values), dtype=np.float64)
+        for i, value in enumerate(values):
+            try:
+                parsed[i] = float(value)
+            except (ValueError, TypeError):
+                parsed[i] = np.nan
+        return parsed
+
+
+def _valid_timestamps(timestamps: "np.ndarray", now: float) -> "np.ndarray":
+    """Vectorized _validate_timestamp: positive and within a year of now"""
+    with np.errstate(invalid="ignore"):
+        delta = timestamps - now
+        return (timestamps > 0) & (delta >= -MAX_AGE_SECONDS) & (delta < MAX_AGE_SECONDS + 86400)
+
+
+def _response_time_index(ts: "np.ndarray", values: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """Sorted unique timestamps with their last value and first position (see _build_response_time_index)"""
+    keep = ~np.isnan(ts) & (ts != 0) & ~np.isnan(values)
+    ts = ts[keep].astype(np.int64)
+    values = values[keep]
+    unique_ts, first_pos = np.unique(ts, return_index=True)
+    _, last_pos_reversed = np.unique(ts[::-1], return_index=True)
+    last_pos = len(ts) - 1 - last_pos_reversed
+    return unique_ts, values[last_pos], first_pos
+
+
+def _nearest_values(targets: "np.ndarray", index_ts: "np.ndarray", index_values: "np.ndarray",
+                    index_ranks: "np.ndarray") -> "np.ndarray":
+    """Nearest indexed value within MAX_MATCH_DIFF of each target (NaN if none)"""
+    result = np.full(len(targets), np.nan)
+    if len(index_ts) == 0 or len(targets) == 0:
+        return result
+    pos = np.searchsorted(index_ts, targets, side="left")
+    left = np.clip(pos - 1, 0, len(index_ts) - 1)
+    right = np.clip(pos, 0, len(index_ts) - 1)
+    left_diff = np.where(pos > 0, targets - index_ts[left], np.iinfo(np.int64).max)
+    right_diff = np.where(pos < len(index_ts), index_ts[right] - targets, np.iinfo(np.int64).max)
+
+    take_left = (left_diff < right_diff) | ((left_diff == right_diff) & (index_ranks[left] < index_ranks[right]))
+    best = np.where(take_left, left, right)
+    best_diff = np.where(take_left, left_diff, right_diff)
+    matched = best_diff <= MAX_MATCH_DIFF
+    result[matched] = index_values[best[matched]]
+    return result
+
+
+def _parse_logs(sorted_logs: List[Dict[str, Any]]):
+    """Per-log fields; logs are few compared to response times, so this stays a single Python pass"""
+    ids, timestamps, is_up, status_codes, errors = [], [], [], [], []
+    for log in sorted_logs:
+        timestamp = log.get("datetime", 0)
+        try:
+            timestamp_int = int(timestamp)
+        except (ValueError, TypeError):
+            timestamp_int = 0
+        up = log.get("type", 0) == 2
+        reason = log.get("reason", {})
+        status_code = None
+        error_message = None
+        if up:
+            status_code = int(reason.get("code", 200)) if reason.get("code") else 200
+        else:
+            error_message = reason.get("detail", "Monitor was down")
+            if reason.get("code"):
+                try:
+                    status_code = int(reason.get("code"))
+                except (ValueError, TypeError):
+                    status_code = None
+        ids.append(int(log.get("id", timestamp)) if timestamp_int > 0 else 0)
+        timestamps.append(timestamp_int)
+        is_up.append(up)
+        status_codes.append(np.nan if status_code is None else status_code)
+        errors.append(error_message)
+    return (
+        np.array(ids, dtype=np.int64),
+        np.array(timestamps, dtype=np.int64),
+        np.array(is_up, dtype=bool),
+        np.array(status_codes, dtype=np.float64),
+        np.array(errors, dtype=object),
+    )
+
+
+def build_check_timeline(logs: List[Dict[str, Any]], response_times: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Vectorized equivalent of makeCheck; returns JSON-ready rows, newest first"""
+    now = time.time()
+
+    rt_ts = _as_float_array([rt.get("datetime", 0) for rt in response_times])
+    rt_values = _as_float_array([rt.get("value", 0) for rt in response_times])
+    index_ts, index_values, index_ranks = _response_time_index(rt_ts, rt_values)
+
+    # Logs: newest first, stable for equal timestamps (as sorted(..., reverse=True))
+    sorted_logs = sorted(logs, key=lambda x: x.get("datetime", 0), reverse=True)
+    log_ids, log_ts, log_up, log_status, log_errors = _parse_logs(sorted_logs)
+    log_keep = _valid_timestamps(log_ts.astype(np.float64), now)
+    log_response = np.full(len(log_ts), np.nan)
+    log_response[log_up] = _nearest_values(log_ts[log_up], index_ts, index_values, index_ranks)
+
+    # Standalone response times: valid, non-negative, and no log within ±LOG_DEDUP_WINDOW
+    log_window = np.unique(log_ts)
+    with np.errstate(invalid="ignore"):
+        rt_keep = _valid_timestamps(rt_ts, now) & (rt_values >= 0)
+    rt_int = np.where(rt_keep, rt_ts, 0).astype(np.int64)
+    lo = np.searchsorted(log_window, rt_int - LOG_DEDUP_WINDOW, side="left")
+    hi = np.searchsorted(log_window, rt_int + LOG_DEDUP_WINDOW, side="right")
+    rt_keep &= hi <= lo
+    rt_int = rt_int[rt_keep]
+    n_rt = len(rt_int)
+
+    ids = np.concatenate([log_ids[log_keep], rt_int])
+    timestamps = np.concatenate([log_ts[log_keep], rt_int])
+    is_up = np.concatenate([log_up[log_keep], np.ones(n_rt, dtype=bool)])
+    status = np.concatenate([log_status[log_keep], np.full(n_rt, 200.0)])
+    response = np.concatenate([log_response[log_keep], rt_values[rt_keep]])
+    errors = np.concatenate([log_errors[log_keep], np.full(n_rt, None, dtype=object)])
+
+    # Newest first; stable so equal timestamps keep log-then-response-time order
+    order = np.argsort(-timestamps, kind="stable")
+    return _materialize(ids[order], timestamps[order], is_up[order], status[order], response[order], errors[order])
+
+
+def _materialize(ids, timestamps, is_up, status, response, errors) -> List[Dict[str, Any]]:
+    """Build rows shaped like a serialized UptimeCheckResponse"""
+    iso = np.char.add(np.datetime_as_string(timestamps.astype("datetime64[s]"), unit="s"), "Z")
+    status_obj = np.where(np.isnan(status), 0, status).astype(np.int64).astype(object)
+    status_obj[np.isnan(status)] = None
+    response_obj = response.astype(object)
+    response_obj[np.isnan(response)] = None
+    return [
+        {
+            "id": row_id,
+            "website_id": 0,
+            "timestamp": timestamp,
+            "status_code": status_code,
+            "response_time": response_time,
+            "is_up": up,
+            "error_message": error_message,
+        }
+        for row_id, timestamp, status_code, response_time, up, error_message in zip(
+            ids.tolist(), iso.tolist(), status_obj.tolist(), response_obj.tolist(), is_up.tolist(), errors.tolist()
+        )
+    ]
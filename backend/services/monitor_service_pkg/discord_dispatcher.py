@@ -0,0 +1,342 @@
+"""
+Async Discord webhook dispatcher.
+
+Callers hand it embeds with submit(), which only queues them and is safe
+to call from the event loop or from worker threads, so a slow or
+rate-limited webhook never holds up a request or an alert run. Each
+webhook gets its own queue and sender task:
+
+- embeds submitted together (within DISCORD_BATCH_SECONDS of the first)
+  go out as one message of up to 10 embeds / 6000 characters, Discord's
+  per-message limits;
+- the sender follows the webhook's rate-limit bucket from the
+  X-RateLimit-Remaining / X-RateLimit-Reset-After headers and waits for
+  the reset instead of sending into a 429;
+- a 429 anyway (shared or global limits) pauses the bucket, or every
+  webhook for a global one, for its retry_after and the message is
+  resent; 5xx and network errors back off like the UptimeRobot client.
+
+Buckets are tracked per process; with several workers the 429 handling
+keeps them in line.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from .rate_limit import RETRYABLE_STATUS_CODES, RetryPolicy, parse_retry_after
+
+logger = logging.getLogger(__name__)
+
+DISCORD_WEBHOOK_URL = os.getenv("DISCORD_WEBHOOK_URL")
+# Embeds submitted within this many seconds of the first are sent as one message
+DISCORD_BATCH_SECONDS = float(os.getenv("DISCORD_BATCH_SECONDS", 1))
+DISCORD_MAX_QUEUE = int(os.getenv("DISCORD_MAX_QUEUE", 1000))
+DISCORD_MAX_RETRIES = int(os.getenv("DISCORD_MAX_RETRIES", 5))
+# Give up on a message this many seconds after its first attempt
+DISCORD_SEND_DEADLINE = float(os.getenv("DISCORD_SEND_DEADLINE", 300))
+DISCORD_TIMEOUT = float(os.getenv("DISCORD_TIMEOUT", 10))
+# How long shutdown waits for queued messages to go out
+DISCORD_DRAIN_SECONDS = float(os.getenv("DISCORD_DRAIN_SECONDS", 5))
+
+DISCORD_EMBEDS_PER_MESSAGE = 10
+DISCORD_EMBED_TOTAL_LIMIT = 6000
+DISCORD_EMBED_TITLE_LIMIT = 256
+DISCORD_EMBED_DESCRIPTION_LIMIT = 4096
+
+COLOR_RED = 0xE74C3C
+COLOR_ORANGE = 0xE67E22
+COLOR_GREEN = 0x2ECC71
+COLOR_BLUE = 0x3498DB
+
+
+def make_embed(title: str, description: str, color: Optional[int] = None,
+               timestamp: Optional[datetime] = None) -> Dict[str, Any]:
+    """A Discord embed, clipped to the per-field limits"""
+    if len(title) > DISCORD_EMBED_TITLE_LIMIT:
+        title = title[:DISCORD_EMBED_TITLE_LIMIT - 1] + "…"
+    if len(description) > DISCORD_EMBED_DESCRIPTION_LIMIT:
+        description = description[:DISCORD_EMBED_DESCRIPTION_LIMIT - 1] + "…"
+    embed: Dict[str, Any] = {"title": title, "description": description}
+    if color is not None:
+        embed["color"] = color
+    if timestamp is not None:
+        # Naive datetimes are local time (datetime.now())
+        embed["timestamp"] = timestamp.astimezone().isoformat()
+    return embed
+
+
+def embed_size(embed: Dict[str, Any]) -> int:
+    """Characters counted against the 6000 per-message total"""
+    return len(embed.get("title", "")) + len(embed.get("description", ""))
+
+
+def webhook_label(url: str) -> str:
+    """Webhook id for logs and metrics; the token in the URL is a secret"""
+    parts = urlsplit(url).path.strip("/").split("/")
+    if "webhooks" in parts and parts.index("webhooks") + 1 < len(parts):
+        return parts[parts.index("webhooks") + 1]
+    return urlsplit(url).netloc
+
+
+class WebhookBucket:
+    """Rate-limit state of one webhook, from the X-RateLimit-* headers of its last response"""
+
+    def __init__(self):
+        self.bucket_id: Optional[str] = None
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None  # unknown until the first response
+        self.reset_at = 0.0  # monotonic
+
+    def delay(self, now: float) -> float:
+        if self.remaining is not None and self.remaining <= 0 and now < self.reset_at:
+            return self.reset_at - now
+        return 0.0
+
+    def take(self):
+        if self.remaining is not None:
+            self.remaining -= 1
+
+    def update(self, headers: httpx.Headers, now: float):
+        try:
+            if "X-RateLimit-Remaining" in headers:
+                self.remaining = int(headers["X-RateLimit-Remaining"])
+            if "X-RateLimit-Limit" in headers:
+                self.limit = int(headers["X-RateLimit-Limit"])
+            if "X-RateLimit-Reset-After" in headers:
+                self.reset_at = now + float(headers["X-RateLimit-Reset-After"])
+        except ValueError:
+            pass
+        self.bucket_id = headers.get("X-RateLimit-Bucket", self.bucket_id)
+
+    def pause(self, seconds: float, now: float):
+        self.remaining = 0
+        self.reset_at = max(self.reset_at, now + seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"bucket": self.bucket_id, "limit": self.limit, "remaining": self.remaining,
+                "reset_after": round(max(0.0, self.reset_at - time.monotonic()), 3)}
+
+
+def _retry_after(response: httpx.Response) -> float:
+    """429 wait: Discord's JSON retry_after (fractional seconds), else the Retry-After header"""
+    try:
+        return max(0.0, float(response.json()["retry_after"]))
+    except Exception:
+        return parse_retry_after(response.headers.get("Retry-After")) or 1.0
+
+
+def _is_global(response: httpx.Response) -> bool:
+    if response.headers.get("X-RateLimit-Global", "").lower() == "true":
+        return True
+    try:
+        return bool(response.json().get("global"))
+    except Exception:
+        return False
+
+
+class DiscordDispatcher:
+    """Queues embeds per webhook and posts them in batches within Discord's rate limits"""
+
+    def __init__(self, webhook_url: Optional[str] = DISCORD_WEBHOOK_URL, batch_seconds: float = DISCORD_BATCH_SECONDS,
+                 max_queue: int = DISCORD_MAX_QUEUE, retry_policy: Optional[RetryPolicy] = None,
+                 timeout: float = DISCORD_TIMEOUT):
+        self.webhook_url = webhook_url
+        self.batch_seconds = batch_seconds
+        self.max_queue = max_queue
+        self.retry_policy = retry_policy or RetryPolicy(max_retries=DISCORD_MAX_RETRIES)
+        self.timeout = timeout
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._workers: Dict[str, asyncio.Task] = {}
+        self._buckets: Dict[str, WebhookBucket] = {}
+        self._global_until = 0.0
+        self._unsent = 0  # queued or in flight
+        self.counters = {"submitted": 0, "messages": 0, "embeds_sent": 0, "rate_limited": 0, "throttled": 0,
+                         "throttle_wait_seconds": 0.0, "retried": 0, "failed": 0, "dropped": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._loop is not None
+
+    def submit(self, embed: Dict[str, Any], webhook_url: Optional[str] = None) -> bool:
+        """
+        Queue an embed for a webhook (the configured one by default) without
+        waiting for it to be sent; callable from any thread. Returns False if
+        there is no webhook, the dispatcher is not running or the queue is full
+        (from another thread a full queue is only logged).
+        """
+        url = webhook_url or self.webhook_url
+        if not url:
+            return False
+        loop = self._loop
+        if loop is None:
+            self.counters["dropped"] += 1
+            logger.warning("Discord dispatcher is not running, dropping message")
+            return False
+        try:
+            on_loop = asyncio.get_running_loop() is loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            return self._put(url, embed)
+        try:
+            loop.call_soon_threadsafe(self._put, url, embed)
+        except RuntimeError:  # loop already closed
+            return False
+        return True
+
+    def _put(self, url: str, embed: Dict[str, Any]) -> bool:
+        if self._loop is None:
+            self.counters["dropped"] += 1
+            return False
+        queue = self._queues.get(url)
+        if queue is None:
+            queue = self._queues[url] = asyncio.Queue(maxsize=self.max_queue)
+            self._buckets[url] = WebhookBucket()
+            self._workers[url] = asyncio.create_task(self._run_webhook(url, queue))
+        try:
+            queue.put_nowait(embed)
+        except asyncio.QueueFull:
+            self.counters["dropped"] += 1
+            logger.warning(f"Discord queue for webhook {webhook_label(url)} is full, dropping message")
+            return False
+        self.counters["submitted"] += 1
+        self._unsent += 1
+        return True
+
+    async def _wait_for(self, bucket: WebhookBucket):
+        """Sleep until the webhook's bucket (and the global limit) allows a request"""
+        while True:
+            now = time.monotonic()
+            wait = max(bucket.delay(now), self._global_until - now)
+            if wait <= 0:
+                return
+            self.counters["throttled"] += 1
+            self.counters["throttle_wait_seconds"] += wait
+            await asyncio.sleep(wait)
+
+    @staticmethod
+    def _next_message(queue: asyncio.Queue, pending: Deque[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Take as many queued embeds as fit in one message"""
+        embeds: List[Dict[str, Any]] = []
+        size = 0
+        while len(embeds) < DISCORD_EMBEDS_PER_MESSAGE:
+            if pending:
+                embed = pending.popleft()
+            else:
+                try:
+                    embed = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+            if embeds and size + embed_size(embed) > DISCORD_EMBED_TOTAL_LIMIT:
+                pending.appendleft(embed)
+                break
+            embeds.append(embed)
+            size += embed_size(embed)
+        return embeds
+
+    async def _send(self, url: str, bucket: WebhookBucket, embeds: List[Dict[str, Any]]) -> bool:
+        deadline = time.monotonic() + DISCORD_SEND_DEADLINE
+        attempt = 0
+        while True:
+            await self._wait_for(bucket)
+            bucket.take()
+            retry_after = None
+            try:
+                response = await self._client.post(url, json={"embeds": embeds})
+            except httpx.TransportError as e:
+                error = str(e) or type(e).__name__
+            else:
+                now = time.monotonic()
+                bucket.update(response.headers, now)
+                if response.status_code < 300:
+                    self.counters["messages"] += 1
+                    self.counters["embeds_sent"] += len(embeds)
+                    return True
+                error = f"HTTP {response.status_code}"
+                if response.status_code == 429:
+                    self.counters["rate_limited"] += 1
+                    retry_after = _retry_after(response)
+                    if _is_global(response):
+                        self._global_until = max(self._global_until, now + retry_after)
+                    else:
+                        bucket.pause(retry_after, now)
+                elif response.status_code not in RETRYABLE_STATUS_CODES:
+                    # Bad payload or a deleted webhook: resending won't help
+                    self.counters["failed"] += 1
+                    logger.error(f"❌ Discord webhook {webhook_label(url)} rejected a message: {error} {response.text[:200]}")
+                    return False
+
+            delay = self.retry_policy.next_delay(attempt, deadline, retry_after)
+            if delay is None:
+                self.counters["failed"] += 1
+                logger.error(f"❌ Discord webhook {webhook_label(url)} failed after {attempt + 1} attempts: {error}")
+                return False
+            self.counters["retried"] += 1
+            logger.warning(f"Discord webhook {webhook_label(url)} failed ({error}), retrying in {delay:.1f}s")
+            if retry_after is None:
+                await asyncio.sleep(delay)  # a 429's wait is already on the bucket
+            attempt += 1
+
+    async def _run_webhook(self, url: str, queue: asyncio.Queue):
+        bucket = self._buckets[url]
+        pending: Deque[Dict[str, Any]] = deque()  # an embed that did not fit in the last message
+        while True:
+            if not pending:
+                pending.append(await queue.get())
+                # Let alerts raised together land in the same message
+                await asyncio.sleep(self.batch_seconds)
+            # Anything queued while the bucket is exhausted joins the next message
+            await self._wait_for(bucket)
+            embeds = self._next_message(queue, pending)
+            try:
+                await self._send(url, bucket, embeds)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.counters["failed"] += 1
+                logger.error(f"❌ Discord webhook {webhook_label(url)} error: {e}")
+            finally:
+                self._unsent -= len(embeds)
+
+    def start(self):
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+            self._client = httpx.AsyncClient(timeout=self.timeout)
+            logger.info("✅ Discord dispatcher started")
+
+    async def stop(self, drain_seconds: float = DISCORD_DRAIN_SECONDS):
+        """Give queued messages up to `drain_seconds` to go out, then stop the senders"""
+        if self._loop is None:
+            return
+        deadline = time.monotonic() + drain_seconds
+        while self._unsent > 0 and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        if self._unsent > 0:
+            self.counters["dropped"] += self._unsent
+            logger.warning(f"Dropping {self._unsent} Discord message(s) still queued at shutdown")
+        self._loop = None
+        for task in self._workers.values():
+            task.cancel()
+        await asyncio.gather(*self._workers.values(), return_exceptions=True)
+        self._workers.clear()
+        self._queues.clear()
+        self._unsent = 0
+        await self._client.aclose()
+        self._client = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.counters, "queued": self._unsent,
+                "webhooks": {webhook_label(url): bucket.snapshot() for url, bucket in self._buckets.items()}}
+
+
+discord_dispatcher = DiscordDispatcher()
@@ -0,0 +1,137 @@
+"""
+Incident intervals.
+
+UptimeRobot logs are start/stop events; instead of expanding them into
+per-check rows, each outage is stored once in `incidents` as
+(monitor_id, start, end, reason, status_code). An ongoing incident has
+end = INCIDENT_OPEN_END so that every row has a comparable end.
+
+A monitor's incidents never overlap each other, so ordered by start they are
+also ordered by end: the incidents overlapping [start, end) are a contiguous
+run that begins at the first one ending after `start`. The
+(monitor_id, end_ts) index seeks to that first incident per monitor; only the
+`end_ts > start` bound can use the index, so the scan then reads every incident
+ending after `start`, including those that begin after `end`, and filters them
+on start_ts. That is the k matches for recent windows (the /stats case) but
+grows with the incidents since `start` for windows far in the past.
+
+Incidents are extended as new logs reach the check store; a log at or before
+the latest stored transition rebuilds the monitor's incidents from its logs.
+"""
+
+import calendar
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from database.AuthDB import SessionLocal, Incident, INCIDENT_OPEN_END, UptimeCheck
+from .sla import UPTIMEROBOT_LOG_DOWN, UPTIMEROBOT_LOG_NOT_DOWN
+
+DEFAULT_REASON = "Monitor was down"
+
+
+def _events(rows: Iterable[Dict[str, Any]]) -> List[Tuple[int, bool, Optional[str], Optional[int]]]:
+    """(unix seconds, is_down, reason, status_code) for stored log rows, oldest first"""
+    events = []
+    for row in rows:
+        if row.get("source") != "log":
+            continue
+        log_type = row.get("log_type")
+        if log_type != UPTIMEROBOT_LOG_DOWN and log_type not in UPTIMEROBOT_LOG_NOT_DOWN:
+            continue
+        events.append((
+            calendar.timegm(row["timestamp"].utctimetuple()),
+            log_type == UPTIMEROBOT_LOG_DOWN,
+            row.get("error_message") or DEFAULT_REASON,
+            row.get("status_code"),
+        ))
+    events.sort(key=lambda e: e[0])
+    return events
+
+
+def _fold(monitor_id: int, events, current: Optional[Incident]) -> List[Dict[str, Any]]:
+    """Open / close incidents for `events`; `current` is the stored ongoing incident, if any"""
+    new_incidents = []
+    for ts, is_down, reason, status_code in events:
+        if is_down:
+            if current is None:
+                current = {"monitor_id": monitor_id, "start_ts": ts, "end_ts": INCIDENT_OPEN_END,
+                           "reason": reason, "status_code": status_code}
+                new_incidents.append(current)
+        elif current is not None:
+            if isinstance(current, dict):
+                current["end_ts"] = ts
+            else:
+                current.end_ts = ts
+            current = None
+    return new_incidents
+
+
+def _latest_incident(db: Session, monitor_id: int) -> Optional[Incident]:
+    return db.scalars(
+        select(Incident).where(Incident.monitor_id == monitor_id)
+        .order_by(Incident.end_ts.desc()).limit(1)
+    ).first()
+
+
+def rebuild_incidents(db: Session, monitor_id: int):
+    """Recompute a monitor's incidents from every stored log; the caller commits"""
+    rows = db.execute(
+        select(UptimeCheck.timestamp, UptimeCheck.log_type, UptimeCheck.error_message, UptimeCheck.status_code)
+        .where(UptimeCheck.website_id == monitor_id, UptimeCheck.source == "log")
+    ).all()
+    events = _events({"source": "log", "timestamp": timestamp, "log_type": log_type,
+                      "error_message": error_message, "status_code": status_code}
+                     for timestamp, log_type, error_message, status_code in rows)
+    db.execute(delete(Incident).where(Incident.monitor_id == monitor_id))
+    new_incidents = _fold(monitor_id, events, None)
+    if new_incidents:
+        db.execute(insert(Incident), new_incidents)
+
+
+def extend_incidents(db: Session, monitor_id: int, rows: List[Dict[str, Any]]):
+    """Open / close incidents for newly stored check rows; the caller commits"""
+    events = _events(rows)
+    if not events:
+        return
+    latest = _latest_incident(db, monitor_id)
+    if latest is not None:
+        last_transition = latest.start_ts if latest.end_ts == INCIDENT_OPEN_END else latest.end_ts
+        if events[0][0] <= last_transition:
+            db.flush()
+            rebuild_incidents(db, monitor_id)
+            return
+    ongoing = latest if latest is not None and latest.end_ts == INCIDENT_OPEN_END else None
+    new_incidents = _fold(monitor_id, events, ongoing)
+    if new_incidents:
+        db.execute(insert(Incident), new_incidents)
+
+
+def _as_dict(incident: Incident) -> Dict[str, Any]:
+    ongoing = incident.end_ts == INCIDENT_OPEN_END
+    return {
+        "id": incident.id,
+        "monitor_id": incident.monitor_id,
+        "start": incident.start_ts,
+        "end": None if ongoing else incident.end_ts,
+        "duration_seconds": None if ongoing else incident.end_ts - incident.start_ts,
+        "ongoing": ongoing,
+        "reason": incident.reason,
+        "status_code": incident.status_code,
+    }
+
+
+def incidents_overlapping(monitor_ids: List[int], start: int, end: int) -> List[Dict[str, Any]]:
+    """Incidents of any of `monitor_ids` that overlap [start, end), oldest first; reads every incident ending after `start`"""
+    if not monitor_ids:
+        return []
+    with SessionLocal() as db:
+        incidents = db.scalars(
+            select(Incident).where(
+                Incident.monitor_id.in_(monitor_ids),
+                Incident.end_ts > start,
+                Incident.start_ts < end,
+            ).order_by(Incident.start_ts, Incident.monitor_id)
+        ).all()
+        return [_as_dict(incident) for incident in incidents]
@@ -0,0 +1,330 @@
+"""
+Built-in asyncio HTTP prober.
+
+Checks every active row of the `monitors` table at its configured interval
+without UptimeRobot. Each probe is a single HTTP/1.1 GET over raw asyncio
+streams so every phase can be timed separately: DNS resolution, TCP connect,
+TLS handshake, time to first byte after the request is written, and total.
+Results are batched into the local check store (source "probe"), which keeps
+the rollups up to date.
+
+Each monitor has its own timer in a hashed timing wheel: the first check is
+jittered uniformly across the monitor's interval (so 10k monitors don't all
+fire in the same second), later checks follow at a fixed rate, and adding,
+editing or removing a monitor moves only its own timer in O(1).
+
+Concurrency is bounded twice: a global semaphore caps in-flight probes per
+process and a per-host semaphore keeps many monitors on one host from
+opening a burst of connections to it.
+
+With PROBER_SHARDING every worker process runs a prober and schedules only
+the monitors the consistent-hash ring assigns to it (see sharding.py).
+"""
+
+import asyncio
+import logging
+import os
+import random
+import socket
+import ssl
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from database.MonitorDB import get_active_monitors
+from .check_store import store_probe_results
+from .sharding import PROBER_SHARDING, SHARD_HEARTBEAT_SECONDS, ShardMembership
+from .timing_wheel import LagStats, TimingWheel
+
+logger = logging.getLogger(__name__)
+
+# On by default only when there is no UptimeRobot API key to take the checks from
+PROBER_ENABLED = os.getenv("PROBER_ENABLED", "false" if os.getenv("UPTIMEROBOT_API_KEY") else "true").lower() in ("1", "true", "yes")
+PROBER_MAX_CONCURRENCY = int(os.getenv("PROBER_MAX_CONCURRENCY", 1000))
+PROBER_PER_HOST_CONCURRENCY = int(os.getenv("PROBER_PER_HOST_CONCURRENCY", 4))
+PROBER_TIMEOUT = float(os.getenv("PROBER_TIMEOUT", 30))
+PROBER_MIN_INTERVAL = int(os.getenv("PROBER_MIN_INTERVAL", 30))
+PROBER_DEFAULT_INTERVAL = 300
+# How often the monitor list is re-read and buffered results are written to the check store
+PROBER_REFRESH_SECONDS = float(os.getenv("PROBER_REFRESH_SECONDS", 60))
+PROBER_FLUSH_SECONDS = float(os.getenv("PROBER_FLUSH_SECONDS", 5))
+# Timing-wheel resolution: checks fire at most this late
+PROBER_TICK_SECONDS = float(os.getenv("PROBER_TICK_SECONDS", 0.25))
+# The body is read (for the total timing) up to this many bytes
+PROBER_MAX_BODY_BYTES = 64 * 1024
+USER_AGENT = "TheWatcher-Prober/1.0"
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 2)
+
+
+def _result(monitor_id: int, started: float, **fields) -> Dict[str, Any]:
+    result = {
+        "monitor_id": monitor_id,
+        "timestamp": int(started),
+        "status_code": None,
+        "is_up": False,
+        "error_message": None,
+        "dns_ms": None,
+        "connect_ms": None,
+        "tls_ms": None,
+        "ttfb_ms": None,
+        "response_time": None,
+    }
+    result.update(fields)
+    return result
+
+
+def _target(url: str) -> Tuple[str, Optional[str], int, str, bool]:
+    """(scheme, host, port, request path, is https) of a monitor URL; bare hosts are http"""
+    parts = urlsplit(url if "://" in url else f"http://{url}")
+    secure = parts.scheme == "https"
+    port = parts.port or (443 if secure else 80)
+    path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+    return parts.scheme, parts.hostname, port, path, secure
+
+
+async def _read_response(reader: asyncio.StreamReader, status_line: bytes) -> int:
+    """Status code of the response; consumes headers and up to PROBER_MAX_BODY_BYTES of body"""
+    parts = status_line.decode("latin-1").split()
+    if len(parts) < 2 or not parts[0].startswith("HTTP/") or not parts[1].isdigit():
+        raise ConnectionError(f"invalid status line {status_line[:80]!r}")
+    status_code = int(parts[1])
+
+    content_length = None
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length" and value.strip().isdigit():
+            content_length = int(value.strip())
+
+    remaining = PROBER_MAX_BODY_BYTES if content_length is None else min(content_length, PROBER_MAX_BODY_BYTES)
+    while remaining > 0:
+        chunk = await reader.read(min(remaining, 16384))
+        if not chunk:
+            break
+        remaining -= len(chunk)
+    return status_code
+
+
+async def probe_url(monitor_id: int, url: str, ssl_context: ssl.SSLContext, timings: Dict[str, Any]) -> Dict[str, Any]:
+    """One timed GET; phase timings are written into `timings` as they complete so a timeout keeps them"""
+    started = time.time()
+    scheme, host, port, path, secure = _target(url)
+    if scheme not in ("http", "https") or not host:
+        return _result(monitor_id, started, error_message=f"Unsupported URL: {url}")
+
+    loop = asyncio.get_running_loop()
+    writer = None
+    t0 = time.perf_counter()
+    try:
+        try:
+            addresses = await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            return _result(monitor_id, started, error_message=f"DNS lookup failed: {e}")
+        t_dns = time.perf_counter()
+        timings["dns_ms"] = _ms(t_dns - t0)
+
+        family, _, _, _, sockaddr = addresses[0]
+        reader, writer = await asyncio.open_connection(sockaddr[0], sockaddr[1], family=family)
+        t_connect = time.perf_counter()
+        timings["connect_ms"] = _ms(t_connect - t_dns)
+
+        if secure:
+            await writer.start_tls(ssl_context, server_hostname=host)
+            timings["tls_ms"] = _ms(time.perf_counter() - t_connect)
+
+        host_header = host if port == (443 if secure else 80) else f"{host}:{port}"
+        writer.write(
+            f"GET {path} HTTP/1.1\r\nHost: {host_header}\r\nUser-Agent: {USER_AGENT}\r\n"
+            f"Accept: */*\r\nConnection: close\r\n\r\n".encode("latin-1")
+        )
+        await writer.drain()
+        t_sent = time.perf_counter()
+        status_line = await reader.readline()
+        timings["ttfb_ms"] = _ms(time.perf_counter() - t_sent)
+        status_code = await _read_response(reader, status_line)
+        timings["response_time"] = _ms(time.perf_counter() - t0)
+        return _result(monitor_id, started, status_code=status_code, is_up=status_code < 400,
+                       error_message=None if status_code < 400 else f"HTTP {status_code}", **timings)
+    except ssl.SSLError as e:
+        return _result(monitor_id, started, error_message=f"TLS error: {e.reason or e}", **timings)
+    except (OSError, ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError) as e:
+        return _result(monitor_id, started, error_message=f"{type(e).__name__}: {e}", **timings)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+class Prober:
+    """Probes the monitors table on each monitor's interval and buffers results for the check store"""
+
+    def __init__(self, max_concurrency: int = PROBER_MAX_CONCURRENCY,
+                 per_host_concurrency: int = PROBER_PER_HOST_CONCURRENCY, timeout: float = PROBER_TIMEOUT,
+                 shard: Optional[ShardMembership] = None):
+        self.timeout = timeout
+        self.shard = shard
+        self._global = asyncio.Semaphore(max_concurrency)
+        self._hosts: Dict[str, asyncio.Semaphore] = defaultdict(lambda: asyncio.Semaphore(per_host_concurrency))
+        self._ssl = ssl.create_default_context()
+        self._monitors: Dict[int, Dict[str, Any]] = {}
+        self._table: Dict[int, Dict[str, Any]] = {}  # last read of the monitors table, before sharding
+        self._wheel = TimingWheel(tick_seconds=PROBER_TICK_SECONDS)
+        self.lag = LagStats()
+        self._inflight: Dict[int, asyncio.Task] = {}
+        self._results: List[Dict[str, Any]] = []
+        self._task: Optional[asyncio.Task] = None
+        self.counters = {"probes": 0, "failures": 0, "timeouts": 0, "skipped_overlap": 0, "flush_errors": 0}
+
+    async def probe(self, monitor_id: int, url: str) -> Dict[str, Any]:
+        """Probe one URL within the global and per-host concurrency limits"""
+        host = _target(url)[1] or url
+        # Host slot first, so probes queued behind a busy host don't hold global slots
+        async with self._hosts[host], self._global:
+            timings: Dict[str, Any] = {}
+            started = time.time()
+            try:
+                result = await asyncio.wait_for(probe_url(monitor_id, url, self._ssl, timings), self.timeout)
+            except asyncio.TimeoutError:
+                self.counters["timeouts"] += 1
+                result = _result(monitor_id, started, error_message=f"Timed out after {self.timeout:g}s", **timings)
+        self.counters["probes"] += 1
+        if not result["is_up"]:
+            self.counters["failures"] += 1
+        return result
+
+    async def probe_many(self, targets: Iterable[Tuple[int, str]]) -> List[Dict[str, Any]]:
+        return await asyncio.gather(*(self.probe(monitor_id, url) for monitor_id, url in targets))
+
+    async def _probe_and_buffer(self, monitor_id: int, url: str):
+        try:
+            self._results.append(await self.probe(monitor_id, url))
+        finally:
+            self._inflight.pop(monitor_id, None)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def _interval(self, interval: Optional[int]) -> int:
+        return max(PROBER_MIN_INTERVAL, int(interval or PROBER_DEFAULT_INTERVAL))
+
+    def schedule_monitor(self, monitor_id: int, site_url: Optional[str] = None, interval: Optional[int] = None):
+        """Add a monitor or update its URL / interval; only its own timer moves"""
+        if self.shard is not None and not self.shard.owns(monitor_id):
+            # Another worker's shard (it may have been ours before a rebalance)
+            self.unschedule_monitor(monitor_id)
+            return
+        monitor = self._monitors.get(monitor_id)
+        now = time.monotonic()
+        if monitor is None:
+            if not site_url:
+                return
+            interval = self._interval(interval)
+            self._monitors[monitor_id] = {"monitorid": monitor_id, "site_url": site_url, "interval": interval}
+            self._wheel.schedule(monitor_id, now + random.uniform(0, interval))
+            return
+        if site_url:
+            monitor["site_url"] = site_url
+        if interval is not None and self._interval(interval) != monitor["interval"]:
+            monitor["interval"] = self._interval(interval)
+            due = self._wheel.due_at(monitor_id)
+            self._wheel.schedule(monitor_id, min(due, now + monitor["interval"]) if due else now + monitor["interval"])
+
+    def unschedule_monitor(self, monitor_id: int):
+        self._monitors.pop(monitor_id, None)
+        self._wheel.cancel(monitor_id)
+
+    async def _refresh_monitors(self):
+        """Reconcile the schedule with the monitors table (catches changes made outside the API)"""
+        result = await asyncio.to_thread(get_active_monitors)
+        if not result.get("success"):
+            logger.error(f"Prober could not load monitors: {result.get('message')}")
+            return
+        self._table = {monitor["monitorid"]: monitor for monitor in result["data"] if monitor.get("site_url")}
+        self._apply_table()
+
+    def _apply_table(self):
+        for monitor_id in list(self._monitors):
+            if monitor_id not in self._table:
+                self.unschedule_monitor(monitor_id)
+        for monitor_id, monitor in self._table.items():
+            # A NULL interval keeps whatever the monitor is already scheduled with
+            self.schedule_monitor(monitor_id, monitor["site_url"], monitor.get("interval"))
+
+    def _fire_due(self, now: float):
+        for monitor_id, due in self._wheel.advance(now):
+            monitor = self._monitors.get(monitor_id)
+            if monitor is None:
+                continue
+            self.lag.record(now - due)
+            # Fixed rate from the scheduled time, so lag doesn't accumulate; after a stall longer
+            # than the interval, restart from now instead of firing a burst of catch-up checks
+            next_due = due + monitor["interval"]
+            self._wheel.schedule(monitor_id, next_due if next_due > now else now + monitor["interval"])
+            if monitor_id in self._inflight:
+                self.counters["skipped_overlap"] += 1
+                continue
+            self._inflight[monitor_id] = asyncio.create_task(self._probe_and_buffer(monitor_id, monitor["site_url"]))
+
+    async def flush(self):
+        """Write buffered results to the check store"""
+        if not self._results:
+            return
+        batch, self._results = self._results, []
+        try:
+            await asyncio.to_thread(store_probe_results, batch)
+        except SQLAlchemyError as e:
+            self.counters["flush_errors"] += 1
+            logger.error(f"Failed to store {len(batch)} probe results: {e}")
+
+    async def _run(self):
+        last_refresh = last_flush = last_heartbeat = float("-inf")
+        while True:
+            now = time.monotonic()
+            if self.shard is not None and now - last_heartbeat >= SHARD_HEARTBEAT_SECONDS:
+                # Join (or rebalance) before the first table read so only our shard is ever scheduled
+                if await self.shard.refresh():
+                    self._apply_table()
+                last_heartbeat = now
+            if now - last_refresh >= PROBER_REFRESH_SECONDS:
+                await self._refresh_monitors()
+                last_refresh = now
+            self._fire_due(time.monotonic())
+            if now - last_flush >= PROBER_FLUSH_SECONDS:
+                await self.flush()
+                last_flush = now
+            await asyncio.sleep(max(0.0, self._wheel.tick_seconds - (time.monotonic() - now)))
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("✅ Built-in prober started")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            if self.shard is not None:
+                await self.shard.leave()
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {**self.counters, "monitors": len(self._monitors), "in_flight": len(self._inflight),
+                 "scheduler": {"scheduled": len(self._wheel), **self.lag.snapshot()}}
+        if self.shard is not None:
+            stats["shard"] = self.shard.stats()
+        return stats
+
+
+prober = Prober(shard=ShardMembership() if PROBER_SHARDING else None)
@@ -0,0 +1,143 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+# UptimeRobot documents 10 req/min on the free plan and (2 x monitor limit) req/min,
+# capped at 5000, on paid plans. Set the account's figure here.
+# The burst defaults to a tenth of that: 1 on the free plan, so calls are spaced 6s apart
+# and listing N pages of monitors takes about 6 x N seconds. Raise it only if the account
+# tolerates bursts; 429s are still retried with Retry-After.
+UPTIMEROBOT_RATE_LIMIT_PER_MINUTE = float(os.getenv("UPTIMEROBOT_RATE_LIMIT_PER_MINUTE", 10))
+UPTIMEROBOT_RATE_LIMIT_BURST = float(os.getenv("UPTIMEROBOT_RATE_LIMIT_BURST", max(1, UPTIMEROBOT_RATE_LIMIT_PER_MINUTE // 10)))
+UPTIMEROBOT_MAX_RETRIES = int(os.getenv("UPTIMEROBOT_MAX_RETRIES", 4))
+UPTIMEROBOT_CALL_DEADLINE = float(os.getenv("UPTIMEROBOT_CALL_DEADLINE", 60))
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class UptimeRobotAPIError(Exception):
+    """
+    Raised when an UptimeRobot call is still failing after its retries or deadline.
+    The client methods let it through instead of returning an empty result, and
+    the app answers it with 503 (see main.py).
+    """
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket usable from both threads and the event loop.
+    Callers reserve a token up front (the balance may go negative) and then
+    sleep for their slot, so waiters are served in arrival order.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: float):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = burst
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self, deadline: Optional[float]) -> Optional[float]:
+        """Take a token and return how long to wait for it, or None if that would pass `deadline`"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            wait = max(0.0, -(self.tokens - 1) / self.rate, self.paused_until - now)
+            if deadline is not None and now + wait > deadline:
+                return None
+            self.tokens -= 1
+            return wait
+
+    def acquire(self, deadline: Optional[float] = None) -> Optional[float]:
+        wait = self._reserve(deadline)
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, deadline: Optional[float] = None) -> Optional[float]:
+        wait = self._reserve(deadline)
+        if wait:
+            await asyncio.sleep(wait)
+        return wait
+
+    def pause(self, seconds: float):
+        """Hold every caller back, e.g. after a 429 with Retry-After"""
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+class RetryPolicy:
+    """Jittered exponential backoff that defers to the server's Retry-After"""
+
+    def __init__(self, max_retries: int = UPTIMEROBOT_MAX_RETRIES, base_delay: float = 1.0, max_delay: float = 30.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def next_delay(self, attempt: int, deadline: float, retry_after: Optional[float] = None) -> Optional[float]:
+        """Seconds to wait before retry number `attempt` + 1, or None to give up"""
+        if attempt >= self.max_retries:
+            return None
+        if retry_after is not None:
+            delay = retry_after
+        else:
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        if time.monotonic() + delay >= deadline:
+            return None
+        return delay
+
+
+class CallMetrics:
+    """Counters for UptimeRobot calls, exposed through /api/v1/metrics"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {
+            "calls": 0,
+            "throttled": 0,
+            "throttle_wait_seconds": 0.0,
+            "rate_limited": 0,
+            "retried": 0,
+            "failed": 0,
+            "deadline_exceeded": 0,
+        }
+
+    def incr(self, name: str, amount: float = 1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def record_throttle(self, wait: Optional[float]):
+        if wait:
+            with self._lock:
+                self.counters["throttled"] += 1
+                self.counters["throttle_wait_seconds"] += wait
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.counters)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After is either delta-seconds or an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+# Shared by UptimeRobotAPI and AsyncUptimeRobotAPI so the whole process stays under the account limit
+uptime_rate_limiter = TokenBucket(UPTIMEROBOT_RATE_LIMIT_PER_MINUTE, UPTIMEROBOT_RATE_LIMIT_BURST)
+uptime_retry_policy = RetryPolicy()
+uptime_call_metrics = CallMetrics()
@@ -0,0 +1,236 @@
+"""
+Minute / hour / day rollups of stored checks.
+
+Every batch of checks written to the check store is folded into per-monitor
+buckets (up/down counts and latency sum/count/min/max) in the same
+transaction. A window query is split into the coarsest buckets that cover it
+(whole days in the middle, whole hours at the edges, minutes at the very
+edges), so "last 6 hours" or "last quarter" reads at most a few hundred rows
+regardless of how many raw checks the window contains.
+
+Minute and hour buckets are pruned after their retention, so an edge older
+than that is rounded outward to the finest granularity still kept for its age.
+
+Check counts and latency come from the buckets; the uptime percentage of a
+monitor with UptimeRobot logs comes from its downtime series (sla.py), since a
+down log is one event however long the outage lasted.
+"""
+
+import calendar
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, func, insert, or_, select
+from sqlalchemy.orm import Session
+
+from database.AuthDB import SessionLocal, CheckRollup
+from .sla import has_downtime_series, window_sla
+
+MINUTE = 60
+HOUR = 3600
+DAY = 86400
+BUCKET_SIZES = (DAY, HOUR, MINUTE)  # coarsest first
+
+# Fine-grained buckets are only needed near "now"; older edges are rounded out to hours / days
+MINUTE_RETENTION_HOURS = int(os.getenv("ROLLUP_MINUTE_RETENTION_HOURS", 48))
+HOUR_RETENTION_DAYS = int(os.getenv("ROLLUP_HOUR_RETENTION_DAYS", 90))
+
+# UptimeRobot log types that are check results (98 started / 99 paused are not)
+LOG_CHECK_TYPES = (1, 2)
+
+
+def _check_sample(row: Dict[str, Any]) -> Optional[Tuple[int, bool, Optional[float]]]:
+    """(unix seconds, is_up, latency ms) for a stored check row, or None if it is not a check result"""
+    if row.get("source") == "log" and row.get("log_type") not in LOG_CHECK_TYPES:
+        return None
+    timestamp = calendar.timegm(row["timestamp"].utctimetuple())
+    return timestamp, bool(row.get("is_up")), row.get("response_time")
+
+
+def _bucket_deltas(rows: Iterable[Dict[str, Any]]) -> Dict[Tuple[int, int], Dict[str, Any]]:
+    deltas: Dict[Tuple[int, int], Dict[str, Any]] = {}
+    for row in rows:
+        sample = _check_sample(row)
+        if sample is None:
+            continue
+        timestamp, is_up, latency = sample
+        for size in BUCKET_SIZES:
+            key = (size, timestamp - timestamp % size)
+            bucket = deltas.get(key)
+            if bucket is None:
+                bucket = deltas[key] = {"up": 0, "down": 0, "sum": 0.0, "count": 0, "min": None, "max": None}
+            if is_up:
+                bucket["up"] += 1
+            else:
+                bucket["down"] += 1
+            if latency is not None:
+                bucket["sum"] += latency
+                bucket["count"] += 1
+                bucket["min"] = latency if bucket["min"] is None else min(bucket["min"], latency)
+                bucket["max"] = latency if bucket["max"] is None else max(bucket["max"], latency)
+    return deltas
+
+
+def apply_rollups(db: Session, monitor_id: int, rows: List[Dict[str, Any]]):
+    """Fold newly stored check rows into the monitor's buckets; the caller commits"""
+    deltas = _bucket_deltas(rows)
+    if not deltas:
+        return
+
+    # One read for every touched bucket: a start range per granularity
+    ranges = []
+    for size in BUCKET_SIZES:
+        starts = [start for bucket_size, start in deltas if bucket_size == size]
+        ranges.append(and_(CheckRollup.bucket_seconds == size,
+                           CheckRollup.bucket_start.between(min(starts), max(starts))))
+    existing = {
+        (rollup.bucket_seconds, rollup.bucket_start): rollup
+        for rollup in db.scalars(
+            select(CheckRollup).where(CheckRollup.monitor_id == monitor_id, or_(*ranges))
+        )
+    }
+
+    new_buckets = []
+    for (size, start), delta in deltas.items():
+        rollup = existing.get((size, start))
+        if rollup is None:
+            new_buckets.append({
+                "monitor_id": monitor_id, "bucket_seconds": size, "bucket_start": start,
+                "up_count": delta["up"], "down_count": delta["down"],
+                "latency_sum": delta["sum"], "latency_count": delta["count"],
+                "latency_min": delta["min"], "latency_max": delta["max"],
+            })
+            continue
+        rollup.up_count += delta["up"]
+        rollup.down_count += delta["down"]
+        rollup.latency_sum += delta["sum"]
+        rollup.latency_count += delta["count"]
+        if delta["min"] is not None:
+            rollup.latency_min = delta["min"] if rollup.latency_min is None else min(rollup.latency_min, delta["min"])
+            rollup.latency_max = delta["max"] if rollup.latency_max is None else max(rollup.latency_max, delta["max"])
+    if new_buckets:
+        db.execute(insert(CheckRollup), new_buckets)
+
+
+def _retention_cutoff(size: int, now: int) -> Optional[int]:
+    """Oldest bucket start of a granularity that prune_rollups keeps (None: kept forever)"""
+    if size == MINUTE:
+        return now - MINUTE_RETENTION_HOURS * HOUR
+    if size == HOUR:
+        return now - HOUR_RETENTION_DAYS * DAY
+    return None
+
+
+def _retained(size: int, bucket_start: int, now: int) -> bool:
+    cutoff = _retention_cutoff(size, now)
+    return cutoff is None or bucket_start >= cutoff
+
+
+def _cover(start: int, end: int, sizes: Tuple[int, ...]) -> List[Tuple[int, int, int]]:
+    if start >= end:
+        return []
+    size = sizes[0]
+    if len(sizes) == 1:
+        return [(size, start - start % size, end + (-end % size))]
+    first = start + (-start % size)
+    last = end - end % size
+    if first >= last:
+        return _cover(start, end, sizes[1:])
+    return _cover(start, first, sizes[1:]) + [(size, first, last)] + _cover(last, end, sizes[1:])
+
+
+def decompose_window(start: int, end: int, sizes: Tuple[int, ...] = BUCKET_SIZES,
+                     now: Optional[int] = None) -> List[Tuple[int, int, int]]:
+    """Cover [start, end) with the coarsest buckets: (bucket_seconds, first_start, end_start) ranges.
+
+    The finest level is widened to whole buckets, so the window is effectively
+    rounded out to the minute. With `now`, the part of the window older than a
+    granularity's retention is covered with the coarser levels only, so its
+    edge is rounded out to the hour / day instead of reading pruned buckets.
+    """
+    ranges = []
+    if now is not None:
+        # Oldest stretch first: each one ends on a boundary from which the next finer level is kept
+        for i in range(1, len(sizes)):
+            finer = sizes[i]
+            if start >= end or _retained(finer, start - start % finer, now):
+                continue
+            cutoff = _retention_cutoff(finer, now)
+            boundary = min(end, cutoff + (-cutoff % sizes[i - 1]))
+            ranges += _cover(start, boundary, sizes[:i])
+            start = boundary
+    return ranges + _cover(start, end, sizes)
+
+
+def window_summary(monitor_id: int, start: int, end: int) -> Dict[str, Any]:
+    """
+    Uptime and latency over [start, end) (unix seconds).
+
+    Check counts and latency are read from the rollup buckets, with edges older
+    than a granularity's retention rounded outward. Uptime is the share of time
+    not covered by the downtime series when the monitor has UptimeRobot logs;
+    built-in prober checks run on a fixed interval, so for those the share of
+    up checks is already the share of time.
+    """
+    up = down = latency_count = 0
+    latency_sum = 0.0
+    latency_min = latency_max = None
+    sla = None
+    now = int(time.time())
+    with SessionLocal() as db:
+        # One primary-key range scan per granularity (an OR across ranges defeats the index)
+        for size, lo, hi in decompose_window(start, end, now=now):
+            row = db.execute(
+                select(
+                    func.sum(CheckRollup.up_count), func.sum(CheckRollup.down_count),
+                    func.sum(CheckRollup.latency_sum), func.sum(CheckRollup.latency_count),
+                    func.min(CheckRollup.latency_min), func.max(CheckRollup.latency_max),
+                ).where(CheckRollup.monitor_id == monitor_id, CheckRollup.bucket_seconds == size,
+                        CheckRollup.bucket_start >= lo, CheckRollup.bucket_start < hi)
+            ).one()
+            up += row[0] or 0
+            down += row[1] or 0
+            latency_sum += row[2] or 0.0
+            latency_count += row[3] or 0
+            if row[4] is not None:
+                latency_min = row[4] if latency_min is None else min(latency_min, row[4])
+                latency_max = row[5] if latency_max is None else max(latency_max, row[5])
+        # An ongoing outage must not count the part of the window that is still in the future
+        elapsed_end = min(end, now)
+        if elapsed_end > start and has_downtime_series(db, monitor_id):
+            sla = window_sla(db, monitor_id, start, elapsed_end)
+
+    total = up + down
+    if sla is not None:
+        uptime = round(100.0 * (1 - sla["downtime_seconds"] / (sla["end"] - start)), 3)
+    else:
+        uptime = round(up * 100.0 / total, 3) if total else 0.0
+    return {
+        "monitor_id": monitor_id,
+        "start": start,
+        "end": end,
+        "up_count": up,
+        "down_count": down,
+        "total_checks": total,
+        "uptime_percentage": uptime,
+        "downtime_seconds": sla["downtime_seconds"] if sla is not None else None,
+        "average_response_time": round(latency_sum / latency_count, 2) if latency_count else 0,
+        "min_response_time": latency_min,
+        "max_response_time": latency_max,
+    }
+
+
+def prune_rollups(now: Optional[float] = None):
+    """Drop minute / hour buckets past their retention; day buckets are kept"""
+    now = int(now if now is not None else time.time())
+    with SessionLocal() as db:
+        db.execute(delete(CheckRollup).where(
+            or_(
+                and_(CheckRollup.bucket_seconds == MINUTE,
+                     CheckRollup.bucket_start < now - MINUTE_RETENTION_HOURS * HOUR),
+                and_(CheckRollup.bucket_seconds == HOUR,
+                     CheckRollup.bucket_start < now - HOUR_RETENTION_DAYS * DAY),
+            )
+        ))
+        db.commit()
@@ -0,0 +1,105 @@
+"""
+Consistent-hash sharding of monitors over prober workers.
+
+Every prober process (uvicorn worker or node) heartbeats its worker id into
+the `prober_workers` table and reads back the ids that are still alive. The
+live ids are placed on a hash ring (each at SHARD_VNODES points, so shards
+come out even), and a monitor belongs to the first worker clockwise from
+the hash of its id. All workers see the same member list and so compute the
+same assignment without talking to each other.
+
+When a worker joins or its heartbeat expires only the monitors on the arcs it
+gains or loses move (about 1/N of them); everything else stays where it is.
+"""
+
+import asyncio
+import bisect
+import hashlib
+import logging
+import os
+import socket
+import uuid
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional
+
+from database.MonitorDB import heartbeat_prober_worker, remove_prober_worker
+
+logger = logging.getLogger(__name__)
+
+PROBER_SHARDING = os.getenv("PROBER_SHARDING", "false").lower() in ("1", "true", "yes")
+SHARD_VNODES = int(os.getenv("SHARD_VNODES", 64))
+SHARD_HEARTBEAT_SECONDS = float(os.getenv("SHARD_HEARTBEAT_SECONDS", 10))
+# A worker whose last heartbeat is older than this has left the ring
+SHARD_MEMBER_TTL_SECONDS = float(os.getenv("SHARD_MEMBER_TTL_SECONDS", 30))
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], "big")
+
+
+class HashRing:
+    def __init__(self, nodes: Iterable[str] = (), vnodes: int = SHARD_VNODES):
+        self.vnodes = vnodes
+        self.nodes = frozenset(nodes)
+        points = sorted((_hash(f"{node}#{i}"), node) for node in self.nodes for i in range(vnodes))
+        self._hashes = [point for point, _ in points]
+        self._owners = [node for _, node in points]
+
+    def node_for(self, key: Hashable) -> Optional[str]:
+        if not self._hashes:
+            return None
+        i = bisect.bisect(self._hashes, _hash(str(key)))
+        return self._owners[i % len(self._owners)]
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+class ShardMembership:
+    """This worker's view of the ring; `refresh()` heartbeats and rebuilds the ring when members change"""
+
+    def __init__(
+        self,
+        worker_id: Optional[str] = None,
+        ttl_seconds: float = SHARD_MEMBER_TTL_SECONDS,
+        vnodes: int = SHARD_VNODES,
+        heartbeat: Callable[[str, float], Dict[str, Any]] = heartbeat_prober_worker,
+        leave: Callable[[str], Dict[str, Any]] = remove_prober_worker,
+    ):
+        self.worker_id = worker_id or default_worker_id()
+        self.ttl_seconds = ttl_seconds
+        self.vnodes = vnodes
+        self._heartbeat = heartbeat
+        self._leave = leave
+        # Until the first heartbeat succeeds this worker assumes it is alone
+        self.ring = HashRing([self.worker_id], vnodes)
+        self.counters = {"rebalances": 0, "heartbeat_errors": 0}
+
+    def owns(self, monitor_id: Hashable) -> bool:
+        return self.ring.node_for(monitor_id) == self.worker_id
+
+    def shard(self, monitor_ids: Iterable[Hashable]) -> List[Hashable]:
+        return [monitor_id for monitor_id in monitor_ids if self.owns(monitor_id)]
+
+    async def refresh(self) -> bool:
+        """Heartbeat; True when the member list changed and shards must be re-applied"""
+        result = await asyncio.to_thread(self._heartbeat, self.worker_id, self.ttl_seconds)
+        if not result.get("success"):
+            # Keep the last known ring; peers will drop us if this persists past the TTL
+            self.counters["heartbeat_errors"] += 1
+            logger.error(f"Prober shard heartbeat failed: {result.get('message')}")
+            return False
+        members = set(result["data"]) | {self.worker_id}
+        if members == self.ring.nodes:
+            return False
+        self.ring = HashRing(members, self.vnodes)
+        self.counters["rebalances"] += 1
+        logger.info(f"🔁 Prober shards rebalanced over {len(members)} workers")
+        return True
+
+    async def leave(self):
+        """Drop out of the ring now instead of waiting for the TTL"""
+        await asyncio.to_thread(self._leave, self.worker_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"worker_id": self.worker_id, "workers": len(self.ring.nodes), **self.counters}
@@ -0,0 +1,145 @@
+"""
+Prefix-sum SLA engine.
+
+Each monitor's down/up log transitions are kept as a series of points
+(ts, cumulative downtime before ts, state from ts on) in `downtime_series`.
+Downtime up to any instant T is the last point at or before T plus, if that
+point is a down transition, the time elapsed since it; so the uptime of any
+[start, end) window is two primary-key seeks, O(log n) in the number of
+transitions, however long the window is.
+
+The series is extended as new logs reach the check store; a log older than
+the last point (out-of-order arrival) rebuilds the monitor's series from the
+stored logs.
+"""
+
+import calendar
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from database.AuthDB import SessionLocal, DowntimePoint, UptimeCheck
+
+UPTIMEROBOT_LOG_DOWN = 1
+# Log types that end downtime: up, monitor started, monitor paused (paused time is not downtime)
+UPTIMEROBOT_LOG_NOT_DOWN = (2, 98, 99)
+
+
+def _transitions(rows: Iterable[Dict[str, Any]]) -> List[Tuple[int, bool]]:
+    """(unix seconds, is_down) for stored log rows that change a monitor's state, oldest first"""
+    transitions = []
+    for row in rows:
+        if row.get("source") != "log":
+            continue
+        log_type = row.get("log_type")
+        if log_type != UPTIMEROBOT_LOG_DOWN and log_type not in UPTIMEROBOT_LOG_NOT_DOWN:
+            continue
+        transitions.append((calendar.timegm(row["timestamp"].utctimetuple()), log_type == UPTIMEROBOT_LOG_DOWN))
+    transitions.sort(key=lambda t: t[0])
+    return transitions
+
+
+def _series_points(monitor_id: int, transitions: List[Tuple[int, bool]], last) -> List[Dict[str, Any]]:
+    """New points following `last`; transitions that don't change state are dropped"""
+    points = []
+    ts, cumulative, is_down = (last.ts, last.cumulative_down, last.is_down) if last else (None, 0, False)
+    for transition_ts, transition_down in transitions:
+        if ts is not None and transition_down == is_down:
+            continue
+        if is_down and ts is not None:
+            cumulative += transition_ts - ts
+        ts, is_down = transition_ts, transition_down
+        if points and points[-1]["ts"] == ts:
+            points[-1].update(cumulative_down=cumulative, is_down=is_down)
+        else:
+            points.append({"monitor_id": monitor_id, "ts": ts, "cumulative_down": cumulative, "is_down": is_down})
+    return points
+
+
+def _last_point(db: Session, monitor_id: int, at: Optional[int] = None):
+    """(ts, cumulative_down, is_down) of the last point at or before `at` (or the latest): a single index seek"""
+    query = select(DowntimePoint.ts, DowntimePoint.cumulative_down, DowntimePoint.is_down).where(
+        DowntimePoint.monitor_id == monitor_id)
+    if at is not None:
+        query = query.where(DowntimePoint.ts <= at)
+    return db.execute(query.order_by(DowntimePoint.ts.desc()).limit(1)).first()
+
+
+def rebuild_downtime_series(db: Session, monitor_id: int):
+    """Recompute a monitor's series from every stored log; the caller commits"""
+    rows = db.execute(
+        select(UptimeCheck.timestamp, UptimeCheck.log_type)
+        .where(UptimeCheck.website_id == monitor_id, UptimeCheck.source == "log")
+    ).all()
+    transitions = _transitions({"source": "log", "timestamp": timestamp, "log_type": log_type}
+                               for timestamp, log_type in rows)
+    db.execute(delete(DowntimePoint).where(DowntimePoint.monitor_id == monitor_id))
+    points = _series_points(monitor_id, transitions, None)
+    if points:
+        db.execute(insert(DowntimePoint), points)
+
+
+def extend_downtime_series(db: Session, monitor_id: int, rows: List[Dict[str, Any]]):
+    """Append the transitions in newly stored check rows to the series; the caller commits"""
+    transitions = _transitions(rows)
+    if not transitions:
+        return
+    last = _last_point(db, monitor_id)
+    if last is not None and transitions[0][0] <= last.ts:
+        db.flush()
+        rebuild_downtime_series(db, monitor_id)
+        return
+    points = _series_points(monitor_id, transitions, last)
+    if points:
+        db.execute(insert(DowntimePoint), points)
+
+
+def has_downtime_series(db: Session, monitor_id: int) -> bool:
+    """Whether any down / up transition of the monitor has been stored"""
+    return _last_point(db, monitor_id) is not None
+
+
+def _downtime_before(db: Session, monitor_id: int, at: int) -> int:
+    point = _last_point(db, monitor_id, at)
+    if point is None:
+        return 0
+    return point.cumulative_down + (at - point.ts if point.is_down else 0)
+
+
+def window_sla(db: Session, monitor_id: int, start: int, end: int) -> Dict[str, Any]:
+    """Downtime seconds and uptime percentage of one monitor over [start, end)"""
+    downtime = _downtime_before(db, monitor_id, end) - _downtime_before(db, monitor_id, start)
+    return {
+        "monitor_id": monitor_id,
+        "start": start,
+        "end": end,
+        "downtime_seconds": downtime,
+        "uptime_percentage": round(100.0 * (1 - downtime / (end - start)), 4),
+    }
+
+
+def sla_report(monitor_ids: List[int], start: int, end: int) -> List[Dict[str, Any]]:
+    """
+    SLA figures for several monitors over the same, already elapsed, window in one session.
+
+    A monitor without a downtime series (prober-only, or not synced yet) has no
+    known downtime rather than none: its figures are None instead of 100%.
+    """
+    report = []
+    with SessionLocal() as db:
+        for monitor_id in monitor_ids:
+            if has_downtime_series(db, monitor_id):
+                report.append(window_sla(db, monitor_id, start, end))
+            else:
+                report.append({"monitor_id": monitor_id, "start": start, "end": end,
+                               "downtime_seconds": None, "uptime_percentage": None})
+    return report
+
+
+def month_window(month: str) -> Tuple[int, int]:
+    """'YYYY-MM' -> [first second, first second of next month) in UTC"""
+    first = datetime.strptime(month, "%Y-%m")
+    following = datetime(first.year + first.month // 12, first.month % 12 + 1, 1)
+    return calendar.timegm(first.timetuple()), calendar.timegm(following.timetuple())
@@ -6,13 +6,13 @@ import logging
 from sqlalchemy.orm import Session
 from database.AuthDB import SessionLocal, Website, UptimeCheck
 
-from .api_client import UptimeRobotAPI
+from .api_client import uptime_api
 
 logger = logging.getLogger(__name__)
 
 class SSL_Check:
     def __init__(self):
-        self.uptimerobot_api = UptimeRobotAPI()
+        self.uptimerobot_api = uptime_api
         self.website_url = os.getenv("MONITORED_WEBSITE_URL", "https://www.fabricxai.com/")
         
     def get_ssl_certificate_info(self, domain: str = None):
@@ -1,16 +1,23 @@
 
+import asyncio
 import logging
-from datetime import datetime
-from typing import Optional
+import time
+from typing import Any, Dict, List, Optional
 
 from fastapi import Depends, HTTPException
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
 
-from database.AuthDB import  Website, UptimeCheck, get_db
-from database.MonitorDB import get_monitor_info
+from database.AuthDB import  Website, UptimeCheck, INCIDENT_OPEN_END, get_db
+from database.AsyncDB import get_monitor_info
 from database.schemas import UptimeStatsResponse, UptimeCheckResponse
-from services.uptime_service import uptime_service
-from services.monitor_service_pkg.api_client import _process_response_time_entry,_process_uptimerobot_log,_find_closest_response_time,_validate_timestamp
+from services.monitor_service_pkg.async_api_client import async_uptime_api
+from services.monitor_service_pkg.rate_limit import UptimeRobotAPIError
+from services.monitor_service_pkg.check_timeline import np, build_check_timeline
+from services.monitor_service_pkg.check_store import STATS_LOG_DAYS, STATS_RESPONSE_TIME_HOURS, get_monitor_history, load_probe_checks
+from services.monitor_service_pkg.incidents import incidents_overlapping
+from services.monitor_service_pkg.rollups import window_summary
+from services.monitor_service_pkg.api_client import _process_response_time_entry,_process_uptimerobot_log,_build_response_time_index,_validate_timestamp
 
 logger = logging.getLogger(__name__)
 
@@ -18,35 +25,72 @@ logger = logging.getLogger(__name__)
 
 
 # Constants for UptimeRobot log types
-from fastapi import HTTPException
-
-
 UPTIMEROBOT_LOG_DOWN = 1
 UPTIMEROBOT_LOG_UP = 2
 MAX_DAYS_THRESHOLD = 365
 MAX_INCIDENTS = 10
+# Histories with at least this many response times take the NumPy path when available
+VECTORIZE_MIN_RESPONSE_TIMES = 2000
 
 
-async def get_uptime_stats(monitorid : int ,db: Session = Depends(get_db) ) -> UptimeStatsResponse:
-    """Get uptime statistics for the monitored website"""
+def _in_window(entries: list, start: int, end: int) -> list:
+    """Payload entries whose `datetime` falls in [start, end)"""
+    selected = []
+    for entry in entries:
+        try:
+            timestamp = int(entry.get("datetime", 0))
+        except (ValueError, TypeError):
+            continue
+        if start <= timestamp < end:
+            selected.append(entry)
+    return selected
+
+
+async def get_uptime_stats(monitorid : int ,db: Session = Depends(get_db), start: Optional[int] = None, end: Optional[int] = None,
+                           include_checks: bool = True) -> UptimeStatsResponse:
+    """Get uptime statistics for the monitored website.
+
+    With `start` and/or `end` (unix seconds) the figures cover that window and
+    are answered from the check rollups; otherwise UptimeRobot's own ratio is used.
+    Outages are returned as compact `incidents` intervals; clients that only draw
+    the incident timeline can pass include_checks=False to skip the per-check rows.
+    """
+    windowed = start is not None or end is not None
+    if windowed:
+        end = int(end if end is not None else time.time())
+        start = int(start if start is not None else end - 86400)
+        if start >= end:
+            raise HTTPException(status_code=400, detail="start must be before end")
+    if not async_uptime_api.api_key:
+        return await get_probe_stats(int(monitorid), start, end, include_checks)
     try:
        
         try:
-            monitor_data = uptime_service.uptimerobot_api._get_monitors(monitorid)
-            # print(monitor_data)
-            monitor_data= monitor_data.get("monitors", [])[0]       
+            # Only the delta since the last sync is downloaded; history comes from the local store
+            monitor_data, logs, response_times = await get_monitor_history(int(monitorid))
             uptime_ratio = monitor_data.get("custom_uptime_ratio", "0-0-0")
             uptime_ratio = float(uptime_ratio.split("-")[0]) 
-            response_times = monitor_data.get("response_times", [])
-            logs = monitor_data.get("logs", [])
-            checks = makeCheck(logs, response_times)
+            total_checks = monitor_data.get("responsetime_length") if monitor_data.get("responsetime_length") else 0
+            average_response_time = monitor_data.get("average_response_time") if monitor_data.get("average_response_time") else 0
+            if windowed:
+                summary = await asyncio.to_thread(window_summary, int(monitorid), start, end)
+                uptime_ratio = summary["uptime_percentage"]
+                total_checks = summary["total_checks"]
+                average_response_time = summary["average_response_time"]
+                logs = _in_window(logs, start, end)
+                response_times = _in_window(response_times, start, end)
+            checks = check_rows(logs, response_times) if include_checks else []
+            incidents_start, incidents_end = (start, end) if windowed else (
+                int(time.time()) - STATS_LOG_DAYS * 86400, INCIDENT_OPEN_END)
+            incidents = await asyncio.to_thread(incidents_overlapping, [int(monitorid)], incidents_start, incidents_end)
 
             if monitor_data :
                 data = {
                     "uptime_percentage" : uptime_ratio,
-                    "total_checks" : monitor_data.get("responsetime_length") if monitor_data.get("responsetime_length") else 0,
-                    "average_response_time" : monitor_data.get("average_response_time") if monitor_data.get("average_response_time") else 0,
+                    "total_checks" : total_checks,
+                    "average_response_time" : average_response_time,
                     "checks" : checks,
+                    "incidents" : incidents,
                     "name" : monitor_data.get("friendly_name") if monitor_data.get("friendly_name") else "Unknown",
                     "url" : monitor_data.get("url") if monitor_data.get("url") else "Unknown"
 
@@ -55,38 +99,71 @@ async def get_uptime_stats(monitorid : int ,db: Session = Depends(get_db) ) -> U
             else:
                 raise Exception("No monitor data received from UptimeRobot API")
                 
+        except UptimeRobotAPIError as api_error:
+            logger.error(f"UptimeRobot API unavailable: {api_error}")
+            raise HTTPException(status_code=503, detail="UptimeRobot API unavailable, try again shortly")
         except Exception as api_error:
             logger.warning(f"UptimeRobot API failed, Return None***: {api_error}")
             return None
             
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting uptime stats: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
 
-def makeCheck(logs: list , response_times: list ) :
-    response_times_dict = {}
-    for rt in response_times:
-        rt_timestamp = rt.get("datetime")
-        if rt_timestamp:
-            try:
-                response_times_dict[int(rt_timestamp)] = float(rt.get("value", 0))
-            except (ValueError, TypeError):
-                continue
+async def get_probe_stats(monitor_id: int, start: Optional[int] = None, end: Optional[int] = None,
+                          include_checks: bool = True):
+    """get_uptime_stats from the built-in prober's checks, used when no UptimeRobot API key is configured"""
+    end = int(end if end is not None else time.time())
+    start = int(start if start is not None else end - STATS_RESPONSE_TIME_HOURS * 3600)
+    monitor = await get_monitor_info(monitor_id)
+    if not monitor.get("success"):
+        raise HTTPException(status_code=404, detail="Monitor not found")
+    monitor = monitor["data"]
+    summary = await asyncio.to_thread(window_summary, monitor_id, start, end)
+    checks = await asyncio.to_thread(load_probe_checks, monitor_id, start, end) if include_checks else []
+    incidents = await asyncio.to_thread(incidents_overlapping, [monitor_id], start, end)
+    return {
+        "uptime_percentage": summary["uptime_percentage"],
+        "total_checks": summary["total_checks"],
+        "average_response_time": summary["average_response_time"],
+        "checks": checks,
+        "incidents": incidents,
+        "name": monitor.get("sitename") or "Unknown",
+        "url": monitor.get("site_url") or "Unknown",
+    }
+
+
+def check_rows(logs: list, response_times: list) -> List[Dict[str, Any]]:
+    """
+    JSON-ready check rows for the stats response, the shape load_probe_checks
+    returns. Large histories go through the NumPy builder when it is installed;
+    otherwise makeCheck's models are encoded here, as FastAPI would have done.
+    """
+    if np is not None and len(response_times) >= VECTORIZE_MIN_RESPONSE_TIMES:
+        return build_check_timeline(logs, response_times)
+    return jsonable_encoder(makeCheck(logs, response_times))
+
+
+def makeCheck(logs: list , response_times: list ) -> List[UptimeCheckResponse]:
+    # Sorted timestamp/value arrays: each log's nearest response time is a binary search
+    response_time_index = _build_response_time_index(response_times)
     
     # Process logs
     checks = []
     sorted_logs = sorted(logs, key=lambda x: x.get("datetime", 0), reverse=True)
     
     for log in sorted_logs:
-        check = _process_uptimerobot_log(log, response_times_dict)
+        check = _process_uptimerobot_log(log, response_time_index)
         if check:
             checks.append(check)
     
 
-    # Get timestamps from processed logs
-    log_timestamps = {int(log.get("datetime", 0)) for log in sorted_logs}
+    # Sorted log timestamps: "is there a log within ±300s" becomes two bisections
+    log_timestamps = sorted({int(log.get("datetime", 0)) for log in sorted_logs})
     
     # Process standalone response times
     for rt in response_times:
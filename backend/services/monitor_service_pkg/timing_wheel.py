@@ -0,0 +1,97 @@
+"""
+Hashed timing wheel for per-monitor check scheduling.
+
+Time is cut into ticks; a timer due at tick T lives in slot T % slots. Adding,
+cancelling or moving a timer is a dict insert/delete (O(1), independent of
+how many monitors are scheduled), and each tick only looks at the timers in
+one slot. Timers further out than one revolution simply stay in their slot
+until the wheel comes round to their tick.
+
+Not thread-safe: it is driven from a single asyncio task.
+"""
+
+import math
+import time
+from collections import deque
+from typing import Deque, Dict, Hashable, List, Optional, Tuple
+
+
+class TimingWheel:
+    def __init__(self, tick_seconds: float = 1.0, slots: int = 512, start: Optional[float] = None):
+        self.tick_seconds = tick_seconds
+        self.slots = slots
+        self._origin = time.monotonic() if start is None else start
+        self._current_tick = 0  # ticks up to and including this one have been processed
+        self._wheel: List[Dict[Hashable, Tuple[int, float]]] = [dict() for _ in range(slots)]
+        self._index: Dict[Hashable, int] = {}  # key -> slot
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._index
+
+    def _tick_of(self, at: float) -> int:
+        return math.floor((at - self._origin) / self.tick_seconds)
+
+    def schedule(self, key: Hashable, due_at: float):
+        """Fire `key` at monotonic time `due_at` (replaces any pending timer for it)"""
+        self.cancel(key)
+        tick = max(self._current_tick + 1, math.ceil((due_at - self._origin) / self.tick_seconds))
+        slot = tick % self.slots
+        self._wheel[slot][key] = (tick, due_at)
+        self._index[key] = slot
+
+    def cancel(self, key: Hashable) -> bool:
+        slot = self._index.pop(key, None)
+        if slot is None:
+            return False
+        del self._wheel[slot][key]
+        return True
+
+    def due_at(self, key: Hashable) -> Optional[float]:
+        slot = self._index.get(key)
+        return None if slot is None else self._wheel[slot][key][1]
+
+    def advance(self, now: float) -> List[Tuple[Hashable, float]]:
+        """Process every tick up to `now`; returns (key, scheduled time) of the timers that expired"""
+        expired = []
+        target = self._tick_of(now)
+        # After a long stall, one pass over the wheel visits every slot anyway
+        last = min(target, self._current_tick + self.slots)
+        for tick in range(self._current_tick + 1, last + 1):
+            bucket = self._wheel[tick % self.slots]
+            if not bucket:
+                continue
+            for key, (due_tick, due_at) in list(bucket.items()):
+                if due_tick <= target:
+                    del bucket[key]
+                    del self._index[key]
+                    expired.append((key, due_at))
+        self._current_tick = max(self._current_tick, target)
+        return expired
+
+
+class LagStats:
+    """Scheduling lag (fire time minus due time) over the most recent firings"""
+
+    def __init__(self, window: int = 2000):
+        self._recent: Deque[float] = deque(maxlen=window)
+        self.fired = 0
+        self.max_lag = 0.0
+
+    def record(self, lag: float):
+        self.fired += 1
+        self.max_lag = max(self.max_lag, lag)
+        self._recent.append(lag)
+
+    def snapshot(self) -> Dict[str, float]:
+        recent = sorted(self._recent)
+        if not recent:
+            return {"fired": self.fired, "lag_p50_ms": 0.0, "lag_p99_ms": 0.0, "lag_max_ms": 0.0}
+        return {
+            "fired": self.fired,
+            "lag_p50_ms": round(recent[len(recent) // 2] * 1000, 1),
+            "lag_p99_ms": round(recent[min(len(recent) - 1, int(len(recent) * 0.99))] * 1000, 1),
+            "lag_max_ms": round(self.max_lag * 1000, 1),
+        }
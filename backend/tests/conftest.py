@@ -0,0 +1,16 @@
+"""
+Shared test setup. The app modules create the local SQLite database in the
+working directory and EmailService needs mail credentials, so the tests run
+in a scratch directory with placeholder settings.
+"""
+
+import os
+import tempfile
+
+os.environ.setdefault("MAIL_FROM", "watcher@example.com")
+os.environ.setdefault("MAIL_PASSWORD", "test")
+
+
+def pytest_sessionstart(session):
+    # After the test paths are resolved, before any app module is imported
+    os.chdir(tempfile.mkdtemp(prefix="watcher-tests-"))
@@ -0,0 +1,86 @@
+"""Alert runs: overlapping runs notify a transition once, reminders land on the nearest poll, one digest per owner"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from services.monitor_service_pkg import alerts
+
+
+@pytest.fixture
+def alert_store(monkeypatch):
+    """In-memory monitor_alert_state plus a record of what was delivered"""
+    store = {"states": {}, "delivered": []}
+
+    def get_alert_states():
+        return {"success": True, "data": {monitor_id: dict(state) for monitor_id, state in store["states"].items()}}
+
+    def save_alert_states(states):
+        for state in states:
+            store["states"][state["monitorid"]] = dict(state)
+        return {"success": True}
+
+    async def deliver_notifications(notifications, now):
+        store["delivered"].extend((kind, monitor["id"]) for kind, monitor, _ in notifications)
+
+    monkeypatch.setattr(alerts, "get_alert_states", get_alert_states)
+    monkeypatch.setattr(alerts, "save_alert_states", save_alert_states)
+    monkeypatch.setattr(alerts, "deliver_notifications", deliver_notifications)
+    monkeypatch.setattr(alerts, "ALERT_REMINDER_MINUTES", 60)
+    return store
+
+
+def serve_pages(monkeypatch, *statuses):
+    async def iter_monitor_pages():
+        await asyncio.sleep(0.05)  # a slow API page keeps the runs overlapping
+        yield [{"id": monitor_id, "status": status, "friendlyName": f"site {monitor_id}",
+                "url": f"https://{monitor_id}.example"} for monitor_id, status in statuses]
+
+    monkeypatch.setattr(alerts.async_uptime_api, "iter_monitor_pages", iter_monitor_pages)
+
+
+async def test_overlapping_runs_send_down_once(monkeypatch, alert_store):
+    serve_pages(monkeypatch, (1, "down"), (2, "up"))
+    await asyncio.gather(alerts.check_down_monitors(poll_minutes=50), alerts.check_down_monitors())
+    assert alert_store["delivered"] == [(alerts.NOTIFY_DOWN, 1)]
+    assert alert_store["states"][1]["state"] == alerts.STATE_DOWN
+
+
+async def test_reminder_goes_out_on_the_nearest_poll(monkeypatch, alert_store):
+    serve_pages(monkeypatch, (1, "down"))
+    notified = datetime.now() - timedelta(minutes=50)
+    alert_store["states"][1] = {"monitorid": 1, "state": alerts.STATE_DOWN, "down_since": notified,
+                                "last_notified_at": notified, "reminders_sent": 0, "acknowledged_at": None}
+    await alerts.check_down_monitors(poll_minutes=50)
+    assert alert_store["delivered"] == [(alerts.NOTIFY_REMINDER, 1)]
+
+
+@pytest.mark.parametrize("poll_minutes, minutes", [(0, 60), (1, 59.5), (50, 35), (200, 100)])
+def test_reminder_interval_for_poll(monkeypatch, poll_minutes, minutes):
+    monkeypatch.setattr(alerts, "ALERT_REMINDER_MINUTES", 60)
+    assert alerts.reminder_interval_for(poll_minutes) == timedelta(minutes=minutes)
+
+
+def test_reminders_off(monkeypatch):
+    monkeypatch.setattr(alerts, "ALERT_REMINDER_MINUTES", 0)
+    assert alerts.reminder_interval_for(50) is None
+
+
+async def test_run_delivers_one_digest_per_owner(monkeypatch):
+    owners = {1: (10, "a@example.com"), 2: (10, "a@example.com"), 3: (20, "b@example.com")}
+    monkeypatch.setattr(alerts, "resolve_monitor_owners", lambda ids: {"success": True, "data": owners})
+    delivered = []
+
+    def deliver_digest(email, items):
+        if email == "b@example.com":
+            raise ConnectionError("smtp down")
+        delivered.append((email, [item[1]["id"] for item in items]))
+
+    monkeypatch.setattr(alerts, "deliver_digest", deliver_digest)
+    failures = alerts.alert_delivery_stats["failures"]
+    notifications = [(alerts.NOTIFY_DOWN, {"id": monitor_id}, {}) for monitor_id in (1, 2, 3)]
+    await alerts.deliver_notifications(notifications, datetime.now())
+    # Delivered right away, without waiting for a later run; one owner's failure leaves the other's digest alone
+    assert delivered == [("a@example.com", [1, 2])]
+    assert alerts.alert_delivery_stats["failures"] == failures + 1
@@ -0,0 +1,38 @@
+"""Async pool sizing and the async OTP resend"""
+
+from contextlib import asynccontextmanager
+
+from database import AsyncDB, AuthDB
+
+
+def test_pools_share_one_connection_budget():
+    assert AuthDB.DB_ASYNC_POOL_MAX_SIZE + AuthDB.DB_SYNC_POOL_MAX_SIZE == AuthDB.DB_POOL_MAX_SIZE
+    assert AsyncDB.async_pool.max_size == AuthDB.DB_ASYNC_POOL_MAX_SIZE
+    assert AuthDB.db_pool.stats()["max_size"] == AuthDB.DB_SYNC_POOL_MAX_SIZE
+
+
+async def test_resend_otp_uses_configured_expiry(monkeypatch):
+    executed, queued = [], []
+
+    class Cursor:
+        async def execute(self, sql, params=()):
+            executed.append(params)
+
+    class Connection:
+        @asynccontextmanager
+        async def cursor(self):
+            yield Cursor()
+
+        async def commit(self):
+            pass
+
+    @asynccontextmanager
+    async def db_connection():
+        yield Connection()
+
+    monkeypatch.setattr(AsyncDB, "db_connection", db_connection)
+    monkeypatch.setattr(AsyncDB, "enqueue_otp_email", lambda email, otp, expire: queued.append((email, otp, expire)))
+    assert (await AsyncDB.resend_email_otp("a@example.com"))["success"]
+    new_otp, _, email = executed[0]
+    assert email == "a@example.com"
+    assert queued == [("a@example.com", new_otp, AuthDB.OTP_EXPIRY)]
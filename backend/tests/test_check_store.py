@@ -0,0 +1,114 @@
+"""
+The check store: concurrent syncs store each log / response time once, history
+cutoffs are in UTC, and one monitor's failure does not abort a scheduled sync run
+"""
+
+import threading
+import time
+
+import httpx
+import pytest
+from sqlalchemy import func, select
+
+from database.AuthDB import SessionLocal, UptimeCheck
+from services.monitor_service_pkg import check_store
+from services.monitor_service_pkg.check_store import load_history, read_high_water_marks, store_monitor_delta
+from services.monitor_service_pkg.rate_limit import UptimeRobotAPIError
+
+
+def monitor_payload(now, n_logs=20, n_response_times=200):
+    return {
+        "logs": [{"id": 900 + i, "type": 1 if i % 2 else 2, "datetime": now - i * 600,
+                  "reason": {"code": "200", "detail": "OK"}} for i in range(n_logs)],
+        "response_times": [{"datetime": now - i * 60, "value": 100 + i} for i in range(n_response_times)],
+    }
+
+
+def stored_rows(monitor_id):
+    with SessionLocal() as db:
+        return db.scalar(select(func.count()).select_from(UptimeCheck).where(UptimeCheck.website_id == monitor_id))
+
+
+@pytest.mark.parametrize("monitor_id", [710001, 710002])  # new and already-synced state rows
+def test_concurrent_syncs_store_the_delta_once(monitor_id):
+    now = int(time.time())
+    if monitor_id == 710002:
+        store_monitor_delta(monitor_id, monitor_payload(now - 86400, n_logs=1, n_response_times=1))
+    before = stored_rows(monitor_id)
+    payload = monitor_payload(now)
+    barrier = threading.Barrier(4)
+    errors = []
+
+    def sync():
+        barrier.wait()
+        try:
+            store_monitor_delta(monitor_id, payload)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=sync) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert stored_rows(monitor_id) - before == len(payload["logs"]) + len(payload["response_times"])
+    assert read_high_water_marks(monitor_id) == (now, now)
+
+
+@pytest.fixture
+def west_of_utc(monkeypatch):
+    monkeypatch.setenv("TZ", "America/New_York")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_history_cutoff_ignores_the_host_timezone(west_of_utc):
+    monitor_id = 710003
+    now = int(time.time())
+    response_times = [{"datetime": now - hours * 3600, "value": 100} for hours in (1, 12, 20, 23)]
+    store_monitor_delta(monitor_id, {"logs": [], "response_times": response_times})
+    _, loaded = load_history(monitor_id)
+    assert [rt["datetime"] for rt in loaded] == [rt["datetime"] for rt in response_times]
+
+
+@pytest.fixture
+def scheduled_run(monkeypatch):
+    run = {"synced": [], "pruned": 0, "pages": [[{"id": 1}, {"id": 2}], [{"id": 3}]]}
+
+    async def iter_monitor_pages(fields=None):
+        for page in run["pages"]:
+            if page is None:
+                raise UptimeRobotAPIError("GET monitors failed after 5 attempts: HTTP 429")
+            yield page
+
+    async def sync_monitor(monitor_id):
+        if monitor_id in run.get("failing", {}):
+            raise run["failing"][monitor_id]
+        run["synced"].append(monitor_id)
+
+    def prune_rollups():
+        run["pruned"] += 1
+
+    monkeypatch.setattr(check_store.async_uptime_api, "iter_monitor_pages", iter_monitor_pages)
+    monkeypatch.setattr(check_store, "sync_monitor", sync_monitor)
+    monkeypatch.setattr(check_store, "prune_rollups", prune_rollups)
+    return run
+
+
+async def test_one_failing_monitor_does_not_abort_the_sync_run(scheduled_run):
+    scheduled_run["failing"] = {1: UptimeRobotAPIError("HTTP 429"), 2: httpx.ReadTimeout("timed out")}
+    await check_store.sync_all_monitors()
+    assert scheduled_run["synced"] == [3]
+    assert scheduled_run["pruned"] == 1
+
+
+async def test_rollups_are_pruned_when_listing_monitors_fails(scheduled_run):
+    scheduled_run["pages"] = [[{"id": 1}], None]
+    with pytest.raises(UptimeRobotAPIError):
+        await check_store.sync_all_monitors()
+    assert scheduled_run["synced"] == [1]
+    assert scheduled_run["pruned"] == 1
@@ -0,0 +1,52 @@
+"""The NumPy check-timeline builder against makeCheck, and the rows /stats returns on either path"""
+
+import random
+import time
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+
+from database.schemas import UptimeCheckResponse
+from services.monitor_service_pkg import stats_service
+from services.monitor_service_pkg.check_timeline import build_check_timeline, np
+
+requires_numpy = pytest.mark.skipif(np is None, reason="NumPy not installed")
+
+
+def minute_history(days, n_logs, seed):
+    """One-minute response times plus logs, with a few malformed / out-of-range entries"""
+    rng = random.Random(seed)
+    now = int(time.time())
+    response_times = [{"datetime": ts, "value": rng.randint(80, 900)} for ts in range(now - 60, now - days * 86400, -60)]
+    logs = [
+        {"id": 10_000 + i, "type": rng.choice((1, 2)), "datetime": now - rng.randrange(days * 86400),
+         "reason": rng.choice(({"code": "200", "detail": "OK"}, {"code": "503", "detail": "Service Unavailable"}, {}))}
+        for i in range(n_logs)
+    ]
+    response_times += [{"datetime": 0, "value": 5}, {"datetime": now - 400 * 86400, "value": 5},
+                       {"datetime": now - 120, "value": -1}, {"datetime": "bad", "value": 5}]
+    logs.sort(key=lambda log: log["datetime"], reverse=True)
+    return logs, response_times
+
+
+@pytest.mark.parametrize("days", [1, 3, 7])
+def test_make_check_returns_models_at_any_size(days):
+    logs, response_times = minute_history(days, 50, seed=days)
+    checks = stats_service.makeCheck(logs, response_times)
+    assert checks and all(isinstance(check, UptimeCheckResponse) for check in checks)
+
+
+@requires_numpy
+@pytest.mark.parametrize("seed", range(3))
+def test_numpy_timeline_matches_make_check(seed):
+    logs, response_times = minute_history(3, 200, seed)
+    assert len(response_times) >= stats_service.VECTORIZE_MIN_RESPONSE_TIMES
+    assert build_check_timeline(logs, response_times) == jsonable_encoder(stats_service.makeCheck(logs, response_times))
+
+
+@pytest.mark.parametrize("days", [1, 3])  # below and above VECTORIZE_MIN_RESPONSE_TIMES
+def test_check_rows_are_serialized_make_check(days):
+    logs, response_times = minute_history(days, 100, seed=days)
+    rows = stats_service.check_rows(logs, response_times)
+    assert all(isinstance(row, dict) for row in rows)
+    assert rows == jsonable_encoder(stats_service.makeCheck(logs, response_times))
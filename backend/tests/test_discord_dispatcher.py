@@ -0,0 +1,230 @@
+"""
+DiscordDispatcher against a local stub of Discord's execute-webhook endpoint.
+
+The stub enforces a per-webhook bucket (X-RateLimit-* headers and a 429 with
+a JSON retry_after once it is exhausted), can throw unannounced "shared" and
+global 429s, and answers unknown webhooks with 404.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from services.monitor_service_pkg.discord_dispatcher import (
+    DISCORD_EMBED_TOTAL_LIMIT, DISCORD_EMBEDS_PER_MESSAGE, DiscordDispatcher, embed_size, make_embed,
+)
+from services.monitor_service_pkg.rate_limit import RetryPolicy
+
+BUCKET_LIMIT = 5
+BUCKET_RESET = 0.2
+
+
+class StubWebhook:
+    """One webhook's bucket, as the Discord API reports it"""
+
+    def __init__(self, name, first_retry_after=0.0, global_first=False, shared_every=0):
+        self.name = name
+        self.count = 0
+        self.window_ends = 0.0
+        self.accepted = 0
+        self.first_retry_after = first_retry_after
+        self.global_first = global_first
+        self.shared_every = shared_every
+        self.messages = []
+        self.arrivals = []
+        self.responses = Counter()
+        self.lock = threading.Lock()
+
+    def handle(self, payload):
+        now = time.monotonic()
+        limited = {"message": "You are being rate limited.", "global": False}
+        with self.lock:
+            if self.global_first:
+                self.global_first = False
+                return 429, {"X-RateLimit-Global": "true"}, {**limited, "retry_after": 0.3, "global": True}
+            if self.first_retry_after:
+                retry_after, self.first_retry_after = self.first_retry_after, 0.0
+                return 429, {"X-RateLimit-Scope": "shared"}, {**limited, "retry_after": retry_after}
+            if now >= self.window_ends:
+                self.count, self.window_ends = 0, now + BUCKET_RESET
+            headers = {"X-RateLimit-Limit": str(BUCKET_LIMIT), "X-RateLimit-Bucket": f"bucket-{self.name}",
+                       "X-RateLimit-Reset-After": f"{self.window_ends - now:.3f}"}
+            if self.count >= BUCKET_LIMIT:
+                headers["X-RateLimit-Remaining"] = "0"
+                return 429, headers, {**limited, "retry_after": round(self.window_ends - now, 3)}
+            self.count += 1
+            self.accepted += 1
+            if self.shared_every and self.accepted % self.shared_every == 0:
+                return 429, {"X-RateLimit-Scope": "shared"}, {**limited, "retry_after": 0.05}
+            headers["X-RateLimit-Remaining"] = str(BUCKET_LIMIT - self.count)
+            self.messages.append(payload)
+            self.arrivals.append(now)
+            return 204, headers, None
+
+    def delivered(self):
+        return [embed["title"] for message in self.messages for embed in message["embeds"]]
+
+
+class StubDiscord:
+    def __init__(self):
+        self.hooks = {}
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                hook = stub.hooks.get(self.path)
+                if hook is None:
+                    status, headers, body = 404, {}, {"message": "Unknown Webhook", "code": 10015}
+                else:
+                    status, headers, body = hook.handle(payload)
+                    hook.responses[status] += 1
+                data = json.dumps(body).encode() if body is not None else b""
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                if status == 429:
+                    self.send_header("Retry-After", str(int(body["retry_after"]) + 1))
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def webhook(self, name, **kwargs):
+        path = f"/api/webhooks/{name}/secret-token-{name}"
+        self.hooks[path] = StubWebhook(name, **kwargs)
+        return self.base_url + path, self.hooks[path]
+
+
+@pytest.fixture
+def discord():
+    stub = StubDiscord()
+    yield stub
+    stub.server.shutdown()
+    stub.server.server_close()
+
+
+@pytest.fixture
+async def dispatcher():
+    dispatcher = DiscordDispatcher(batch_seconds=0.02, retry_policy=RetryPolicy(max_retries=5, base_delay=0.05))
+    dispatcher.start()
+    yield dispatcher
+    await dispatcher.stop(drain_seconds=0)
+
+
+def alert_embed(i):
+    # Mostly short digests, every 10th a long one that fills most of a message on its own
+    lines = 40 if i % 10 == 0 else 3
+    description = f"alert {i}" + "".join(f"\nDOWN: site {i}-{n} (https://{i}-{n}.example)" for n in range(lines))
+    return make_embed(f"alert {i}", description)
+
+
+async def wait_sent(dispatcher, timeout=20):
+    deadline = time.monotonic() + timeout
+    while dispatcher.stats()["queued"]:
+        assert time.monotonic() < deadline, f"dispatcher not drained: {dispatcher.stats()}"
+        await asyncio.sleep(0.01)
+
+
+async def test_batches_within_limits_and_retries_429s(discord, dispatcher):
+    url, hook = discord.webhook("a", shared_every=4)
+    embeds = [alert_embed(i) for i in range(60)]
+    for embed in embeds:
+        assert dispatcher.submit(embed, url)
+    await wait_sent(dispatcher)
+
+    assert hook.delivered() == [embed["title"] for embed in embeds]
+    assert len(hook.messages) < len(embeds)
+    for message in hook.messages:
+        assert len(message["embeds"]) <= DISCORD_EMBEDS_PER_MESSAGE
+        assert sum(embed_size(embed) for embed in message["embeds"]) <= DISCORD_EMBED_TOTAL_LIMIT
+    stats = dispatcher.stats()
+    assert hook.responses[429] > 0 and stats["rate_limited"] == hook.responses[429]
+    assert stats["embeds_sent"] == len(embeds) and stats["failed"] == stats["dropped"] == 0
+    assert stats["webhooks"]["a"]["bucket"] == "bucket-a"
+
+
+async def test_submit_from_worker_thread(discord, dispatcher):
+    url, hook = discord.webhook("t")
+    embeds = [alert_embed(i) for i in range(25)]
+
+    def submit_all():
+        for embed in embeds:
+            assert dispatcher.submit(embed, url)
+
+    await asyncio.to_thread(submit_all)
+    await wait_sent(dispatcher)
+    assert hook.delivered() == [embed["title"] for embed in embeds]
+
+
+async def test_submit_does_not_wait_for_the_webhook(discord, dispatcher):
+    url, hook = discord.webhook("slow", first_retry_after=1.0)
+    started = time.perf_counter()
+    for i in range(50):
+        assert dispatcher.submit(alert_embed(i), url)
+    assert time.perf_counter() - started < 0.1
+    assert not hook.messages
+
+
+async def test_webhook_behind_a_429_does_not_hold_up_another(discord, dispatcher):
+    url_a, hook_a = discord.webhook("a")
+    url_b, hook_b = discord.webhook("b", first_retry_after=1.0)
+    started = time.monotonic()
+    for i in range(20):
+        assert dispatcher.submit(alert_embed(i), url_b)
+        assert dispatcher.submit(alert_embed(i), url_a)
+    await wait_sent(dispatcher)
+    assert hook_a.arrivals[-1] - started < 1.0
+    assert hook_b.arrivals[0] - started >= 1.0
+    assert len(hook_a.delivered()) == len(hook_b.delivered()) == 20
+
+
+async def test_global_429_pauses_every_webhook(discord, dispatcher):
+    url_g, hook_g = discord.webhook("g", global_first=True)
+    url_h, hook_h = discord.webhook("h")
+    started = time.monotonic()
+    assert dispatcher.submit(make_embed("global", "x"), url_g)
+    while not hook_g.responses[429]:
+        await asyncio.sleep(0.01)
+    assert dispatcher.submit(make_embed("other", "x"), url_h)
+    await wait_sent(dispatcher)
+    assert hook_g.delivered() == ["global"] and hook_h.delivered() == ["other"]
+    assert hook_h.arrivals[0] - started >= 0.3
+
+
+async def test_unknown_webhook_is_dropped_without_retries(discord, dispatcher):
+    assert dispatcher.submit(make_embed("gone", "x"), discord.base_url + "/api/webhooks/404/secret-token")
+    await wait_sent(dispatcher)
+    stats = dispatcher.stats()
+    assert stats["failed"] == 1 and stats["retried"] == 0
+    assert list(stats["webhooks"]) == ["404"]  # the token never reaches metrics
+
+
+async def test_stop_drains_the_queue(discord):
+    dispatcher = DiscordDispatcher(batch_seconds=0.05)
+    dispatcher.start()
+    url, hook = discord.webhook("d")
+    for i in range(15):
+        dispatcher.submit(alert_embed(i), url)
+    await dispatcher.stop(drain_seconds=5)
+    assert len(hook.delivered()) == 15
+    assert not dispatcher.submit(alert_embed(0), url)
+
+
+def test_submit_without_running_dispatcher_is_rejected():
+    assert not DiscordDispatcher(webhook_url="http://127.0.0.1:9/api/webhooks/1/x").submit(make_embed("t", "x"))
+    assert not DiscordDispatcher(webhook_url=None).submit(make_embed("t", "x"))
@@ -0,0 +1,169 @@
+"""
+LeaderElector against an in-process stand-in for Postgres advisory locks:
+pg_try_advisory_lock per connection, and every lock a connection holds is
+dropped when that connection closes or the server kills it.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from leader_election import LeaderElector, advisory_lock_key
+
+CHECK_SECONDS = 0.02
+
+
+class LockServer:
+    def __init__(self):
+        self.holders = {}
+        self.lock = threading.Lock()
+        self.refuse_connections = False
+
+    def connect(self):
+        if self.refuse_connections:
+            raise ConnectionError("could not connect to server")
+        return FakeConnection(self)
+
+    def drop(self, conn):
+        with self.lock:
+            for key in [key for key, holder in self.holders.items() if holder is conn]:
+                del self.holders[key]
+
+    def kill(self, conn):
+        """The server side of a connection goes away (network partition, backend terminated)"""
+        conn.broken = True
+        self.drop(conn)
+
+
+class FakeConnection:
+    def __init__(self, server):
+        self.server = server
+        self.autocommit = False
+        self.broken = False
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def close(self):
+        self.server.drop(self)
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.result = None
+
+    def execute(self, sql, params=()):
+        if self.conn.broken:
+            raise ConnectionError("server closed the connection unexpectedly")
+        server = self.conn.server
+        with server.lock:
+            if "pg_try_advisory_lock" in sql:
+                self.result = (server.holders.setdefault(params[0], self.conn) is self.conn,)
+            elif "pg_advisory_unlock" in sql:
+                released = server.holders.get(params[0]) is self.conn
+                if released:
+                    del server.holders[params[0]]
+                self.result = (released,)
+            else:
+                self.result = (1,)
+
+    def fetchone(self):
+        return self.result
+
+    def close(self):
+        pass
+
+
+class Worker:
+    """An elector plus a record of the leadership callbacks it ran"""
+
+    def __init__(self, server, name):
+        self.name = name
+        self.events = []
+        self.elector = LeaderElector(
+            on_elected=lambda: self.events.append("elected"),
+            on_demoted=self._demoted,
+            lock_name="test-scheduler",
+            check_seconds=CHECK_SECONDS,
+            connect=server.connect,
+        )
+
+    async def _demoted(self):
+        self.events.append("demoted")
+
+
+async def wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not reached"
+        await asyncio.sleep(CHECK_SECONDS / 2)
+
+
+def leaders(workers):
+    return [worker for worker in workers if worker.elector.is_leader]
+
+
+@pytest.fixture
+async def cluster():
+    server = LockServer()
+    workers = [Worker(server, f"w{i}") for i in range(3)]
+    for worker in workers:
+        worker.elector.start()
+    yield server, workers
+    for worker in workers:
+        await worker.elector.stop()
+
+
+async def test_exactly_one_leader(cluster):
+    server, workers = cluster
+    await wait_until(lambda: len(leaders(workers)) == 1)
+    await asyncio.sleep(CHECK_SECONDS * 5)
+    assert len(leaders(workers)) == 1
+    assert sorted(len(worker.events) for worker in workers) == [0, 0, 1]
+    assert leaders(workers)[0].events == ["elected"]
+
+
+async def test_graceful_stop_hands_over(cluster):
+    server, workers = cluster
+    await wait_until(lambda: len(leaders(workers)) == 1)
+    old = leaders(workers)[0]
+    await old.elector.stop()
+    assert old.events == ["elected", "demoted"]
+    assert old.elector.stats()["demotions"] == 1
+    await wait_until(lambda: len(leaders(workers)) == 1 and leaders(workers)[0] is not old)
+
+
+async def test_lost_connection_demotes_and_fails_over(cluster):
+    server, workers = cluster
+    await wait_until(lambda: len(leaders(workers)) == 1)
+    old = leaders(workers)[0]
+    server.kill(old.elector._conn)
+    await wait_until(lambda: not old.elector.is_leader)
+    assert old.events == ["elected", "demoted"]
+    assert old.elector.stats()["connection_errors"] >= 1
+    await wait_until(lambda: len(leaders(workers)) == 1)
+    # The demoted worker reconnects and keeps polling without stealing the lock
+    await asyncio.sleep(CHECK_SECONDS * 5)
+    assert len(leaders(workers)) == 1
+
+
+async def test_unreachable_database_never_elects():
+    server = LockServer()
+    server.refuse_connections = True
+    worker = Worker(server, "w")
+    worker.elector.start()
+    await wait_until(lambda: worker.elector.stats()["connection_errors"] >= 2)
+    assert not worker.elector.is_leader and worker.events == []
+    server.refuse_connections = False
+    await wait_until(lambda: worker.elector.is_leader)
+    await worker.elector.stop()
+    assert server.holders == {}
+
+
+def test_advisory_lock_key_is_stable_signed_bigint():
+    key = advisory_lock_key("thewatcher-scheduler")
+    assert key == advisory_lock_key("thewatcher-scheduler") != advisory_lock_key("other")
+    assert -2 ** 63 <= key < 2 ** 63
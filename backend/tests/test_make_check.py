@@ -0,0 +1,93 @@
+"""makeCheck's standalone response-time dedup against the previous linear ±300s scan"""
+
+import random
+import time
+
+import pytest
+
+from database.schemas import UptimeCheckResponse
+from services.monitor_service_pkg.api_client import (
+    LOG_DEDUP_WINDOW,
+    _build_response_time_index,
+    _has_timestamp_within,
+    _process_uptimerobot_log,
+    _validate_timestamp,
+)
+from services.monitor_service_pkg.stats_service import VECTORIZE_MIN_RESPONSE_TIMES, makeCheck
+
+
+def make_history(n_logs, n_response_times, seed):
+    """Synthetic logs / response_times payloads, newest first like the API"""
+    rng = random.Random(seed)
+    now = int(time.time())
+    span = 30 * 24 * 3600
+    logs = [
+        {"id": i, "type": rng.choice((1, 2, 2, 2)), "datetime": now - rng.randrange(span),
+         "reason": {"code": "200", "detail": "OK"}}
+        for i in range(n_logs)
+    ]
+    response_times = [
+        # coarse timestamps so equidistant neighbours and duplicates really occur
+        {"datetime": now - rng.randrange(span // 60) * 60, "value": rng.randint(50, 2000)}
+        for _ in range(n_response_times)
+    ]
+    logs.sort(key=lambda log: log["datetime"], reverse=True)
+    response_times.sort(key=lambda rt: rt["datetime"], reverse=True)
+    return logs, response_times
+
+
+def legacy_response_time_entry(rt, existing_log_timestamps):
+    """The previous _process_response_time_entry: linear ±300s scan"""
+    timestamp = rt.get("datetime", 0)
+    rt_datetime = _validate_timestamp(timestamp)
+    if not rt_datetime:
+        return None
+    try:
+        rt_value = float(rt.get("value", 0))
+        if rt_value < 0:
+            return None
+    except (ValueError, TypeError):
+        return None
+    timestamp_int = int(timestamp)
+    if any(abs(log_ts - timestamp_int) <= 300 for log_ts in existing_log_timestamps):
+        return None
+    return UptimeCheckResponse(id=timestamp_int, website_id=0, is_up=True, response_time=rt_value,
+                               status_code=200, error_message=None, timestamp=rt_datetime)
+
+
+def legacy_make_check(logs, response_times):
+    index = _build_response_time_index(response_times)
+    sorted_logs = sorted(logs, key=lambda x: x.get("datetime", 0), reverse=True)
+    checks = [c for c in (_process_uptimerobot_log(log, index) for log in sorted_logs) if c]
+    log_timestamps = {int(log.get("datetime", 0)) for log in sorted_logs}
+    for rt in response_times:
+        check = legacy_response_time_entry(rt, log_timestamps)
+        if check:
+            checks.append(check)
+    checks.sort(key=lambda x: x.timestamp, reverse=True)
+    return checks
+
+
+# Sizes on both sides of VECTORIZE_MIN_RESPONSE_TIMES
+@pytest.mark.parametrize("n_response_times", [500, 4000])
+@pytest.mark.parametrize("seed", range(5))
+def test_make_check_matches_linear_dedup(seed, n_response_times):
+    logs, response_times = make_history(400, n_response_times, seed)
+    assert makeCheck(logs, response_times) == legacy_make_check(logs, response_times)
+
+
+def test_large_history_exceeds_vectorize_threshold():
+    # Keeps the parametrized sizes meaningful if the threshold moves
+    assert 500 < VECTORIZE_MIN_RESPONSE_TIMES <= 4000
+
+
+@pytest.mark.parametrize("timestamp, expected", [
+    (1000 - LOG_DEDUP_WINDOW - 1, False),
+    (1000 - LOG_DEDUP_WINDOW, True),
+    (1000, True),
+    (2000 + LOG_DEDUP_WINDOW, True),
+    (2000 + LOG_DEDUP_WINDOW + 1, False),
+    (1500, False),
+])
+def test_has_timestamp_within_window_edges(timestamp, expected):
+    assert _has_timestamp_within([1000, 2000], timestamp) is expected
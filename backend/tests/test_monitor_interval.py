@@ -0,0 +1,93 @@
+"""A monitor's check interval is stored on create and edit, so the prober's periodic refresh reads it back"""
+
+from contextlib import asynccontextmanager
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from database import AsyncDB
+from database.MonitorDB import monitor_update_query
+from routes.monitor_routes import monitor_route
+from services.monitor_service_pkg.async_api_client import async_uptime_api
+
+
+class RecordingCursor:
+    def __init__(self):
+        self.executed = []
+        self.rowcount = 1
+        self.row = (42,)
+
+    async def execute(self, sql, params=()):
+        self.executed.append((" ".join(sql.split()), params))
+
+    async def fetchone(self):
+        return self.row
+
+
+class RecordingConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    @asynccontextmanager
+    async def cursor(self):
+        yield self._cursor
+
+    async def commit(self):
+        pass
+
+
+@pytest.fixture
+def recording_db(monkeypatch):
+    cursor = RecordingCursor()
+
+    @asynccontextmanager
+    async def db_connection():
+        yield RecordingConnection(cursor)
+
+    monkeypatch.setattr(AsyncDB, "db_connection", db_connection)
+    return cursor
+
+
+async def test_create_inserts_interval(recording_db):
+    monitor = {"monitorid": 42, "userid": 1, "sitename": "a", "site_url": "https://a.example",
+               "monitor_created": "2024-01-01T00:00:00", "interval": 120}
+    assert (await AsyncDB._create_new_monitor(monitor))["success"]
+    sql, params = recording_db.executed[0]
+    assert sql.startswith("INSERT INTO monitors (monitorid, userid, sitename, site_url, monitor_created, interval)")
+    assert params[-1] == 120
+
+
+async def test_edit_updates_interval(recording_db):
+    assert (await AsyncDB._edit_monitor(42, {"interval": 600}))["success"]
+    assert recording_db.executed == [("UPDATE monitors SET interval = %s WHERE monitorid = %s", (600, 42))]
+
+
+def test_update_query_maps_interval_column():
+    assert monitor_update_query(7, {"interval": 60, "url": "ignored"}) == (
+        "UPDATE monitors SET interval = %s WHERE monitorid = %s", (60, 7))
+
+
+def test_edit_route_writes_interval_to_the_database(monkeypatch):
+    written = []
+
+    async def edit_monitor(monitor_id, update_data):
+        return {"success": True}
+
+    async def db_edit_monitor(monitor_id, update_data):
+        written.append((monitor_id, update_data))
+        return {"success": True}
+
+    monkeypatch.setattr(async_uptime_api, "edit_monitor", edit_monitor)
+    monkeypatch.setattr(monitor_route, "db_edit_monitor", db_edit_monitor)
+    response = TestClient(main.app).patch("/api/v1/monitors/edit", json={"monitor_id": 42, "interval": 300})
+    assert response.status_code == 200
+    assert written == [(42, {"interval": 300})]
+
+
+async def test_monitor_rows_are_read_by_column_name(recording_db):
+    recording_db.row = (42, 1, "a", "https://a.example", "2024-01-01T00:00:00", 120, True)
+    monitor = (await AsyncDB.get_monitor_info(42))["data"]
+    sql, _ = recording_db.executed[0]
+    assert "SELECT *" not in sql and "interval" in sql
+    assert monitor["interval"] == 120 and monitor["is_active"] is True
@@ -0,0 +1,55 @@
+"""Without an UptimeRobot key the leader schedules prober-driven alerts and rollup pruning instead of the API jobs"""
+
+import time
+
+import pytest
+
+import main
+from services.monitor_service_pkg import alerts
+from services.monitor_service_pkg.check_store import store_probe_results
+
+
+def probe_result(monitor_id, timestamp, is_up):
+    return {"monitor_id": monitor_id, "timestamp": timestamp, "status_code": 200 if is_up else 503, "is_up": is_up,
+            "error_message": None if is_up else "HTTP 503", "response_time": 80.0, "dns_ms": None,
+            "connect_ms": None, "tls_ms": None, "ttfb_ms": None}
+
+
+@pytest.mark.parametrize("api_key, jobs", [
+    (None, {"probe_alerts", "rollup_prune"}),
+    ("u123-key", {"uptime_check", "check_history_sync"}),
+])
+async def test_leader_jobs_follow_the_api_key(monkeypatch, api_key, jobs):
+    monkeypatch.setattr(main.async_uptime_api, "api_key", api_key)
+    monkeypatch.setattr(main, "PROBER_ENABLED", False)
+    await main.start_leader_jobs()
+    try:
+        assert {job.id for job in main.task_scheduler.scheduler.get_jobs()} == jobs
+    finally:
+        await main.stop_leader_jobs()
+
+
+async def test_probe_checks_drive_alert_transitions(monkeypatch):
+    now = int(time.time())
+    store_probe_results([
+        probe_result(740001, now - 120, True), probe_result(740001, now - 60, False),
+        probe_result(740002, now - 120, False), probe_result(740002, now - 60, True),
+        probe_result(740003, now - alerts.PROBE_STATUS_MAX_AGE - 60, False),
+    ])
+    monitors = [{"monitorid": monitor_id, "sitename": f"site {monitor_id}", "site_url": f"https://{monitor_id}.example",
+                 "interval": 60} for monitor_id in (740001, 740002, 740003, 740004)]
+    saved, delivered = [], []
+
+    async def deliver_notifications(notifications, at):
+        delivered.extend(notifications)
+
+    monkeypatch.setattr(alerts, "get_active_monitors", lambda: {"success": True, "data": monitors})
+    monkeypatch.setattr(alerts, "get_alert_states", lambda: {"success": True, "data": {}})
+    monkeypatch.setattr(alerts, "save_alert_states", lambda states: saved.extend(states) or {"success": True})
+    monkeypatch.setattr(alerts, "deliver_notifications", deliver_notifications)
+
+    await alerts.check_probe_monitors()
+    assert [(kind, monitor) for kind, monitor, _ in delivered] == [
+        (alerts.NOTIFY_DOWN, {"id": 740001, "status": "down", "friendlyName": "site 740001",
+                              "url": "https://740001.example"})]
+    assert [state["monitorid"] for state in saved] == [740001]
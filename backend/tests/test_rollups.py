@@ -0,0 +1,114 @@
+"""Window decomposition over the rollup buckets, window summaries that survive pruning, and time-based uptime"""
+
+import random
+import time
+
+import pytest
+
+from services.monitor_service_pkg.check_store import store_monitor_delta, store_probe_results
+from services.monitor_service_pkg.rollups import (
+    DAY, HOUR, MINUTE, _retained, decompose_window, prune_rollups, window_summary,
+)
+
+NOW = 1_700_000_000
+
+
+def covered(ranges):
+    """The [lo, hi) that a decomposition reads, checking its ranges are contiguous"""
+    for (_, _, hi), (_, lo, _) in zip(ranges, ranges[1:]):
+        assert hi == lo
+    return ranges[0][1], ranges[-1][2]
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_decomposition_reads_only_retained_buckets(seed):
+    rng = random.Random(seed)
+    start = NOW - rng.randrange(120 * DAY)
+    end = min(NOW, start + rng.randrange(1, 40 * DAY))
+    ranges = decompose_window(start, end, now=NOW)
+    lo, hi = covered(ranges)
+    assert lo <= start and hi >= end
+    for size, first, _ in ranges:
+        assert first % size == 0 and _retained(size, first, NOW)
+    # Each edge is rounded to the finest granularity kept for its age, no further
+    finest_start = next(size for size in (MINUTE, HOUR, DAY) if _retained(size, start - start % size, NOW))
+    assert lo == start - start % finest_start
+
+
+def test_recent_window_keeps_minute_edges():
+    start, end = NOW - 6 * HOUR - 125, NOW - 30
+    assert covered(decompose_window(start, end, now=NOW)) == (start - start % MINUTE, end + (-end % MINUTE))
+    assert decompose_window(start, end, now=NOW) == decompose_window(start, end)
+
+
+def test_old_window_rounds_out_to_hours_and_days():
+    hours_old = NOW - 10 * DAY - 17 * MINUTE
+    assert covered(decompose_window(hours_old, hours_old + 5 * HOUR, now=NOW)) == (
+        hours_old - hours_old % HOUR, hours_old + 5 * HOUR + (-(hours_old + 5 * HOUR) % HOUR))
+    days_old = NOW - 200 * DAY - 5 * HOUR
+    ranges = decompose_window(days_old, days_old + 2 * HOUR, now=NOW)
+    assert ranges == [(DAY, days_old - days_old % DAY, days_old - days_old % DAY + DAY)]
+
+
+def test_window_summary_is_unchanged_by_pruning():
+    monitor_id = 720001
+    now = int(time.time())
+    history_start = now - 4 * DAY
+    response_times = [{"datetime": ts, "value": 100} for ts in range(history_start, now, 60)]
+    store_monitor_delta(monitor_id, {"logs": [], "response_times": response_times})
+
+    # Starts past the minute retention, ends inside it
+    start, end = now - 3 * DAY - 1234, now - DAY - 567
+    before = window_summary(monitor_id, start, end)
+    prune_rollups(now)
+    after = window_summary(monitor_id, start, end)
+    assert after == before
+
+    lo, hi = start - start % HOUR, end + (-end % MINUTE)
+    assert after["total_checks"] == sum(1 for rt in response_times if lo <= rt["datetime"] < hi)
+
+
+def test_uptime_weighs_outages_by_duration():
+    monitor_id = 720002
+    now = int(time.time())
+    start, end = now - 2 * DAY, now
+    response_times = [{"datetime": ts, "value": 100} for ts in range(start, end, 60)]
+    long_down, blip = now - 30 * HOUR, now - 5 * HOUR
+    logs = [
+        {"id": 1, "type": 1, "datetime": long_down, "reason": {"code": "503"}},
+        {"id": 2, "type": 2, "datetime": long_down + 6 * HOUR, "reason": {"code": "200"}},
+        {"id": 3, "type": 1, "datetime": blip, "reason": {"code": "503"}},
+        {"id": 4, "type": 2, "datetime": blip + 1, "reason": {"code": "200"}},
+    ]
+    store_monitor_delta(monitor_id, {"logs": logs, "response_times": response_times})
+
+    summary = window_summary(monitor_id, start, end)
+    assert summary["downtime_seconds"] == 6 * HOUR + 1
+    assert summary["uptime_percentage"] == round(100.0 * (1 - (6 * HOUR + 1) / (2 * DAY)), 3)
+    # Counts still report the stored checks
+    assert summary["down_count"] == 2
+
+    blip_only = window_summary(monitor_id, blip - HOUR, blip + HOUR)
+    assert blip_only["uptime_percentage"] == round(100.0 * (1 - 1 / (2 * HOUR)), 3)
+
+
+def test_ongoing_outage_counts_only_elapsed_time():
+    monitor_id = 720003
+    now = int(time.time())
+    store_monitor_delta(monitor_id, {"logs": [{"id": 1, "type": 1, "datetime": now - HOUR}], "response_times": []})
+    summary = window_summary(monitor_id, now - 2 * HOUR, now + 10 * HOUR)
+    assert 49 <= summary["uptime_percentage"] <= 51
+
+
+def test_probe_uptime_is_the_share_of_up_checks():
+    monitor_id = 720004
+    now = int(time.time())
+    results = [
+        {"monitor_id": monitor_id, "timestamp": ts, "status_code": 200 if i % 4 else 503, "is_up": bool(i % 4),
+         "error_message": None, "response_time": 50.0, "dns_ms": None, "connect_ms": None, "tls_ms": None,
+         "ttfb_ms": None}
+        for i, ts in enumerate(range(now - HOUR, now, 60))
+    ]
+    store_probe_results(results)
+    summary = window_summary(monitor_id, now - HOUR, now)
+    assert summary["uptime_percentage"] == 75.0 and summary["downtime_seconds"] is None
@@ -0,0 +1,59 @@
+"""SLA windows end at now, and monitors without a downtime series report no figures"""
+
+import time
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from services.monitor_service_pkg.check_store import store_monitor_delta
+from services.monitor_service_pkg.sla import sla_report
+
+
+@pytest.fixture
+def client():
+    return TestClient(main.app)
+
+
+@pytest.fixture(scope="module")
+def outage_since():
+    """Monitor 730001 has been down for the last hour"""
+    since = int(time.time()) - 3600
+    store_monitor_delta(730001, {"logs": [{"id": 1, "type": 2, "datetime": since - 86400},
+                                          {"id": 2, "type": 1, "datetime": since}], "response_times": []})
+    return since
+
+
+def test_current_month_ends_now(client, outage_since):
+    month = datetime.now(timezone.utc).strftime("%Y-%m")
+    before = int(time.time())
+    sla = client.get("/api/v1/sla/monitor/730001", params={"month": month}).json()
+    assert before <= sla["end"] <= int(time.time())
+    assert sla["downtime_seconds"] == pytest.approx(sla["end"] - max(outage_since, sla["start"]), abs=2)
+    assert sla["uptime_percentage"] < 100
+
+
+def test_future_end_is_clamped(client, outage_since):
+    start = outage_since - 3600
+    sla = client.get("/api/v1/sla/monitor/730001", params={"start": start, "end": start + 30 * 86400}).json()
+    assert sla["end"] <= int(time.time())
+    assert 45 <= sla["uptime_percentage"] <= 55
+
+
+def test_window_in_the_future_is_rejected(client):
+    start = int(time.time()) + 3600
+    assert client.get("/api/v1/sla/monitor/730001", params={"start": start, "end": start + 60}).status_code == 400
+
+
+def test_monitor_without_downtime_series_has_no_figures(client, outage_since):
+    now = int(time.time())
+    report = client.get("/api/v1/sla/monitor/730999", params={"start": now - 86400, "end": now}).json()
+    assert report["uptime_percentage"] is None and report["downtime_seconds"] is None
+
+
+def test_sla_report_mixes_known_and_unknown_monitors(outage_since):
+    now = int(time.time())
+    known, unknown = sla_report([730001, 730999], now - 7200, now)
+    assert known["downtime_seconds"] == pytest.approx(now - outage_since, abs=2)
+    assert unknown["monitor_id"] == 730999 and unknown["uptime_percentage"] is None
@@ -0,0 +1,57 @@
+"""UptimeRobot calls that exhaust their retries / deadline surface as 503, not as empty results or a bare 500"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from services.monitor_service_pkg.api_client import uptime_api
+from services.monitor_service_pkg.async_api_client import async_uptime_api
+from services.monitor_service_pkg.rate_limit import UptimeRobotAPIError
+
+
+@pytest.fixture
+def unavailable(monkeypatch):
+    async def async_request(*args, **kwargs):
+        raise UptimeRobotAPIError("GET monitors failed after 5 attempts: HTTP 503")
+
+    def request(*args, **kwargs):
+        raise UptimeRobotAPIError("GET monitors failed after 5 attempts: HTTP 503")
+
+    monkeypatch.setattr(async_uptime_api, "_request", async_request)
+    monkeypatch.setattr(uptime_api, "_request", request)
+    async_uptime_api.invalidate_monitor_cache()
+    yield
+    async_uptime_api.invalidate_monitor_cache()
+
+
+@pytest.fixture
+def client():
+    # No context manager: the startup hook (pools, scheduler, workers) is not needed here
+    return TestClient(main.app)
+
+
+@pytest.mark.parametrize("method, path, body", [
+    ("GET", "/api/v1/monitors", None),
+    ("POST", "/api/v1/monitors", {"user_id": 1, "monitor_id": 1}),
+    ("POST", "/api/v1/monitors/create",
+     {"user_id": 1, "monitor": {"sitename": "a", "site_url": "https://a.example", "interval": 300}}),
+    ("PATCH", "/api/v1/monitors/edit", {"monitor_id": 1, "sitename": "renamed"}),
+])
+def test_routes_answer_503(unavailable, client, method, path, body):
+    response = client.request(method, path, json=body)
+    assert response.status_code == 503
+    assert response.json() == {"detail": "UptimeRobot API unavailable, try again shortly"}
+
+
+@pytest.mark.parametrize("call", [
+    lambda api: api._get_all_monitors(),
+    lambda api: api._get_monitor_by_monitor_id("1"),
+    lambda api: api._create_new_monitor("1", {"sitename": "a", "site_url": "https://a.example", "interval": 300}),
+    lambda api: api._delete_monitor("1"),
+    lambda api: api.edit_monitor("1", {"friendlyName": "renamed"}),
+])
+async def test_clients_let_the_error_through(unavailable, call):
+    with pytest.raises(UptimeRobotAPIError):
+        call(uptime_api)
+    with pytest.raises(UptimeRobotAPIError):
+        await call(async_uptime_api)